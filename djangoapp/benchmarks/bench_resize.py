@@ -0,0 +1,119 @@
+"""
+Benchmark do redimensionamento de imagens.
+
+Compara o caminho antigo (decodifica tudo + LANCZOS) com o resize_image_path
+atual em JPEGs sintéticos de vários tamanhos. Cada medição roda num processo
+novo para que o pico de RSS seja só daquela imagem.
+
+    python -m benchmarks.bench_resize --megapixels 12 24 48 --json out.json
+"""
+import argparse
+import json
+import multiprocessing
+import resource
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image
+
+from utils.images import resize_image_path
+
+
+def legacy_resize(image_path, new_width):
+    image_pillow = Image.open(image_path)
+    original_width, original_height = image_pillow.size
+    new_height = round(new_width * original_height / original_width)
+    new_image = image_pillow.resize((new_width, new_height), Image.LANCZOS)
+    new_image.save(image_path, optimize=True, quality=60)
+
+
+STRATEGIES = {
+    'legacy': legacy_resize,
+    'streaming': resize_image_path,
+}
+
+
+def make_jpeg(path, megapixels):
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    # Gradiente + ruído para o JPEG não ficar trivialmente compressível
+    image = Image.linear_gradient('L').resize((width, height))
+    noise = Image.effect_noise((width, height), 40)
+    Image.merge('RGB', (image, noise, image)).save(path, quality=90)
+
+
+def measure(strategy, image_path, new_width, queue):
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    STRATEGIES[strategy](image_path, new_width)
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss vem em KiB no Linux
+    queue.put({'seconds': elapsed, 'peak_rss_mb': peak / 1024,
+               'delta_rss_mb': (peak - before) / 1024})
+
+
+def run_isolated(context, strategy, image_path, new_width):
+    queue = context.Queue()
+    process = context.Process(
+        target=measure, args=(strategy, image_path, new_width, queue)
+    )
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--megapixels', type=float, nargs='+', default=[12, 24, 48])
+    parser.add_argument('--width', type=int, default=900)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--json', help='Grava os resultados neste arquivo')
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('spawn')
+    workdir = Path(tempfile.mkdtemp(prefix='bench_resize_'))
+    results = []
+
+    try:
+        for megapixels in args.megapixels:
+            source = workdir / f'{megapixels}mp.jpg'
+            generator = context.Process(target=make_jpeg, args=(source, megapixels))
+            generator.start()
+            generator.join()
+
+            for strategy in STRATEGIES:
+                runs = []
+                for _ in range(args.repeat):
+                    target = workdir / f'{strategy}.jpg'
+                    shutil.copy(source, target)
+                    runs.append(run_isolated(context, strategy, target, args.width))
+
+                best = min(run['seconds'] for run in runs)
+                result = {
+                    'strategy': strategy,
+                    'megapixels': megapixels,
+                    'peak_rss_mb': round(max(run['peak_rss_mb'] for run in runs), 1),
+                    'delta_rss_mb': round(max(run['delta_rss_mb'] for run in runs), 1),
+                    'seconds': round(best, 4),
+                    'ms_per_megapixel': round(best * 1000 / megapixels, 2),
+                }
+                results.append(result)
+                print(
+                    f"{strategy:>10} {megapixels:>5}MP  "
+                    f"pico {result['peak_rss_mb']:>7.1f} MB  "
+                    f"(+{result['delta_rss_mb']:.1f})  "
+                    f"{result['ms_per_megapixel']:>7.2f} ms/MP"
+                )
+    finally:
+        shutil.rmtree(workdir)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
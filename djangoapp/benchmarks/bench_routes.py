@@ -0,0 +1,244 @@
+"""
+Benchmark de todas as rotas de blog/urls.py contra um servidor local.
+
+Para cada rota: p50/p95/p99, requests por segundo e queries por request.
+As queries são contadas aqui mesmo, com o test Client e o cache de páginas
+desligado (o custo de um miss). Se o servidor mandar Server-Timing
+(METRICS_SERVER_TIMING=1), entram também a média de queries e de tempo de
+banco medidos sob carga.
+
+Roda offline contra o banco do dotenv_files/.env (Postgres local):
+
+    python manage.py seed_corpus --posts 100000 --tags 1000 --categories 200
+    python -m benchmarks.bench_routes --json antes.json
+    # ... muda o código ...
+    python -m benchmarks.bench_routes --json depois.json
+    python -m benchmarks.compare antes.json depois.json
+"""
+import argparse
+import json
+import math
+import os
+import random
+import re
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlencode
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from benchmarks.bench_serving import DJANGOAPP_DIR, MODES, serve  # noqa: E402
+from benchmarks.loadgen import run_load, wait_until_up  # noqa: E402
+from blog.management.commands.seed_corpus import WORDS  # noqa: E402
+from blog.models import Category, Page, Post, Tag  # noqa: E402
+from blog.snapshot import snapshot_host  # noqa: E402
+from blog.urls import app_name, urlpatterns  # noqa: E402
+from blog.views import PER_PAGE  # noqa: E402
+
+SERVER_TIMING_DB = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+def sample(queryset, field, size, rng):
+    # Sorteio pelo rng (e não ORDER BY random()) para que duas execuções
+    # com o mesmo --seed batam nas mesmas URLs
+    values = list(queryset.order_by('pk').values_list(field, flat=True))
+    return rng.sample(values, min(size, len(values)))
+
+
+def route_paths(size, rng):
+    """URLs de cada rota, com objetos sorteados do banco."""
+    published = Post.objects.filter(is_published=True)
+    index = [reverse('blog:index')]
+    if settings.BLOG_PAGINATION_MODE == 'offset':
+        last_page = max(math.ceil(published.count() / PER_PAGE), 1)
+        index += [
+            f'{index[0]}?page={rng.randint(1, last_page)}' for _ in range(size)
+        ]
+
+    return {
+        'blog:index': index,
+        'blog:post': [
+            reverse('blog:post', args=(slug,))
+            for slug in sample(published, 'slug', size, rng)
+        ],
+        'blog:page': [
+            reverse('blog:page', args=(slug,))
+            for slug in sample(Page.objects.filter(is_published=True), 'slug', size, rng)
+        ],
+        'blog:created_by': [
+            reverse('blog:created_by', args=(pk,))
+            for pk in sample(
+                User.objects.filter(post_created_by__is_published=True).distinct(),
+                'pk', size, rng,
+            )
+        ],
+        'blog:category': [
+            reverse('blog:category', args=(slug,))
+            for slug in sample(
+                Category.objects.filter(published_posts_count__gt=0), 'slug',
+                size, rng,
+            )
+        ],
+        'blog:tag': [
+            reverse('blog:tag', args=(slug,))
+            for slug in sample(
+                Tag.objects.filter(published_posts_count__gt=0), 'slug', size, rng
+            )
+        ],
+        'blog:search': [
+            reverse('blog:search') + '?' + urlencode({'search': rng.choice(WORDS)})
+            for _ in range(size)
+        ],
+    }
+
+
+def check_coverage(routes):
+    names = {f'{app_name}:{pattern.name}' for pattern in urlpatterns}
+    missing = names - routes.keys()
+    if missing:
+        raise SystemExit(f'Rotas sem benchmark: {", ".join(sorted(missing))}')
+
+
+def count_queries(paths):
+    """Média de queries de um request sem o cache de páginas."""
+    client = Client(HTTP_HOST=snapshot_host())
+    client.get(paths[0])  # aquece o cache do setup e do menu
+    counts = []
+    with override_settings(BLOG_PAGE_CACHE_TIMEOUT=0):
+        for path in paths[:10]:
+            with CaptureQueriesContext(connection) as queries:
+                client.get(path)
+            counts.append(len(queries))
+    return round(sum(counts) / len(counts), 2)
+
+
+class ServerTiming:
+    """Soma as queries e o tempo de banco do header Server-Timing."""
+
+    def __init__(self):
+        self.samples = []
+
+    def __call__(self, path, response, elapsed):
+        match = SERVER_TIMING_DB.search(response.getheader('Server-Timing') or '')
+        if match:
+            self.samples.append((float(match[1]), int(match[2])))
+
+    def summary(self):
+        if not self.samples:
+            return {}
+        total = len(self.samples)
+        return {
+            'load_db_ms': round(sum(db for db, _ in self.samples) / total, 2),
+            'load_queries_per_request': round(
+                sum(queries for _, queries in self.samples) / total, 2
+            ),
+        }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=DJANGOAPP_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def corpus_meta():
+    return {
+        'posts': Post.objects.count(),
+        'published_posts': Post.objects.filter(is_published=True).count(),
+        'pages': Page.objects.count(),
+        'tags': Tag.objects.count(),
+        'categories': Category.objects.count(),
+        'database': connection.vendor,
+    }
+
+
+def bench_routes(base_url, routes, args):
+    wait_until_up(base_url)
+    results = {}
+    for name, paths in routes.items():
+        if not paths:
+            print(f'{name:>16}  sem objetos no banco, pulando')
+            continue
+
+        timing = ServerTiming()
+        result = run_load(
+            base_url, paths, concurrency=args.concurrency,
+            duration=args.duration, on_response=timing,
+        )
+        results[name] = {
+            **result,
+            'queries_per_request': count_queries(paths),
+            **timing.summary(),
+        }
+        print(
+            f"{name:>16}  {result['rps']:>8.1f} req/s  p50 {result['p50_ms']} ms  "
+            f"p95 {result['p95_ms']} ms  p99 {result['p99_ms']} ms  "
+            f"queries {results[name]['queries_per_request']}  "
+            f"erros {result['errors']}"
+        )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--base-url', help='Usa um servidor já rodando em vez de subir um',
+    )
+    parser.add_argument('--mode', choices=MODES, default='gunicorn-wsgi')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument(
+        '--sample', type=int, default=200,
+        help='Objetos sorteados por rota (URLs diferentes sob carga)',
+    )
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--json', help='Grava os resultados neste arquivo')
+    args = parser.parse_args()
+
+    routes = route_paths(args.sample, random.Random(args.seed))
+    check_coverage(routes)
+
+    if args.base_url:
+        results = bench_routes(args.base_url, routes, args)
+    else:
+        with serve(args.mode, args.port, args.workers) as base_url:
+            results = bench_routes(base_url, routes, args)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'mode': args.base_url or args.mode,
+            'workers': args.workers,
+            'concurrency': args.concurrency,
+            'duration_s': args.duration,
+            'pagination': settings.BLOG_PAGINATION_MODE,
+            'page_cache_timeout': settings.BLOG_PAGE_CACHE_TIMEOUT,
+            'corpus': corpus_meta(),
+        },
+        'routes': results,
+    }
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Compara o runserver com o gunicorn (wsgi/asgi): tempo de boot até o
+primeiro 200 e vazão sob carga concorrente.
+
+Usa o banco configurado em dotenv_files/.env. Exemplo:
+
+    python -m benchmarks.bench_serving --mode runserver gunicorn-wsgi \\
+        --concurrency 20 --duration 15 --json serving.json
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+from benchmarks.loadgen import run_load, wait_until_up
+
+DJANGOAPP_DIR = Path(__file__).resolve().parent.parent
+
+MODES = {
+    'runserver': (
+        [sys.executable, 'manage.py', 'runserver', '--noreload', '{bind}'], {}
+    ),
+    'gunicorn-wsgi': (
+        [sys.executable, '-m', 'gunicorn', '-c', 'project/gunicorn.conf.py'],
+        {'SERVER_PROTOCOL': 'wsgi'},
+    ),
+    'gunicorn-asgi': (
+        [sys.executable, '-m', 'gunicorn', '-c', 'project/gunicorn.conf.py'],
+        {'SERVER_PROTOCOL': 'asgi'},
+    ),
+}
+
+
+@contextmanager
+def serve(mode, port, workers=None, extra_env=None):
+    """Sobe o servidor no modo pedido e devolve a URL base."""
+    command, mode_env = MODES[mode]
+    bind = f'127.0.0.1:{port}'
+    env = {
+        **os.environ, **mode_env, **(extra_env or {}),
+        'GUNICORN_BIND': bind, 'GUNICORN_ACCESSLOG': '',
+    }
+    if workers:
+        env['WEB_CONCURRENCY'] = str(workers)
+
+    process = subprocess.Popen(
+        [part.format(bind=bind) for part in command],
+        cwd=DJANGOAPP_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        yield f'http://{bind}'
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=30)
+
+
+def bench_mode(mode, args):
+    with serve(mode, args.port, args.workers) as base_url:
+        cold_start = wait_until_up(base_url, args.paths[0])
+        result = run_load(
+            base_url, args.paths,
+            concurrency=args.concurrency, duration=args.duration,
+        )
+
+    return {'mode': mode, 'cold_start_s': round(cold_start, 3), **result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--mode', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--paths', nargs='+', default=['/'])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--json', help='Grava os resultados neste arquivo')
+    args = parser.parse_args()
+
+    results = []
+    for mode in args.mode:
+        result = bench_mode(mode, args)
+        results.append(result)
+        print(
+            f"{mode:>14}  boot {result['cold_start_s']:>6.2f}s  "
+            f"{result['rps']:>8.1f} req/s  p50 {result['p50_ms']} ms  "
+            f"p99 {result['p99_ms']} ms  erros {result['errors']}"
+        )
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
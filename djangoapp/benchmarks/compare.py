@@ -0,0 +1,76 @@
+"""
+Compara dois resultados do bench_routes e aponta as regressões.
+
+    python -m benchmarks.compare antes.json depois.json --threshold 10
+
+Sai com código 1 se alguma rota piorou mais que --threshold por cento em
+latência, vazão ou queries, então serve de gate num script de CI.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# métrica -> True se maior é melhor
+METRICS = {
+    'p50_ms': False,
+    'p95_ms': False,
+    'p99_ms': False,
+    'rps': True,
+    'queries_per_request': False,
+}
+
+
+def change(old, new):
+    if old in (None, 0) or new is None:
+        return None
+    return (new - old) / old * 100
+
+
+def compare(old, new, threshold):
+    rows, regressions = [], []
+    for route in sorted(old['routes'].keys() & new['routes'].keys()):
+        for metric, higher_is_better in METRICS.items():
+            before = old['routes'][route].get(metric)
+            after = new['routes'][route].get(metric)
+            delta = change(before, after)
+            worse = delta is not None and (
+                -delta if higher_is_better else delta
+            ) > threshold
+            rows.append((route, metric, before, after, delta, worse))
+            if worse:
+                regressions.append((route, metric))
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument(
+        '--threshold', type=float, default=10.0,
+        help='Piora (em %%) a partir da qual conta como regressão',
+    )
+    args = parser.parse_args()
+
+    old = json.loads(Path(args.old).read_text())
+    new = json.loads(Path(args.new).read_text())
+    print(f"{old['meta'].get('commit')} -> {new['meta'].get('commit')}")
+
+    rows, regressions = compare(old, new, args.threshold)
+    for route, metric, before, after, delta, worse in rows:
+        delta_text = '' if delta is None else f'{delta:+.1f}%'
+        print(
+            f"{route:>16}  {metric:<20} {before!s:>10} -> {after!s:<10} "
+            f"{delta_text:>8}{'  REGRESSÃO' if worse else ''}"
+        )
+
+    for route in sorted(old['routes'].keys() ^ new['routes'].keys()):
+        print(f'{route:>16}  só em um dos arquivos')
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Gerador de carga simples (threads + conexões keep-alive), sem dependências
+externas, para rodar offline contra um servidor local.
+"""
+import http.client
+import statistics
+import threading
+import time
+from itertools import cycle
+from urllib.parse import urlsplit
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def summarize(latencies, errors, elapsed):
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2) if latencies else None,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+    }
+
+
+class Worker(threading.Thread):
+    def __init__(self, base_url, paths, deadline, on_response=None):
+        super().__init__(daemon=True)
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.paths = cycle(paths)
+        self.deadline = deadline
+        self.on_response = on_response
+        self.latencies = []
+        self.errors = 0
+
+    def connect(self):
+        return http.client.HTTPConnection(self.host, self.port, timeout=30)
+
+    def run(self):
+        connection = self.connect()
+        while time.monotonic() < self.deadline:
+            path = next(self.paths)
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path)
+                response = connection.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                self.errors += 1
+                connection.close()
+                connection = self.connect()
+                continue
+
+            elapsed = time.perf_counter() - started
+            if response.status >= 400:
+                self.errors += 1
+                continue
+            self.latencies.append(elapsed)
+            if self.on_response is not None:
+                self.on_response(path, response, elapsed)
+        connection.close()
+
+
+def run_load(base_url, paths, concurrency=10, duration=10.0, on_response=None):
+    deadline = time.monotonic() + duration
+    workers = [
+        Worker(base_url, paths, deadline, on_response)
+        for _ in range(concurrency)
+    ]
+    started = time.monotonic()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.monotonic() - started
+
+    latencies = [latency for worker in workers for latency in worker.latencies]
+    errors = sum(worker.errors for worker in workers)
+    return summarize(latencies, errors, elapsed)
+
+
+def wait_until_up(base_url, path='/', timeout=60.0):
+    """Espera o servidor responder 2xx/3xx e retorna quanto tempo levou."""
+    parts = urlsplit(base_url)
+    started = time.monotonic()
+    while time.monotonic() - started < timeout:
+        try:
+            connection = http.client.HTTPConnection(
+                parts.hostname, parts.port or 80, timeout=5
+            )
+            connection.request('GET', path)
+            status = connection.getresponse().status
+            connection.close()
+            if status < 400:
+                return time.monotonic() - started
+        except OSError:
+            pass
+        time.sleep(0.05)
+    raise TimeoutError(f'{base_url}{path} não respondeu em {timeout}s')
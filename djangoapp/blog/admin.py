@@ -10,7 +10,7 @@ from blog.models import Category, Page, Post, Tag
 
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
-    list_display = 'id', 'name', 'slug',
+    list_display = 'id', 'name', 'slug', 'published_posts_count',
     list_display_link = 'name',
     search_fields = 'id', 'name', 'slug',
     list_per_page = 10
@@ -21,7 +21,7 @@ class TagAdmin(admin.ModelAdmin):
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = 'id', 'name', 'slug',
+    list_display = 'id', 'name', 'slug', 'published_posts_count',
     list_display_links = 'name',
     search_fields = 'id', 'name', 'slug',
     list_per_page = 10
@@ -72,7 +72,6 @@ class PostAdmin(SummernoteModelAdmin):
         return safe_link 
 
     def save_model(self, request: Any, obj: Any, form: Any, change: Any) -> None:
-        print('Foi alterado?', change)
         if change:
             obj.updated_by = request.user
         else:
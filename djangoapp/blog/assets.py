@@ -0,0 +1,114 @@
+"""
+Bundles de estáticos do blog.
+
+Cada bundle junta vários arquivos estáticos num só (menos requests no
+post) e sai em blog/static/blog/bundles/, onde o collectstatic o pega,
+coloca o hash no nome e comprime (STORAGES em project/settings.py).
+
+O CodeMirror e os bundles não ficam no repositório: o Dockerfile roda o
+vendor_assets (que baixa a versão fixada abaixo para
+blog/static/blog/vendor/ e confere o SHA-256 de cada arquivo) e o
+build_assets no build da imagem. Sem eles
+(checkout novo, runserver, volume do docker-compose por cima do código),
+o {% static_bundle %} cai nos arquivos de origem que existirem.
+"""
+import re
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+
+BLOG_STATIC = Path(__file__).resolve().parent / 'static'
+BUNDLES_DIR = 'blog/bundles'
+VENDOR_DIR = 'blog/vendor'
+
+CODEMIRROR_VERSION = '5.65.16'
+CODEMIRROR_URL = (
+    'https://cdnjs.cloudflare.com/ajax/libs/codemirror/{version}/{path}'
+)
+# Ordem importa: htmlmixed depende de xml, javascript e css
+CODEMIRROR_FILES = (
+    'codemirror.min.css',
+    'theme/dracula.min.css',
+    'codemirror.min.js',
+    'mode/xml/xml.min.js',
+    'mode/javascript/javascript.min.js',
+    'mode/css/css.min.js',
+    'mode/htmlmixed/htmlmixed.min.js',
+    'mode/python/python.min.js',
+)
+# SHA-256 de cada arquivo de CODEMIRROR_FILES na CODEMIRROR_VERSION: o
+# vendor_assets recusa arquivo sem hash aqui ou com hash diferente. Ao
+# fixar ou trocar a versão, rode manage.py vendor_assets --print-hashes
+# numa rede confiável, confira com os hashes SRI publicados pelo cdnjs e
+# cole a saída aqui.
+CODEMIRROR_SHA256 = {}
+
+# nome do bundle -> arquivos de origem (caminhos relativos a static/)
+BUNDLES = {
+    'site.css': (
+        'blog/css/remedy.css',
+        'blog/css/style.css',
+    ),
+    'code.css': tuple(
+        f'{VENDOR_DIR}/codemirror/{path}'
+        for path in CODEMIRROR_FILES if path.endswith('.css')
+    ),
+    'code.js': tuple(
+        f'{VENDOR_DIR}/codemirror/{path}'
+        for path in CODEMIRROR_FILES if path.endswith('.js')
+    ) + ('blog/js/code.js',),
+}
+
+
+def minify_css(source):
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};:,>])\s*', r'\1', source)
+    return source.replace(';}', '}').strip()
+
+
+def build_bundle(name, sources, static_dir=BLOG_STATIC):
+    """Concatena (e, se for CSS, minifica) um bundle. Retorna o caminho."""
+    parts = []
+    for source in sources:
+        text = (static_dir / source).read_text(encoding='utf-8')
+        if name.endswith('.css') and not source.endswith('.min.css'):
+            text = minify_css(text)
+        parts.append(text.strip())
+
+    # ";" entre os JS evita que um arquivo sem ; final emende no próximo
+    separator = '\n' if name.endswith('.css') else ';\n'
+    target = static_dir / BUNDLES_DIR / name
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(separator.join(parts) + '\n', encoding='utf-8')
+    return target
+
+
+@lru_cache(maxsize=None)
+def is_collected(path):
+    # O manifest do collectstatic não muda com o processo rodando
+    try:
+        staticfiles_storage.stored_name(path)
+    except ValueError:
+        return False
+    return True
+
+
+def is_available(path):
+    if getattr(settings, 'STATIC_PIPELINE', False):
+        return is_collected(path)
+    return finders.find(path) is not None
+
+
+def bundle_files(name):
+    """
+    Caminhos estáticos a incluir para o bundle: ele mesmo se foi gerado,
+    senão os arquivos de origem que existirem.
+    """
+    bundle = f'{BUNDLES_DIR}/{name}'
+    if is_available(bundle):
+        return [bundle]
+    return [source for source in BUNDLES[name] if is_available(source)]
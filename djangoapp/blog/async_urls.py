@@ -0,0 +1,15 @@
+from django.urls import path
+
+from blog.async_views import AsyncPostDetailView, AsyncPageDetailView, AsyncCreatedByListView, AsyncCategoryListView, AsyncTagListView, AsyncSearchListView, AsyncPostListView
+
+app_name = 'blog_async'
+
+urlpatterns = [
+    path('', AsyncPostListView.as_view(), name='index'),
+    path('post/<slug:slug>/', AsyncPostDetailView.as_view(), name='post'),
+    path('page/<slug:slug>', AsyncPageDetailView.as_view(), name='page'),
+    path('created_by/<int:author_pk>', AsyncCreatedByListView.as_view(), name='created_by'),
+    path('category/<slug:slug>', AsyncCategoryListView.as_view(), name='category'),
+    path('tag/<slug:slug>', AsyncTagListView.as_view(), name='tag'),
+    path('search/', AsyncSearchListView.as_view(), name='search'),
+]
@@ -0,0 +1,142 @@
+"""
+Versões async das views de leitura do blog, usando o ORM async do Django.
+
+Ficam montadas em /async/ (BLOG_ASYNC_VIEWS=1) ao lado das views sync
+para comparar as duas pilhas sob carga concorrente via ASGI.
+
+Cada view herda a sync correspondente (queryset, título, contexto, cache
+de página e GET condicional) e só troca por ORM async as leituras feitas
+antes do template; o template é renderizado pelo handler numa thread,
+como nas views sync.
+"""
+from typing import Any
+
+from django.core.paginator import InvalidPage
+from django.http import Http404, HttpRequest, HttpResponse
+from django.shortcuts import redirect
+
+from blog.pagination import CursorPaginator, InvalidCursor
+from blog.views import (
+    CategoryListView, CreatedByListView, PageDetailView, PostDetailView,
+    PostListView, SearchListView, TagListView,
+)
+
+
+class AsyncListMixin:
+    """
+    Pagina com o ORM async antes do get_context_data, que recebe a página
+    pronta em paginate_queryset.
+    """
+    _paginated = None
+
+    async def aload_filter_object(self):
+        queryset = self.get_filter_object_queryset()
+        if queryset is not None:
+            self.filter_object = await queryset.afirst()
+            if self.filter_object is None:
+                raise Http404
+
+    async def apaginate_cursor(self, queryset, page_size):
+        paginator = CursorPaginator(queryset, page_size)
+        try:
+            page = await paginator.apage(**self.get_cursors())
+        except InvalidCursor:
+            raise Http404('Cursor inválido')
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    async def apaginate_offset(self, queryset, page_size):
+        paginator = self.get_paginator(
+            queryset, page_size, orphans=self.get_paginate_orphans(),
+            allow_empty_first_page=self.get_allow_empty(),
+        )
+        # Com contador (KnownCountPaginator) o total já vem pronto
+        known_count = getattr(paginator, 'known_count', None)
+        if known_count is None:
+            paginator.count = await queryset.acount()
+
+        page_kwarg = self.page_kwarg
+        page_number = (
+            self.kwargs.get(page_kwarg) or self.request.GET.get(page_kwarg) or 1
+        )
+        try:
+            if page_number == 'last':
+                page_number = paginator.num_pages
+            page = paginator.page(page_number)
+        except InvalidPage as error:
+            raise Http404(str(error))
+
+        page.object_list = [obj async for obj in page.object_list]
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    async def apaginate_queryset(self, queryset, page_size):
+        if self.uses_cursor_pagination():
+            return await self.apaginate_cursor(queryset, page_size)
+        return await self.apaginate_offset(queryset, page_size)
+
+    def paginate_queryset(self, queryset, page_size):
+        return self._paginated
+
+    async def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        await self.aload_filter_object()
+        self.object_list = self.get_queryset()
+
+        if not self.get_allow_empty() and not await self.object_list.aexists():
+            raise Http404
+
+        self._paginated = await self.apaginate_queryset(
+            self.object_list, self.get_paginate_by(self.object_list)
+        )
+        context = self.get_context_data()
+        return self.render_to_response(context)
+
+
+class AsyncDetailMixin:
+
+    async def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        self.object = await self.get_queryset().filter(**{
+            self.slug_field: self.kwargs.get(self.slug_url_kwarg),
+        }).afirst()
+
+        if self.object is None:
+            raise Http404
+
+        context = self.get_context_data(object=self.object)
+        return self.render_to_response(context)
+
+
+class AsyncPostListView(AsyncListMixin, PostListView):
+    pass
+
+
+class AsyncCreatedByListView(AsyncListMixin, CreatedByListView):
+    pass
+
+
+class AsyncCategoryListView(AsyncListMixin, CategoryListView):
+    pass
+
+
+class AsyncTagListView(AsyncListMixin, TagListView):
+    pass
+
+
+class AsyncSearchListView(AsyncListMixin, SearchListView):
+
+    async def apaginate_queryset(self, queryset, page_size):
+        paginated = await super().apaginate_queryset(queryset, page_size)
+        # O contexto da busca lê paginator.count
+        await paginated[0].acount()
+        return paginated
+
+    async def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        if self._search_value == '':
+            return redirect('blog:index')
+        return await super().get(request, *args, **kwargs)
+
+
+class AsyncPageDetailView(AsyncDetailMixin, PageDetailView):
+    pass
+
+
+class AsyncPostDetailView(AsyncDetailMixin, PostDetailView):
+    pass
@@ -0,0 +1,398 @@
+"""
+Importação e exportação de conteúdo em NDJSON.
+
+Um diretório de exportação tem:
+    content.ndjson  um objeto por linha, na ordem tag, category, page,
+                    post, attachment
+    media/          capas e anexos, com o mesmo caminho do MEDIA_ROOT
+
+As referências usam chaves naturais (slug de tags, categorias e posts,
+username dos autores), então o arquivo pode ser importado em outro banco.
+A importação lê uma linha por vez e grava em lotes com bulk_create, então
+a memória não cresce com o tamanho do arquivo.
+"""
+import json
+import os
+import shutil
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from blog.counters import rebuild_counters
+from blog.models import Category, Page, Post, PostAttachment, Tag
+from blog.page_cache import purge_groups
+from blog.rendering import render_fields
+from blog.search import build_search_vector, is_full_text_enabled
+from jobs.queue import enqueue_many
+from utils.slugs import assign_slugs
+
+CONTENT_FILE = 'content.ndjson'
+MEDIA_DIR = 'media'
+CHECKPOINT_FILE = '.import-checkpoint'
+
+# Mesmos parâmetros que os save() usam para enfileirar o resize
+COVER_WIDTH = 900
+
+
+def dumps(record):
+    # As datas já vão como isoformat(): o DjangoJSONEncoder cortaria os
+    # microssegundos
+    return json.dumps(record, ensure_ascii=False)
+
+
+def export_records(chunk_size=1000):
+    for model, record_type in ((Tag, 'tag'), (Category, 'category')):
+        for obj in model.objects.order_by('pk').iterator(chunk_size):
+            yield {'type': record_type, 'name': obj.name, 'slug': obj.slug}
+
+    for page in Page.objects.order_by('pk').iterator(chunk_size):
+        yield {
+            'type': 'page', 'title': page.title, 'slug': page.slug,
+            'is_published': page.is_published, 'content': page.content,
+        }
+
+    posts = Post.objects.order_by('pk').select_related(
+        'category', 'created_by', 'updated_by'
+    ).prefetch_related('tags').defer('search_vector')
+
+    for post in posts.iterator(chunk_size):
+        yield {
+            'type': 'post', 'title': post.title, 'slug': post.slug,
+            'excerpt': post.excerpt, 'is_published': post.is_published,
+            'content': post.content, 'cover': post.cover.name,
+            'cover_in_post_content': post.cover_in_post_content,
+            'created_at': post.created_at.isoformat(),
+            'updated_at': post.updated_at.isoformat(),
+            'created_by': post.created_by and post.created_by.username,
+            'updated_by': post.updated_by and post.updated_by.username,
+            'category': post.category and post.category.slug,
+            'tags': [tag.slug for tag in post.tags.all()],
+        }
+
+    for attachment in PostAttachment.objects.order_by('pk').iterator(chunk_size):
+        yield {
+            'type': 'attachment', 'name': attachment.name,
+            'file': attachment.file.name,
+            'uploaded': attachment.uploaded.isoformat(),
+        }
+
+
+def record_media(record):
+    if record['type'] == 'post' and record.get('cover'):
+        return Post._meta.get_field('cover').storage, record['cover']
+    if record['type'] == 'attachment':
+        return PostAttachment._meta.get_field('file').storage, record['file']
+    return None
+
+
+def export_media(storage, name, directory):
+    """Copia um arquivo do storage para o diretório. False se já existia."""
+    target = Path(directory) / MEDIA_DIR / name
+    if target.exists():
+        return False
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_target = target.with_name(target.name + '.part')
+    with storage.open(name, 'rb') as source, open(tmp_target, 'wb') as output:
+        shutil.copyfileobj(source, output, 1024 * 1024)
+    os.replace(tmp_target, target)
+    return True
+
+
+@contextmanager
+def keep_timestamps(model, *field_names):
+    # bulk_create chama o pre_save dos campos auto_now/auto_now_add, que
+    # trocaria as datas do arquivo pela data da importação.
+    fields = [model._meta.get_field(name) for name in field_names]
+    original = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, original):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def unique_by_slug(records, existing):
+    seen = set(existing)
+    for record in records:
+        slug = record.get('slug')
+        if slug and slug in seen:
+            continue
+        if slug:
+            seen.add(slug)
+        yield record
+
+
+class ContentImporter:
+    """
+    Cada lote roda numa transação e, depois do commit, o número da última
+    linha vai para o checkpoint. Se a importação parar no meio, rodar de
+    novo continua dali. Um lote refeito não duplica nada: objetos cujo
+    slug (ou arquivo, no caso dos anexos) já existe são pulados.
+    """
+
+    def __init__(self, directory, batch_size=1000, images=True, log=None):
+        self.directory = Path(directory)
+        self.batch_size = batch_size
+        self.images = images
+        self.log = log or (lambda message: None)
+        self.stats = Counter()
+        self.users = {}
+        self.categories = {}
+        self.tags = {}
+        self.importers = {
+            'tag': self.import_tags,
+            'category': self.import_categories,
+            'page': self.import_pages,
+            'post': self.import_posts,
+            'attachment': self.import_attachments,
+        }
+
+    @property
+    def checkpoint_path(self):
+        return self.directory / CHECKPOINT_FILE
+
+    def read_checkpoint(self):
+        try:
+            return json.loads(self.checkpoint_path.read_text())['line']
+        except FileNotFoundError:
+            return 0
+
+    def write_checkpoint(self, line):
+        tmp_path = self.checkpoint_path.with_suffix('.part')
+        tmp_path.write_text(json.dumps({'line': line}))
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def records(self, start):
+        with open(self.directory / CONTENT_FILE, encoding='utf-8') as content:
+            for number, line in enumerate(content, 1):
+                if number > start and line.strip():
+                    yield number, json.loads(line)
+
+    def run(self, restart=False):
+        start = 0 if restart else self.read_checkpoint()
+        if start:
+            self.log(f'Continuando a partir da linha {start + 1}')
+
+        batch, batch_type, last_line = [], None, start
+
+        for number, record in self.records(start):
+            if batch and (
+                record['type'] != batch_type or len(batch) >= self.batch_size
+            ):
+                self.flush(batch_type, batch, last_line)
+                batch = []
+            batch_type = record['type']
+            batch.append(record)
+            last_line = number
+
+        if batch:
+            self.flush(batch_type, batch, last_line)
+
+        self.finish()
+        return self.stats
+
+    def flush(self, record_type, records, line):
+        with transaction.atomic():
+            self.importers[record_type](records)
+        self.write_checkpoint(line)
+        self.log(f'linha {line}: {len(records)} {record_type}(s)')
+
+    def finish(self):
+        rebuild_counters()
+
+        # Lotes de uma execução anterior também entram: purga todas as
+        # listagens que um post importado pode ter mudado.
+        groups = {'index'}
+        groups.update(
+            f'category:{slug}'
+            for slug in Category.objects.values_list('slug', flat=True)
+        )
+        groups.update(
+            f'tag:{slug}' for slug in Tag.objects.values_list('slug', flat=True)
+        )
+        groups.update(
+            f'author:{pk}' for pk in Post.objects.exclude(
+                created_by=None
+            ).order_by().values_list('created_by', flat=True).distinct()
+        )
+        purge_groups(groups)
+
+    def lookup(self, model, cache, slugs):
+        missing = {slug for slug in slugs if slug and slug not in cache}
+        if missing:
+            cache.update(
+                model.objects.filter(slug__in=missing).values_list('slug', 'pk')
+            )
+        return cache
+
+    def lookup_users(self, usernames):
+        missing = {name for name in usernames if name and name not in self.users}
+        if missing:
+            self.users.update(
+                User.objects.filter(username__in=missing).values_list(
+                    'username', 'pk'
+                )
+            )
+        return self.users
+
+    def import_media(self, record):
+        media = record_media(record)
+        if media is None:
+            return
+
+        storage, name = media
+        source = self.directory / MEDIA_DIR / name
+
+        if storage.exists(name):
+            return
+        if not source.exists():
+            self.stats['missing_media'] += 1
+            return
+
+        with open(source, 'rb') as source_file:
+            storage.save(name, File(source_file))
+        self.stats['media'] += 1
+
+    def enqueue_resizes(self, names):
+        if not self.images:
+            return
+        enqueue_many('resize_image', (
+            {
+                'name': name, 'new_width': COVER_WIDTH, 'optimize': True,
+                'quality': 60, 'renditions': True,
+            }
+            for name in names if name
+        ))
+
+    def update_search_vectors(self, model, objs):
+        if objs and is_full_text_enabled(model):
+            model.objects.filter(pk__in=[obj.pk for obj in objs]).update(
+                search_vector=build_search_vector(*model.SEARCH_FIELDS)
+            )
+
+    def import_taxonomy(self, model, cache, records):
+        slugs = [record.get('slug') for record in records]
+        self.lookup(model, cache, slugs)
+
+        objs = [
+            model(name=record['name'], slug=record.get('slug') or None)
+            for record in unique_by_slug(records, cache)
+        ]
+        assign_slugs(model, objs, 'name')
+        model.objects.bulk_create(objs)
+
+        cache.update((obj.slug, obj.pk) for obj in objs)
+        self.stats[model._meta.model_name] += len(objs)
+
+    def import_tags(self, records):
+        self.import_taxonomy(Tag, self.tags, records)
+
+    def import_categories(self, records):
+        self.import_taxonomy(Category, self.categories, records)
+
+    def import_pages(self, records):
+        existing = Page.objects.filter(
+            slug__in=[record.get('slug') for record in records]
+        ).values_list('slug', flat=True)
+
+        objs = [
+            Page(
+                title=record['title'], slug=record.get('slug') or '',
+                is_published=record.get('is_published', False),
+                content=record.get('content', ''),
+            )
+            for record in unique_by_slug(records, existing)
+        ]
+        # bulk_create não chama o save(), que é quem preenche o content_html
+        for obj in objs:
+            render_fields(obj)
+        assign_slugs(Page, objs, 'title')
+        Page.objects.bulk_create(objs)
+
+        self.update_search_vectors(Page, objs)
+        self.stats['page'] += len(objs)
+
+    def import_posts(self, records):
+        existing = Post.objects.filter(
+            slug__in=[record.get('slug') for record in records]
+        ).values_list('slug', flat=True)
+        records = list(unique_by_slug(records, existing))
+
+        users = self.lookup_users(
+            {record.get(field) for record in records
+             for field in ('created_by', 'updated_by')}
+        )
+        categories = self.lookup(
+            Category, self.categories, {record.get('category') for record in records}
+        )
+        tags = self.lookup(
+            Tag, self.tags,
+            {slug for record in records for slug in record.get('tags', ())},
+        )
+
+        now = timezone.now()
+        objs = []
+        for record in records:
+            self.import_media(record)
+            objs.append(Post(
+                title=record['title'], slug=record.get('slug') or '',
+                excerpt=record.get('excerpt', ''),
+                is_published=record.get('is_published', False),
+                content=record.get('content', ''),
+                cover=record.get('cover') or '',
+                cover_in_post_content=record.get('cover_in_post_content', True),
+                created_at=parse_datetime(record.get('created_at') or '') or now,
+                updated_at=parse_datetime(record.get('updated_at') or '') or now,
+                created_by_id=users.get(record.get('created_by')),
+                updated_by_id=users.get(record.get('updated_by')),
+                category_id=categories.get(record.get('category')),
+            ))
+            render_fields(objs[-1])
+
+        assign_slugs(Post, objs, 'title')
+        with keep_timestamps(Post, 'created_at', 'updated_at'):
+            Post.objects.bulk_create(objs)
+
+        Post.tags.through.objects.bulk_create([
+            Post.tags.through(post_id=obj.pk, tag_id=tags[slug])
+            for obj, record in zip(objs, records)
+            for slug in record.get('tags', ()) if slug in tags
+        ], ignore_conflicts=True)
+
+        self.update_search_vectors(Post, objs)
+        self.enqueue_resizes(obj.cover.name for obj in objs)
+        self.stats['post'] += len(objs)
+
+    def import_attachments(self, records):
+        existing = PostAttachment.objects.filter(
+            file__in=[record['file'] for record in records]
+        ).values_list('file', flat=True)
+        seen = set(existing)
+
+        now = timezone.now()
+        objs = []
+        for record in records:
+            if record['file'] in seen:
+                continue
+            seen.add(record['file'])
+            self.import_media(record)
+            objs.append(PostAttachment(
+                name=record.get('name') or record['file'],
+                file=record['file'],
+                uploaded=parse_datetime(record.get('uploaded') or '') or now,
+            ))
+
+        with keep_timestamps(PostAttachment, 'uploaded'):
+            PostAttachment.objects.bulk_create(objs)
+
+        self.enqueue_resizes(obj.file.name for obj in objs)
+        self.stats['attachment'] += len(objs)
@@ -0,0 +1,72 @@
+"""
+Contadores de posts publicados em Category e Tag.
+
+Em vez de somar +1/-1 (que erra com eventos repetidos ou fora de ordem),
+cada mudança recalcula o contador só das categorias/tags afetadas com um
+UPDATE ... = (SELECT COUNT(*) ...). Roda dentro da mesma transação do
+save, então o contador nunca é visto fora de sincronia com os posts.
+
+Antes de contar, as linhas dos contadores são travadas (SELECT ... FOR
+UPDATE, em ordem de pk). Sem isso, dois saves concorrentes contariam cada
+um sem ver o post do outro e o último UPDATE gravaria um total velho. Com
+a trava, quem chega depois espera o commit do primeiro e conta de novo já
+vendo os dois. O rebuild_counters continua sendo o reparo para contadores
+mexidos fora do ORM.
+"""
+from django.db import router, transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def published_category_count():
+    from blog.models import Post
+
+    return Coalesce(Subquery(
+        Post.objects.filter(category=OuterRef('pk'), is_published=True)
+        .order_by().values('category')
+        .annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def published_tag_count():
+    from blog.models import Post
+
+    return Coalesce(Subquery(
+        Post.tags.through.objects.filter(
+            tag=OuterRef('pk'), post__is_published=True
+        ).order_by().values('tag').annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+def recount(model, pks, count):
+    pks = {pk for pk in pks if pk is not None}
+    if not pks:
+        return
+
+    with transaction.atomic(using=router.db_for_write(model)):
+        locked = list(
+            model.objects.select_for_update().filter(pk__in=pks)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+        model.objects.filter(pk__in=locked).update(published_posts_count=count)
+
+
+def recount_categories(pks):
+    from blog.models import Category
+
+    recount(Category, pks, published_category_count())
+
+
+def recount_tags(pks):
+    from blog.models import Tag
+
+    recount(Tag, pks, published_tag_count())
+
+
+def rebuild_counters():
+    from blog.models import Category, Tag
+
+    return (
+        Category.objects.update(published_posts_count=published_category_count()),
+        Tag.objects.update(published_posts_count=published_tag_count()),
+    )
@@ -0,0 +1,93 @@
+"""
+Cache de fragmentos de template por versão do objeto.
+
+A chave de um fragmento é (build, nome, hash do template, pk, updated_at,
+fragment_version): editar o post muda o updated_at e, com ele, a chave; as
+versões antigas nunca mais são lidas e expiram sozinhas. O hash do template
+cobre edições no próprio arquivo; a versão do build (project/build.py)
+cobre o resto do deploy, como templatetags, includes e URLs de estáticos
+com hash.
+
+O que aparece no fragmento mas não é campo do post (nome das tags, da
+categoria e do autor, versões da capa) invalida via touch_posts(), que
+avança o fragment_version dos posts afetados. O updated_at continua sendo
+a última edição de verdade; o Last-Modified dessas páginas avança pela
+versão dos grupos purgados (blog/page_cache.py).
+"""
+from functools import lru_cache
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+from project.build import get_build_version
+
+FRAGMENT_KEY = 'blog:fragment:{build}:{name}:{source}:{pk}:{version}'
+
+
+def get_timeout():
+    return getattr(settings, 'BLOG_FRAGMENT_CACHE_TIMEOUT', 86400)
+
+
+@lru_cache(maxsize=None)
+def template_version(origin_name):
+    """Hash do arquivo do template (vazio para templates sem arquivo)."""
+    try:
+        with open(origin_name, 'rb') as source:
+            return md5(source.read()).hexdigest()[:12]
+    except OSError:
+        return ''
+
+
+def fragment_key(name, source, obj):
+    return FRAGMENT_KEY.format(
+        build=get_build_version(), name=name, source=source, pk=obj.pk,
+        version=(
+            f'{int(obj.updated_at.timestamp() * 1_000_000)}.{obj.fragment_version}'
+        ),
+    )
+
+
+def render_fragment(name, source, obj, render):
+    """Devolve o HTML do fragmento, chamando render() só num miss."""
+    timeout = get_timeout()
+    if timeout <= 0:
+        return render()
+
+    key = fragment_key(name, source, obj)
+    html = cache.get(key)
+    if html is None:
+        html = render()
+        cache.set(key, html, timeout)
+    return html
+
+
+def render_fragments(name, source, objs, render):
+    """
+    Versão em lote para listagens: um get_many para todos os objetos e um
+    set_many só com os que faltavam.
+    """
+    timeout = get_timeout()
+    if timeout <= 0:
+        return [render(obj) for obj in objs]
+
+    keys = [fragment_key(name, source, obj) for obj in objs]
+    cached = cache.get_many(keys)
+    missing = {}
+    fragments = []
+
+    for key, obj in zip(keys, objs):
+        html = cached.get(key)
+        if html is None:
+            html = missing[key] = render(obj)
+        fragments.append(html)
+
+    if missing:
+        cache.set_many(missing, timeout)
+    return fragments
+
+
+def touch_posts(queryset):
+    """Avança o fragment_version dos posts para trocar a chave dos fragmentos."""
+    return queryset.update(fragment_version=F('fragment_version') + 1)
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.assets import BLOG_STATIC, BUNDLES, build_bundle
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera os bundles de blog/assets.py. Rode antes do collectstatic '
+        '(e o vendor_assets antes deste).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--strict', action='store_true',
+            help='Falha se faltar algum arquivo em vez de pular o bundle',
+        )
+
+    def handle(self, *args, **options):
+        for name, sources in BUNDLES.items():
+            missing = [
+                source for source in sources
+                if not (BLOG_STATIC / source).exists()
+            ]
+            if missing:
+                message = (
+                    f'{name}: arquivos não encontrados (rode o vendor_assets): '
+                    + ', '.join(missing)
+                )
+                if options['strict']:
+                    raise CommandError(message)
+                self.stderr.write(message)
+                continue
+
+            target = build_bundle(name, sources)
+            self.stdout.write(
+                f'{name}: {len(sources)} arquivo(s), {target.stat().st_size} bytes'
+            )
@@ -0,0 +1,43 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from blog.content_io import (
+    CONTENT_FILE, dumps, export_media, export_records, record_media
+)
+from project.db_routers import use_primary
+
+
+class Command(BaseCommand):
+    help = 'Exporta tags, categorias, páginas, posts e anexos em NDJSON + mídia'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--no-media', action='store_true',
+            help='Não copia capas e anexos para o diretório',
+        )
+
+    def handle(self, *args, **options):
+        directory = Path(options['directory'])
+        directory.mkdir(parents=True, exist_ok=True)
+        content_path = directory / CONTENT_FILE
+        tmp_path = content_path.with_suffix('.part')
+        total = copied = 0
+
+        with use_primary(), open(tmp_path, 'w', encoding='utf-8') as output:
+            for record in export_records(options['batch_size']):
+                output.write(dumps(record) + '\n')
+                total += 1
+
+                media = record_media(record)
+                if media is None or options['no_media']:
+                    continue
+                try:
+                    copied += export_media(*media, directory)
+                except FileNotFoundError:
+                    self.stderr.write(f'Arquivo não encontrado: {media[1]}')
+
+        tmp_path.replace(content_path)
+        self.stdout.write(f'{total} registros e {copied} arquivos exportados')
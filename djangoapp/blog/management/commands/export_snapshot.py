@@ -0,0 +1,93 @@
+import multiprocessing
+import os
+import shutil
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+
+from blog.snapshot import (
+    all_groups, group_paths, is_enabled, render_path, snapshot_host
+)
+from project.db_backends.postgresql_pool.base import close_pools
+from project.db_routers import use_primary
+
+_worker = {}
+
+
+def init_worker(root):
+    _worker['client'] = Client(HTTP_HOST=snapshot_host())
+    _worker['root'] = root
+
+
+def render(item):
+    url, page = item
+    # Mesmo motivo do render_groups(): nada de HTML de réplica atrasada
+    with use_primary():
+        return render_path(url, page, _worker['client'], _worker['root'])
+
+
+class Command(BaseCommand):
+    help = (
+        'Renderiza todas as URLs públicas do blog (menos a busca) em '
+        'BLOG_SNAPSHOT_ROOT, em vários processos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count() or 1,
+        )
+        parser.add_argument(
+            '--output', help='Diretório de saída (padrão: BLOG_SNAPSHOT_ROOT)',
+        )
+
+    def handle(self, *args, **options):
+        if not is_enabled():
+            raise CommandError(
+                'O snapshot precisa de BLOG_PAGINATION_MODE=offset'
+            )
+
+        root = Path(options['output'] or settings.BLOG_SNAPSHOT_ROOT)
+        build_dir = root.with_name(root.name + '.build')
+        shutil.rmtree(build_dir, ignore_errors=True)
+
+        with use_primary():
+            items = [item for group in all_groups() for item in group_paths(group)]
+
+        # Tudo é gravado no build_dir, que só troca de lugar com o snapshot
+        # atual no fim: quem estiver servindo nunca vê um snapshot pela metade.
+        statuses = Counter()
+
+        if options['processes'] > 1:
+            # Conexões abertas (e as paradas no pool, com DB_POOL_ENABLED)
+            # não podem ser compartilhadas com os filhos
+            connections.close_all()
+            close_pools()
+            with multiprocessing.Pool(
+                options['processes'], initializer=init_worker,
+                initargs=(build_dir,),
+            ) as pool:
+                for url, page, status in pool.imap_unordered(
+                    render, items, chunksize=20
+                ):
+                    statuses[status] += 1
+                    if status.startswith('status'):
+                        self.stderr.write(f'{url} (página {page}): {status}')
+        else:
+            init_worker(build_dir)
+            for item in items:
+                statuses[render(item)[2]] += 1
+
+        build_dir.mkdir(parents=True, exist_ok=True)
+        old_dir = root.with_name(root.name + '.old')
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if root.exists():
+            root.rename(old_dir)
+        build_dir.rename(root)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+        summary = ', '.join(f'{total} {name}' for name, total in statuses.items())
+        self.stdout.write(f'{len(items)} URLs em {root}: {summary}')
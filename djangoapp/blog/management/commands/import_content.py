@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from blog.content_io import ContentImporter
+from project.db_routers import use_primary
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa um diretório gerado pelo export_content. Pode ser '
+        'interrompido e rodado de novo: continua do último lote gravado.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--skip-images', action='store_true',
+            help='Não enfileira o resize/versões das imagens importadas',
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Ignora o checkpoint e lê o arquivo desde o começo',
+        )
+
+    def handle(self, *args, **options):
+        importer = ContentImporter(
+            options['directory'],
+            batch_size=options['batch_size'],
+            images=not options['skip_images'],
+            log=self.stdout.write if options['verbosity'] > 1 else None,
+        )
+
+        # Quem checa se o slug já existe precisa ver o que acabou de gravar
+        with use_primary():
+            stats = importer.run(restart=options['restart'])
+
+        summary = ', '.join(f'{total} {name}' for name, total in sorted(stats.items()))
+        self.stdout.write(f'Importados: {summary or "nada novo"}')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Recalcula o número de posts publicados de categorias e tags'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            categories, tags = rebuild_counters()
+
+        self.stdout.write(f'{categories} categorias e {tags} tags recalculadas')
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.models import Page, Post
+from blog.search import build_search_vector, is_full_text_enabled
+
+
+class Command(BaseCommand):
+    help = 'Recalcula o search_vector de todos os posts e páginas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        for model in (Post, Page):
+            if not is_full_text_enabled(model):
+                raise CommandError('A busca full-text exige PostgreSQL')
+
+            vector = build_search_vector(*model.SEARCH_FIELDS)
+            pks = model.objects.order_by('pk').values_list('pk', flat=True)
+            last_pk = 0
+            total = 0
+
+            # Atualiza em lotes por faixa de pk para não travar a tabela toda
+            while True:
+                batch = list(pks.filter(pk__gt=last_pk)[:batch_size])
+                if not batch:
+                    break
+                total += model.objects.filter(
+                    pk__gte=batch[0], pk__lte=batch[-1]
+                ).update(search_vector=vector)
+                last_pk = batch[-1]
+
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: {total} atualizados'
+            )
@@ -0,0 +1,88 @@
+import multiprocessing
+import os
+from collections import Counter
+
+from functools import reduce
+from operator import or_
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Q
+
+from blog.models import Page, Post
+from blog.page_cache import purge_groups
+from blog.rendering import rerender
+from blog.snapshot import all_groups
+from project.db_backends.postgresql_pool.base import close_pools
+from project.db_routers import use_primary
+
+MODELS = {'post': Post, 'page': Page}
+
+
+def rerender_batch(item):
+    label, pks = item
+    with use_primary():
+        changed = rerender(MODELS[label].objects.filter(pk__in=pks))
+    return label, len(changed)
+
+
+def missing_html(model):
+    # Campo com conteúdo e HTML vazio: ainda não passou pelo renderer
+    # (posts de antes da migração 0008)
+    return reduce(or_, (
+        Q(**{f'{field}_html': ''}) & ~Q(**{field: ''})
+        for field in model.RENDERED_FIELDS
+    ))
+
+
+def batches(batch_size, missing=False):
+    with use_primary():
+        for label, model in MODELS.items():
+            queryset = model.objects.order_by('pk')
+            if missing:
+                queryset = queryset.filter(missing_html(model))
+            pks = list(queryset.values_list('pk', flat=True))
+            for start in range(0, len(pks), batch_size):
+                yield label, pks[start:start + batch_size]
+
+
+class Command(BaseCommand):
+    help = (
+        'Refaz o content_html/excerpt_html de todos os posts e páginas '
+        '(depois de mudar o blog/rendering.py), em vários processos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count() or 1,
+        )
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument(
+            '--missing', action='store_true',
+            help='Só os objetos que ainda não têm o HTML renderizado',
+        )
+
+    def handle(self, *args, **options):
+        items = list(batches(options['batch_size'], options['missing']))
+        changed = Counter()
+
+        if options['processes'] > 1 and len(items) > 1:
+            # Conexões abertas (e as guardadas no pool) não podem ser
+            # compartilhadas com os filhos
+            connections.close_all()
+            close_pools()
+            with multiprocessing.Pool(options['processes']) as pool:
+                for label, total in pool.imap_unordered(rerender_batch, items):
+                    changed[label] += total
+        else:
+            for item in items:
+                label, total = rerender_batch(item)
+                changed[label] += total
+
+        # Uma troca no pipeline costuma afetar o corpus inteiro
+        if sum(changed.values()):
+            purge_groups(all_groups())
+
+        self.stdout.write(
+            f"{changed['post']} posts e {changed['page']} páginas re-renderizados"
+        )
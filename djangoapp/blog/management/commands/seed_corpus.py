@@ -0,0 +1,213 @@
+"""
+Gera um corpus sintético para os benchmarks (benchmarks/bench_routes.py).
+
+    python manage.py seed_corpus --posts 100000 --tags 1000 --categories 200
+
+Tudo sai de um random.Random(--seed), então a mesma linha de comando gera
+o mesmo corpus em qualquer máquina. As imagens (capas e anexos) são JPEGs
+pequenos gerados com o Pillow, sem rede.
+"""
+import random
+from datetime import timedelta
+from io import BytesIO
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageDraw
+
+from blog.content_io import keep_timestamps
+from blog.counters import rebuild_counters
+from blog.models import Category, Page, Post, PostAttachment, Tag
+from blog.page_cache import purge_groups
+from blog.rendering import render_fields
+from blog.search import is_full_text_enabled
+from blog.snapshot import all_groups
+from project.db_routers import use_primary
+from utils.slugs import assign_slugs
+
+WORDS = (
+    'django python banco dados cache consulta índice template view modelo '
+    'servidor deploy docker postgres redis fila worker imagem busca página '
+    'categoria tag autor admin teste desempenho memória rede latência '
+    'requisição resposta sessão segurança formulário migração campo '
+    'paginação cursor réplica conexão pool estático arquivo upload'
+).split()
+LANGUAGES = 'python', 'javascript', 'css', 'html',
+SEED_MEDIA_DIR = 'seed'
+PUBLISHED_RATIO = 0.9
+MAX_TAGS_PER_POST = 5
+# Intervalo das datas de criação dos posts
+DATE_SPAN = timedelta(days=5 * 365)
+
+
+class Command(BaseCommand):
+    help = 'Gera posts, páginas, tags, categorias, autores e anexos sintéticos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--pages', type=int, default=10)
+        parser.add_argument('--tags', type=int, default=100)
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--authors', type=int, default=10)
+        parser.add_argument('--attachments', type=int, default=100)
+        parser.add_argument(
+            '--covers', type=int, default=20,
+            help='Imagens de capa diferentes (reaproveitadas entre os posts)',
+        )
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.verbosity = options['verbosity']
+        self.now = timezone.now()
+
+        with use_primary():
+            authors = self.create_authors(options['authors'])
+            categories = self.create_taxonomy(Category, options['categories'])
+            tags = self.create_taxonomy(Tag, options['tags'])
+            covers = self.create_images('covers', options['covers'], (900, 500))
+            attachments = self.create_attachments(options['attachments'])
+            self.create_pages(options['pages'])
+            self.create_posts(
+                options['posts'], authors, categories, tags,
+                covers, attachments,
+            )
+
+            with transaction.atomic():
+                rebuild_counters()
+            if is_full_text_enabled(Post):
+                call_command('rebuild_search_index', stdout=self.stdout)
+            purge_groups(all_groups())
+
+        self.stdout.write(
+            f"{options['posts']} posts, {options['pages']} páginas, "
+            f"{len(tags)} tags, {len(categories)} categorias, "
+            f"{len(authors)} autores e {len(attachments)} anexos"
+        )
+
+    def sentence(self, min_words, max_words):
+        words = self.random.choices(WORDS, k=self.random.randint(min_words, max_words))
+        return ' '.join(words).capitalize()
+
+    def random_date(self):
+        return self.now - DATE_SPAN * self.random.random()
+
+    def content(self, attachments):
+        parts = []
+        for _ in range(self.random.randint(3, 12)):
+            parts.append(f'<p>{self.sentence(20, 80)}.</p>')
+            roll = self.random.random()
+            if roll < 0.2:
+                language = self.random.choice(LANGUAGES)
+                parts.append(
+                    f'<pre data-language="{language}"><code>'
+                    f'{self.sentence(5, 15)}\n{self.sentence(5, 15)}</code></pre>'
+                )
+            elif roll < 0.3 and attachments:
+                url = default_storage.url(self.random.choice(attachments))
+                parts.append(f'<p><img src="{url}" alt="{self.sentence(2, 4)}"></p>')
+        return '\n'.join(parts)
+
+    def create_authors(self, total):
+        usernames = [f'seed-autor-{number}' for number in range(total)]
+        User.objects.bulk_create([
+            User(username=username, first_name='Autor', last_name=str(number))
+            for number, username in enumerate(usernames)
+        ], ignore_conflicts=True)
+        return list(
+            User.objects.filter(username__in=usernames).values_list('pk', flat=True)
+        )
+
+    def create_taxonomy(self, model, total):
+        objs = [
+            model(name=f'{self.random.choice(WORDS)} {number}'[:255])
+            for number in range(total)
+        ]
+        assign_slugs(model, objs, 'name')
+        model.objects.bulk_create(objs, batch_size=self.batch_size)
+        return [obj.pk for obj in objs]
+
+    def create_images(self, kind, total, size):
+        names = []
+        for number in range(total):
+            image = Image.new('RGB', size, tuple(self.random.choices(range(256), k=3)))
+            draw = ImageDraw.Draw(image)
+            for _ in range(8):
+                x, y = self.random.randrange(size[0]), self.random.randrange(size[1])
+                draw.rectangle(
+                    (x, y, x + size[0] // 4, y + size[1] // 4),
+                    fill=tuple(self.random.choices(range(256), k=3)),
+                )
+            content = BytesIO()
+            image.save(content, format='JPEG', quality=70)
+            names.append(default_storage.save(
+                f'{SEED_MEDIA_DIR}/{kind}/{kind}-{number}.jpg',
+                ContentFile(content.getvalue()),
+            ))
+        return names
+
+    def create_attachments(self, total):
+        names = self.create_images('attachments', total, (1200, 800))
+        with keep_timestamps(PostAttachment, 'uploaded'):
+            PostAttachment.objects.bulk_create([
+                PostAttachment(name=name, file=name, uploaded=self.random_date())
+                for name in names
+            ], batch_size=self.batch_size)
+        return names
+
+    def create_pages(self, total):
+        objs = [
+            Page(
+                title=self.sentence(2, 5)[:65], is_published=True,
+                content=self.content(()),
+            )
+            for _ in range(total)
+        ]
+        for obj in objs:
+            render_fields(obj)
+        assign_slugs(Page, objs, 'title')
+        Page.objects.bulk_create(objs, batch_size=self.batch_size)
+
+    def create_posts(self, total, authors, categories, tags, covers, attachments):
+        through = Post.tags.through
+
+        for start in range(0, total, self.batch_size):
+            objs = []
+            for number in range(start, min(start + self.batch_size, total)):
+                created_at = self.random_date()
+                author = self.random.choice(authors) if authors else None
+                objs.append(Post(
+                    title=f'{self.sentence(3, 7)[:55].strip()} {number}',
+                    excerpt=self.sentence(10, 20)[:150],
+                    is_published=self.random.random() < PUBLISHED_RATIO,
+                    content=self.content(attachments),
+                    cover=self.random.choice(covers) if covers else '',
+                    created_at=created_at,
+                    updated_at=created_at,
+                    created_by_id=author,
+                    updated_by_id=author,
+                    category_id=self.random.choice(categories) if categories else None,
+                ))
+                render_fields(objs[-1])
+
+            with transaction.atomic():
+                assign_slugs(Post, objs, 'title')
+                with keep_timestamps(Post, 'created_at', 'updated_at'):
+                    Post.objects.bulk_create(objs)
+                through.objects.bulk_create([
+                    through(post_id=obj.pk, tag_id=tag_pk)
+                    for obj in objs
+                    for tag_pk in self.random.sample(
+                        tags, min(len(tags), self.random.randint(0, MAX_TAGS_PER_POST))
+                    )
+                ])
+
+            if self.verbosity > 1:
+                self.stdout.write(f'{start + len(objs)}/{total} posts')
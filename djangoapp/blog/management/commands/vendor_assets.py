@@ -0,0 +1,80 @@
+from hashlib import sha256
+from urllib.request import urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.assets import (
+    BLOG_STATIC, CODEMIRROR_FILES, CODEMIRROR_SHA256, CODEMIRROR_URL,
+    CODEMIRROR_VERSION, VENDOR_DIR
+)
+
+
+def download(path):
+    url = CODEMIRROR_URL.format(version=CODEMIRROR_VERSION, path=path)
+    try:
+        with urlopen(url, timeout=30) as response:
+            return response.read()
+    except OSError as error:
+        raise CommandError(f'Falha ao baixar {url}: {error}')
+
+
+def verify(path, content):
+    expected = CODEMIRROR_SHA256.get(path)
+    if not expected:
+        raise CommandError(
+            f'{path} sem SHA-256 em CODEMIRROR_SHA256 (blog/assets.py); '
+            'gere com vendor_assets --print-hashes'
+        )
+
+    digest = sha256(content).hexdigest()
+    if digest != expected:
+        raise CommandError(
+            f'SHA-256 de {path} não confere: esperado {expected}, veio {digest}'
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Baixa o CodeMirror fixado em blog/assets.py para o static do blog, '
+        'conferindo o SHA-256 de cada arquivo'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Baixa de novo mesmo os arquivos que já existem',
+        )
+        parser.add_argument(
+            '--print-hashes', action='store_true',
+            help='Só baixa e mostra o CODEMIRROR_SHA256 da versão fixada',
+        )
+
+    def handle(self, *args, **options):
+        if options['print_hashes']:
+            self.stdout.write('CODEMIRROR_SHA256 = {')
+            for path in CODEMIRROR_FILES:
+                digest = sha256(download(path)).hexdigest()
+                self.stdout.write(f"    '{path}': '{digest}',")
+            self.stdout.write('}')
+            return
+
+        target_dir = BLOG_STATIC / VENDOR_DIR / 'codemirror'
+        downloaded = 0
+
+        for path in CODEMIRROR_FILES:
+            target = target_dir / path
+            if target.exists() and not options['force']:
+                # Arquivo de um download anterior também tem que bater
+                verify(path, target.read_bytes())
+                continue
+
+            content = download(path)
+            verify(path, content)
+
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(content)
+            downloaded += 1
+
+        self.stdout.write(
+            f'CodeMirror {CODEMIRROR_VERSION}: {downloaded} arquivo(s) baixado(s)'
+        )
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.30 on 2026-10-18 19:51
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+
+# Os índices GIN e o preenchimento inicial só fazem sentido no Postgres,
+# então ficam fora do Meta dos models e rodam condicionalmente aqui.
+SEARCH_TABLES = {
+    'blog_post': (('title', 'A'), ('excerpt', 'B'), ('content', 'C')),
+    'blog_page': (('title', 'A'), ('content', 'B')),
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    config = getattr(settings, 'BLOG_SEARCH_CONFIG', 'portuguese')
+
+    for table, fields in SEARCH_TABLES.items():
+        vector = ' || '.join(
+            f"setweight(to_tsvector(%s::regconfig, coalesce({field}, '')), '{weight}')"
+            for field, weight in fields
+        )
+        schema_editor.execute(
+            f'UPDATE {table} SET search_vector = {vector}',
+            [config] * len(fields),
+        )
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {table}_search_vector_gin '
+            f'ON {table} USING gin (search_vector)'
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for table in SEARCH_TABLES:
+        schema_editor.execute(
+            f'DROP INDEX IF EXISTS {table}_search_vector_gin'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_postattachment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='page',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
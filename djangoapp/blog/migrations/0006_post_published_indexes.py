@@ -0,0 +1,36 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_imagerendition'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-id'], name='blog_post_pub_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['category', '-id'], name='blog_post_pub_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['created_by', '-id'], name='blog_post_pub_author_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['updated_at'], name='blog_post_pub_updated_idx'),
+        ),
+        # A tabela do ManyToMany é criada pelo Django, então o índice da
+        # listagem por tag (tag_id, post_id DESC) vai em SQL.
+        migrations.RunSQL(
+            'CREATE INDEX blog_post_tags_tag_post_idx '
+            'ON blog_post_tags (tag_id, post_id DESC)',
+            'DROP INDEX blog_post_tags_tag_post_idx',
+        ),
+    ]
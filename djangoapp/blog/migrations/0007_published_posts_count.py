@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:07
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Category = apps.get_model('blog', 'Category')
+    Tag = apps.get_model('blog', 'Tag')
+    Post = apps.get_model('blog', 'Post')
+
+    Category.objects.update(published_posts_count=Coalesce(Subquery(
+        Post.objects.filter(category=OuterRef('pk'), is_published=True)
+        .order_by().values('category')
+        .annotate(total=Count('pk')).values('total')
+    ), 0))
+    Tag.objects.update(published_posts_count=Coalesce(Subquery(
+        Post.tags.through.objects.filter(
+            tag=OuterRef('pk'), post__is_published=True
+        ).order_by().values('tag').annotate(total=Count('pk')).values('total')
+    ), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_post_published_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='published_posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='published_posts_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:28
+
+from django.db import migrations, models
+
+
+# Os campos nascem vazios: renderizar aqui importaria o blog/rendering.py
+# de hoje (que muda com o tempo) e leria o corpus inteiro dentro da
+# migração. O manage.py rerender_content --missing, rodado pelo
+# commands.sh depois do migrate, preenche em lotes e em paralelo.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_published_posts_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='page',
+            name='content_html',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='content_html',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_html',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+    ]
@@ -0,0 +1,39 @@
+from django.db import migrations
+
+
+# O purge_pages_using (blog/renditions.py) procura os posts e páginas que
+# usam uma imagem com content LIKE '%<url>%'. Sem índice isso lê a tabela
+# inteira a cada imagem processada; o GIN de trigramas atende o LIKE com
+# curinga dos dois lados. Só existe no Postgres, como os índices da busca.
+CONTENT_TABLES = 'blog_post', 'blog_page',
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table in CONTENT_TABLES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {table}_content_trgm '
+            f'ON {table} USING gin (content gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for table in CONTENT_TABLES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {table}_content_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_rendered_html'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
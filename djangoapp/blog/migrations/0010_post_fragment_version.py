@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 21:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_content_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='fragment_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
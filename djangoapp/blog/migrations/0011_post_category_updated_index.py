@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 21:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_post_fragment_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['category', 'updated_at'], name='blog_post_pub_cat_updated_idx'),
+        ),
+    ]
@@ -1,9 +1,12 @@
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django_summernote.models import AbstractAttachment
-from utils.images import resize_image
-from utils.rands import slugify_new
+from utils.images import enqueue_resize_image
+from utils.slugs import save_with_slug
 from django.urls import reverse
+from blog.search import update_search_vector
+from blog.rendering import render_fields
 
 
 class PostAttachment(AbstractAttachment):
@@ -18,11 +21,35 @@ class PostAttachment(AbstractAttachment):
             favicon_changed = current_file_name != self.file.name
 
         if favicon_changed:
-            resize_image(self.file, 900)
+            enqueue_resize_image(self.file, 900, renditions=True)
 
         return super_save
 
 
+class ImageRendition(models.Model):
+    class Meta:
+        verbose_name = 'Image rendition'
+        verbose_name_plural = 'Image renditions'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('source_name', 'width', 'format'),
+                name='blog_imagerendition_unique_source_width_format',
+            ),
+        ]
+
+    source_name = models.CharField(max_length=255)
+    source_hash = models.CharField(max_length=64, db_index=True)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    format = models.CharField(max_length=10)
+    mime_type = models.CharField(max_length=30)
+    file = models.ImageField(upload_to='renditions/', max_length=255)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f'{self.source_name} {self.width}w {self.format}'
+
+
 class Tag(models.Model):
     class Meta:
         verbose_name = 'Tag'
@@ -33,11 +60,13 @@ class Tag(models.Model):
         unique=True, default=None,
         null=True, blank=True, max_length=255
     )
+    # Mantido por blog/counters.py, paginação e 404 leem daqui
+    published_posts_count = models.PositiveIntegerField(
+        default=0, editable=False
+    )
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify_new(self.name)
-        return super().save(*args, **kwargs)
+        return save_with_slug(self, self.name, super().save, *args, **kwargs)
     
     def __str__(self) -> str:
         return self.name
@@ -52,17 +81,23 @@ class Category(models.Model):
         unique=True, default=None,
         null=True, blank=True, max_length=255
     )
+    # Mantido por blog/counters.py, paginação e 404 leem daqui
+    published_posts_count = models.PositiveIntegerField(
+        default=0, editable=False
+    )
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify_new(self.name)
-        return super().save(*args, **kwargs)
+        return save_with_slug(self, self.name, super().save, *args, **kwargs)
     
     def __str__(self) -> str:
         return self.name
 
 
 class Page(models.Model):
+    SEARCH_FIELDS = ('title', 'A'), ('content', 'B'),
+    # Campos com versão *_html pronta para o template (blog/rendering.py)
+    RENDERED_FIELDS = 'content',
+
     title = models.CharField(max_length=65,)
     slug = models.SlugField(
         unique=True, default="",
@@ -73,6 +108,8 @@ class Page(models.Model):
         help_text= 'Esse campo precisará estar marcado para a pagina ser exibida publicamente'
         )
     content = models.TextField()
+    content_html = models.TextField(blank=True, default='', editable=False)
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
 
     def get_absolute_url(self):
         if not self.is_published:
@@ -80,39 +117,95 @@ class Page(models.Model):
         return reverse('blog:page', args=(self.slug,))
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify_new(self.title)
-        return super().save(*args, **kwargs)
+        render_fields(self)
+        super_save = save_with_slug(
+            self, self.title, super().save, *args, **kwargs
+        )
+        update_search_vector(self)
+        return super_save
 
     def __str__(self) -> str:
         return self.title
 
 
-class PostManager(models.Manager):
+class PostQuerySet(models.QuerySet):
+    # Campos usados por _post-card.html (get_absolute_url lê is_published)
+    # e pela chave do cache de fragmentos (updated_at, fragment_version)
+    CARD_FIELDS = (
+        'id', 'title', 'slug', 'excerpt', 'cover', 'is_published', 'updated_at',
+        'fragment_version',
+    )
+
+    def as_card(self):
+        return self.only(*self.CARD_FIELDS)
+
+    def as_detail(self):
+        # Sem prefetch das tags: o post.html só lê as tags quando o
+        # fragmento do corpo não está no cache (blog/fragments.py). O
+        # template mostra content_html; o content cru não sai do banco.
+        return self.select_related('category', 'created_by').defer(
+            'content', 'search_vector'
+        )
+
+
+class PostManager(models.Manager.from_queryset(PostQuerySet)):
     def get_published(self):
         return self.filter(is_published=True).order_by('-pk')
-            
+
 
 
 class Post(models.Model):
     class Meta:
         verbose_name = 'Post'
         verbose_name_plural = 'Posts'
+        # Índices parciais: toda leitura pública filtra is_published=True e
+        # ordena por -id, então só os publicados entram no índice.
+        indexes = [
+            models.Index(
+                fields=('-id',), name='blog_post_pub_id_idx',
+                condition=models.Q(is_published=True),
+            ),
+            models.Index(
+                fields=('category', '-id'), name='blog_post_pub_category_idx',
+                condition=models.Q(is_published=True),
+            ),
+            models.Index(
+                fields=('created_by', '-id'), name='blog_post_pub_author_idx',
+                condition=models.Q(is_published=True),
+            ),
+            # Max('updated_at') do Last-Modified
+            models.Index(
+                fields=('updated_at',), name='blog_post_pub_updated_idx',
+                condition=models.Q(is_published=True),
+            ),
+            # Last-Modified das listagens de categoria
+            models.Index(
+                fields=('category', 'updated_at'),
+                name='blog_post_pub_cat_updated_idx',
+                condition=models.Q(is_published=True),
+            ),
+        ]
 
     objects = PostManager()
 
+    SEARCH_FIELDS = ('title', 'A'), ('excerpt', 'B'), ('content', 'C'),
+    # Campos com versão *_html pronta para o template (blog/rendering.py)
+    RENDERED_FIELDS = 'content', 'excerpt',
+
     title = models.CharField(max_length=65,)
     slug = models.SlugField(
         unique=True, default="",
         null=False, blank=True, max_length=255
     )
     excerpt = models.CharField(max_length=150)
+    excerpt_html = models.TextField(blank=True, default='', editable=False)
 
     is_published = models.BooleanField(
         default=False,
         help_text= 'Esse campo precisará estar marcado para a post ser exibida publicamente'
         )
     content = models.TextField()
+    content_html = models.TextField(blank=True, default='', editable=False)
     cover = models.ImageField(upload_to='posts/%Y/%m/', blank=True, default='')
     cover_in_post_content = models.BooleanField(
         default=True,
@@ -130,25 +223,32 @@ class Post(models.Model):
         blank=True, null=True,
         related_name='post_updated_by'
     )
+    # Entra na chave do cache de fragmentos (blog/fragments.py) junto com o
+    # updated_at; avança quando muda algo que o post mostra mas não é campo
+    # dele (tags, categoria, autor, versões das imagens)
+    fragment_version = models.PositiveIntegerField(default=0, editable=False)
     category = models.ForeignKey(
         Category, on_delete=models.SET_NULL, null=True,
         blank=True, default=None
     )
     tags = models.ManyToManyField(Tag, blank=True, default='')
+    search_vector = SearchVectorField(null=True, blank=True, editable=False)
 
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify_new(self.title)
-
         current_favicon_name = str(self.cover.name)
-        super_save = super().save(*args, **kwargs)
+        render_fields(self)
+        super_save = save_with_slug(
+            self, self.title, super().save, *args, **kwargs
+        )
         favicon_changed = False
         if self.cover:
             favicon_changed = current_favicon_name != self.cover.name
 
         if favicon_changed:
-            resize_image(self.cover, 900)
+            enqueue_resize_image(self.cover, 900, renditions=True)
+
+        update_search_vector(self)
 
         return super_save
     
@@ -0,0 +1,292 @@
+import time
+from hashlib import md5
+from urllib.parse import urlencode
+from uuid import uuid4
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from project.build import get_build_stamp
+from project.db_routers import pin_primary
+from project.metrics import record_cache
+from site_setup.cache import get_version as get_site_setup_version
+
+GROUP_KEY = 'blog:page_cache:group:{group}'
+PAGE_KEY = 'blog:page_cache:page:{digest}'
+# Únicos parâmetros que mudam as páginas cacheadas; com qualquer outro
+# (?utm_source=...) a página é gerada sem passar pelo cache, senão cada
+# query string inventada viraria uma entrada nova
+CACHE_QUERY_PARAMS = frozenset({'page', 'after', 'before'})
+
+
+# Cada página cacheada pertence a um ou mais grupos ("index", "post:<slug>",
+# "tag:<slug>"...). A versão de cada grupo entra na chave da página, então
+# purgar um grupo é só trocar a versão dele: as chaves antigas deixam de ser
+# lidas e expiram sozinhas.
+#
+# A versão é "<uuid>:<timestamp da troca>", como a do site_setup e a do
+# build (project/build.py). O timestamp serve para:
+#   - o Last-Modified, que também avança com o que não muda updated_at
+#     (despublicar, apagar, tirar de uma tag, editar o menu, deploy);
+#   - ler do primário logo depois da troca: as réplicas podem não ter a
+#     edição ainda, e a página gerada nessa janela (DB_REPLICA_STICKY_SECONDS)
+#     ficaria cacheada, com ETag válido, sob a versão nova. Uma versão
+#     recriada (cache limpo ou evicção) conta como troca.
+
+def new_version():
+    return f'{uuid4().hex}:{time.time():.3f}'
+
+
+def changed_at(version):
+    _, separator, timestamp = version.rpartition(':')
+    try:
+        return float(timestamp) if separator else 0.0
+    except ValueError:
+        return 0.0
+
+
+def get_group_versions(groups):
+    keys = {GROUP_KEY.format(group=group): group for group in groups}
+    versions = cache.get_many(keys)
+
+    for key in keys.keys() - versions.keys():
+        version = new_version()
+        cache.add(key, version, None)
+        # Mesma ressalva do site_setup.cache.get_version
+        versions[key] = cache.get(key) or version
+
+    return [versions[key] for key in sorted(keys)]
+
+
+def get_page_versions(groups):
+    """Build, site_setup e grupos: tudo o que invalida a página."""
+    return [
+        get_build_stamp(), get_site_setup_version(), *get_group_versions(groups),
+    ]
+
+
+def recently_changed(versions):
+    window = getattr(settings, 'DB_REPLICA_STICKY_SECONDS', 10)
+    return any(
+        time.time() - changed_at(version) < window for version in versions
+    )
+
+
+def cache_path(request):
+    """
+    Path com os parâmetros de CACHE_QUERY_PARAMS em ordem fixa, ou None se
+    a query string tiver outros.
+    """
+    if not CACHE_QUERY_PARAMS.issuperset(request.GET):
+        return None
+    params = sorted((name, request.GET[name]) for name in request.GET)
+    return f'{request.path}?{urlencode(params)}' if params else request.path
+
+
+def page_digest(path, versions):
+    return md5('|'.join([path, *versions]).encode()).hexdigest()
+
+
+def purge_groups(groups):
+    groups = set(groups)
+    if not groups:
+        return
+
+    keys = [GROUP_KEY.format(group=group) for group in groups]
+
+    def bump_versions():
+        # O timestamp é o do commit, quando a edição começa a replicar
+        cache.set_many({key: new_version() for key in keys}, None)
+
+    transaction.on_commit(bump_versions)
+
+    if getattr(settings, 'BLOG_SNAPSHOT_ON_SAVE', False):
+        # O snapshot estático (blog/snapshot.py) regera as mesmas páginas.
+        # O job vai depois do on_commit acima, então já vê as versões novas.
+        from jobs.queue import enqueue
+        enqueue('render_snapshot', groups=sorted(groups))
+
+
+def post_groups(slug, category_slug, author_pk, tag_slugs):
+    groups = {'index', f'post:{slug}'}
+    if author_pk is not None:
+        groups.add(f'author:{author_pk}')
+    if category_slug:
+        groups.add(f'category:{category_slug}')
+    groups.update(f'tag:{tag_slug}' for tag_slug in tag_slugs)
+    return groups
+
+
+class PageLookup:
+    """O que o dispatch sabe da página antes de chamar a view."""
+
+    def __init__(self, versions, etag, key, cacheable, cached):
+        self.versions = versions
+        self.etag = etag
+        self.key = key
+        self.cacheable = cacheable
+        self.cached = cached
+        self.last_modified = cached[2] if cached is not None else None
+
+
+def combine_last_modified(versions, updated_at):
+    timestamps = [changed_at(version) for version in versions]
+    if updated_at is not None:
+        timestamps.append(updated_at.timestamp())
+
+    last_modified = max(timestamps, default=0)
+    return int(last_modified) if last_modified else None
+
+
+class PageCacheMixin:
+    """
+    Cache de página para anônimos e GET condicional para todos.
+
+    O ETag é o digest da chave (versões do build, do setup e dos grupos +
+    url), então sai sem tocar no banco. O Last-Modified é o maior entre o
+    updated_at dos objetos da página e os timestamps dessas versões: é
+    guardado junto da página cacheada e, fora do cache, custa um único
+    aggregate.
+
+    Serve views sync e async (blog/async_views.py): nas async o mesmo
+    caminho roda em adispatch, com o aggregate pelo ORM async.
+    """
+    page_cache = True
+    page_cache_timeout = None
+
+    def get_page_cache_groups(self):
+        return ()
+
+    def get_last_modified_queryset(self):
+        return None
+
+    def get_last_modified(self, versions=()):
+        queryset = self.get_last_modified_queryset()
+        updated_at = None
+        if queryset is not None:
+            updated_at = queryset.aggregate(last=Max('updated_at'))['last']
+        return combine_last_modified(versions, updated_at)
+
+    async def aget_last_modified(self, versions=()):
+        queryset = self.get_last_modified_queryset()
+        updated_at = None
+        if queryset is not None:
+            updated_at = (
+                await queryset.aaggregate(last=Max('updated_at'))
+            )['last']
+        return combine_last_modified(versions, updated_at)
+
+    def get_page_cache_timeout(self):
+        if self.page_cache_timeout is None:
+            return getattr(settings, 'BLOG_PAGE_CACHE_TIMEOUT', 600)
+        return self.page_cache_timeout
+
+    def is_page_cacheable(self, request):
+        return (
+            self.page_cache
+            and self.get_page_cache_timeout() > 0
+            and not request.user.is_authenticated
+        )
+
+    def set_validators(self, response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        # Força o navegador/proxy a revalidar, o que aqui custa um 304
+        patch_cache_control(response, no_cache=True)
+
+    def lookup_page(self, request):
+        versions = get_page_versions(self.get_page_cache_groups())
+        path = cache_path(request)
+        digest = page_digest(path or request.get_full_path(), versions)
+        key = PAGE_KEY.format(digest=digest)
+        cacheable = path is not None and self.is_page_cacheable(request)
+        cached = cache.get(key) if cacheable else None
+        if cacheable:
+            record_cache(cached is not None)
+
+        if cached is None and recently_changed(versions):
+            pin_primary()
+
+        return PageLookup(versions, f'"{digest}"', key, cacheable, cached)
+
+    def cached_response(self, request, page):
+        """O 304 ou a página do cache; None se a view tiver que rodar."""
+        not_modified = get_conditional_response(
+            request, etag=page.etag, last_modified=page.last_modified
+        )
+        if not_modified is not None:
+            self.set_validators(not_modified, page.etag, page.last_modified)
+            return not_modified
+
+        if page.cached is not None:
+            content, content_type, _ = page.cached
+            response = HttpResponse(content, content_type=content_type)
+            self.set_validators(response, page.etag, page.last_modified)
+            return response
+
+        return None
+
+    def store_page(self, response, page):
+        if response.status_code != 200 or response.streaming:
+            return response
+
+        self.set_validators(response, page.etag, page.last_modified)
+
+        if not page.cacheable or response.cookies:
+            return response
+
+        timeout = self.get_page_cache_timeout()
+
+        def store(response):
+            cache.set(
+                page.key,
+                (response.content, response['Content-Type'], page.last_modified),
+                timeout,
+            )
+
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.add_post_render_callback(store)
+        else:
+            store(response)
+
+        return response
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.view_is_async:
+            return self.adispatch(request, *args, **kwargs)
+
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+
+        page = self.lookup_page(request)
+        if page.cached is None:
+            page.last_modified = self.get_last_modified(page.versions)
+
+        response = self.cached_response(request, page)
+        if response is not None:
+            return response
+
+        return self.store_page(super().dispatch(request, *args, **kwargs), page)
+
+    async def adispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await super().dispatch(request, *args, **kwargs)
+
+        # Cache, sessão (request.user) e métricas são sync
+        page = await sync_to_async(self.lookup_page)(request)
+        if page.cached is None:
+            page.last_modified = await self.aget_last_modified(page.versions)
+
+        response = self.cached_response(request, page)
+        if response is not None:
+            return response
+
+        response = await super().dispatch(request, *args, **kwargs)
+        return self.store_page(response, page)
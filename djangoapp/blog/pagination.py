@@ -0,0 +1,266 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps(
+        values, separators=(',', ':'), cls=DjangoJSONEncoder
+    ).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, binascii.Error) as error:
+        raise InvalidCursor(token) from error
+
+    if not isinstance(values, list):
+        raise InvalidCursor(token)
+    return values
+
+
+class CursorPage:
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @cached_property
+    def next_cursor(self):
+        if not self._has_next:
+            return None
+        return encode_cursor(self.paginator.cursor_values(self.object_list[-1]))
+
+    @cached_property
+    def previous_cursor(self):
+        if not self._has_previous:
+            return None
+        return encode_cursor(self.paginator.cursor_values(self.object_list[0]))
+
+
+class CursorPaginator:
+    """
+    Paginação por keyset: em vez de OFFSET, cada página filtra a partir dos
+    valores de ordenação do último item visto, então qualquer página custa
+    a mesma leitura de índice. A ordenação vem do próprio queryset e precisa
+    terminar em um campo único (normalmente o pk).
+    """
+
+    def __init__(self, queryset, per_page, max_count=1000):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.max_count = max_count
+        self.ordering = tuple(queryset.query.order_by) or ('-pk',)
+
+    def cursor_values(self, obj):
+        return [getattr(obj, field.lstrip('-')) for field in self.ordering]
+
+    def clean_cursor_values(self, values, token):
+        """
+        Converte os valores do cursor (JSON vindo da URL) para o tipo de
+        cada campo da ordenação; qualquer coisa fora do tipo é cursor
+        inválido (404), nunca erro do banco.
+        """
+        if len(values) != len(self.ordering):
+            raise InvalidCursor(token)
+
+        cleaned = []
+        for field, value in zip(self.ordering, values):
+            model_field = self.ordering_field(field.lstrip('-'), token)
+            if value is None or isinstance(value, (list, dict)):
+                raise InvalidCursor(token)
+            try:
+                cleaned.append(model_field.to_python(value))
+            except (TypeError, ValueError, ValidationError) as error:
+                raise InvalidCursor(token) from error
+        return cleaned
+
+    def ordering_field(self, name, token):
+        # A ordenação pode ser por uma anotação (o rank da busca)
+        annotation = self.queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+
+        opts = self.queryset.model._meta
+        if name == 'pk':
+            return opts.pk
+        try:
+            return opts.get_field(name)
+        except FieldDoesNotExist as error:
+            raise InvalidCursor(token) from error
+
+    def _keyset_filter(self, values, reverse):
+        query = Q()
+        equals = {}
+
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            lookup = 'lt' if descending else 'gt'
+            query |= Q(**equals, **{f'{name}__{lookup}': value})
+            equals[name] = value
+
+        return query
+
+    def _page_queryset(self, after, before):
+        queryset = self.queryset
+        token = before or after
+        reverse = before is not None
+
+        if token:
+            values = self.clean_cursor_values(decode_cursor(token), token)
+            queryset = queryset.filter(self._keyset_filter(values, reverse))
+
+        if reverse:
+            queryset = queryset.reverse()
+
+        return queryset[:self.per_page + 1], token, reverse
+
+    def _build_page(self, object_list, token, reverse):
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+
+        if reverse:
+            object_list.reverse()
+            return CursorPage(object_list, self, True, has_more)
+
+        return CursorPage(object_list, self, has_more, token is not None)
+
+    def page(self, after=None, before=None):
+        queryset, token, reverse = self._page_queryset(after, before)
+        return self._build_page(list(queryset), token, reverse)
+
+    async def apage(self, after=None, before=None):
+        queryset, token, reverse = self._page_queryset(after, before)
+        object_list = [obj async for obj in queryset]
+        return self._build_page(object_list, token, reverse)
+
+    def _count_queryset(self):
+        # Contagem limitada: o banco para de contar em max_count + 1 linhas
+        return self.queryset.order_by()[:self.max_count + 1]
+
+    @cached_property
+    def count(self):
+        return self._count_queryset().count()
+
+    async def acount(self):
+        if 'count' not in self.__dict__:
+            self.count = await self._count_queryset().acount()
+        return self.count
+
+    @property
+    def count_is_bounded(self):
+        return self.count > self.max_count
+
+
+class CursorPaginationMixin:
+    pagination_template = 'blog/partials/_pagination-cursor.html'
+    # None segue settings.BLOG_PAGINATION_MODE; True/False força o modo
+    cursor_pagination = None
+
+    def uses_cursor_pagination(self):
+        if self.cursor_pagination is None:
+            return getattr(settings, 'BLOG_PAGINATION_MODE', 'offset') == 'cursor'
+        return self.cursor_pagination
+
+    def get_cursors(self):
+        return {
+            'after': self.request.GET.get('after') or None,
+            'before': self.request.GET.get('before') or None,
+        }
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.uses_cursor_pagination():
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = CursorPaginator(queryset, page_size)
+
+        try:
+            page = paginator.page(**self.get_cursors())
+        except InvalidCursor:
+            raise Http404('Cursor inválido')
+
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        if self.uses_cursor_pagination():
+            context['pagination_template'] = self.pagination_template
+        return context
+
+
+class KnownCountPaginator(Paginator):
+    """
+    Paginator que recebe o total pronto (de um contador) em vez do COUNT.
+    Com count=None faz o COUNT normal.
+    """
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.known_count = count
+
+    @cached_property
+    def count(self):
+        if self.known_count is None:
+            return super().count
+        return self.known_count
+
+
+class KnownCountMixin:
+    """
+    Para listagens cujo total já está guardado numa linha (ex.: o contador
+    da categoria): a paginação e o 404 de listagem vazia usam esse número
+    em vez de COUNT e exists(). Sem contador (None, o padrão) a view se
+    comporta como uma ListView comum.
+    """
+
+    def get_known_count(self):
+        return None
+
+    def get_paginator(self, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True, **kwargs):
+        return KnownCountPaginator(
+            queryset, per_page, self.get_known_count(), orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page, **kwargs
+        )
+
+    def get_allow_empty(self):
+        allow_empty = super().get_allow_empty()
+        known_count = self.get_known_count()
+        if allow_empty or known_count is None:
+            return allow_empty
+        if not known_count:
+            raise Http404
+        return True
+
@@ -0,0 +1,293 @@
+"""
+HTML dos posts e páginas processado uma vez, no save().
+
+O Summernote grava HTML do editor em content (e o resumo em excerpt). O
+save() passa esse HTML por render_content()/render_excerpt() e guarda o
+resultado em content_html/excerpt_html, que é o que os templates mostram:
+
+    1. sanitiza com o bleach (tags, atributos, protocolos e CSS permitidos);
+    2. <img> ganha loading="lazy" e, se for um arquivo do MEDIA_ROOT com
+       versões geradas (blog/renditions.py), srcset e <picture> com AVIF/WebP;
+    3. <a target="_blank"> ganha rel="noopener noreferrer" (também no resumo);
+    4. <pre> ganha data-language com o modo do CodeMirror carregado pelo
+       post.html (blog/assets.py), vindo da classe language-* ou adivinhado
+       pelo próprio código.
+
+Quando o pipeline muda, manage.py rerender_content refaz o corpus todo.
+"""
+import re
+import threading
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import unquote
+
+import bleach
+from bleach.css_sanitizer import CSSSanitizer
+from django.conf import settings
+from django.db.models import F
+
+from blog.renditions import SOURCE_TYPES, build_srcset, get_renditions
+
+ALLOWED_TAGS = frozenset({
+    'a', 'abbr', 'b', 'blockquote', 'br', 'caption', 'code', 'col',
+    'colgroup', 'div', 'em', 'figcaption', 'figure', 'font', 'h1', 'h2',
+    'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'img', 'li', 'ol', 'p', 'pre', 's',
+    'small', 'span', 'strike', 'strong', 'sub', 'sup', 'table', 'tbody',
+    'td', 'tfoot', 'th', 'thead', 'tr', 'u', 'ul',
+})
+EXCERPT_TAGS = frozenset({
+    'a', 'b', 'br', 'code', 'em', 'i', 's', 'span', 'strong', 'u',
+})
+ALLOWED_ATTRIBUTES = {
+    '*': ['class', 'style', 'title'],
+    'a': ['href', 'target', 'rel'],
+    'img': ['src', 'alt', 'width', 'height'],
+    'font': ['color'],
+    'pre': ['data-language'],
+    'td': ['colspan', 'rowspan'],
+    'th': ['colspan', 'rowspan'],
+}
+ALLOWED_PROTOCOLS = frozenset({'http', 'https', 'mailto'})
+# Propriedades que a barra do Summernote (cor, alinhamento, tabela e
+# tamanho de imagem) escreve no atributo style
+ALLOWED_CSS_PROPERTIES = frozenset({
+    'background-color', 'border', 'border-collapse', 'color', 'float',
+    'font-size', 'font-style', 'font-weight', 'height', 'line-height',
+    'margin', 'margin-left', 'margin-right', 'padding', 'text-align',
+    'text-decoration', 'vertical-align', 'width',
+})
+
+CONTENT_IMAGE_SIZES = '(max-width: 900px) 100vw, 900px'
+
+# Modos do CodeMirror que o bundle code.js carrega
+CODE_LANGUAGES = frozenset({'css', 'htmlmixed', 'javascript', 'python', 'xml'})
+LANGUAGE_ALIASES = {
+    'html': 'htmlmixed', 'js': 'javascript', 'py': 'python',
+    'python3': 'python', 'json': 'javascript',
+}
+# (modo, padrão) na ordem em que são testados quando o <pre> não diz nada
+LANGUAGE_HINTS = (
+    ('htmlmixed', re.compile(r'^\s*<(!doctype|[a-z][\w-]*)[\s>/]', re.I)),
+    ('python', re.compile(
+        r'^[ \t]*(def |class \w+.*:|import |from \S+ import |@\w+|elif |print\()',
+        re.M,
+    )),
+    ('javascript', re.compile(
+        r'\b(function\s*\w*\(|const |let |var |=>|console\.|document\.)'
+    )),
+    ('css', re.compile(r'^[.#@\w][\w\-:,.#>* \t\[\]="]*\{\s*[\w-]+[ \t]*:', re.M)),
+)
+
+# O bleach remove a tag mas deixa o texto; código de <script>/<style>
+# coladas no editor não deve virar parágrafo
+EMBEDDED_CODE = re.compile(r'<(script|style)\b[^>]*>.*?</\1\s*>', re.I | re.S)
+
+# Cleaner não é thread-safe; cada thread do gunicorn usa os seus
+_local = threading.local()
+
+
+def get_cleaner(tags):
+    cleaners = getattr(_local, 'cleaners', None)
+    if cleaners is None:
+        cleaners = _local.cleaners = {}
+
+    if tags not in cleaners:
+        cleaners[tags] = bleach.Cleaner(
+            tags=tags,
+            attributes=ALLOWED_ATTRIBUTES,
+            protocols=ALLOWED_PROTOCOLS,
+            css_sanitizer=CSSSanitizer(allowed_css_properties=ALLOWED_CSS_PROPERTIES),
+            strip=True,
+            strip_comments=True,
+        )
+    return cleaners[tags]
+
+
+def sanitize(html, tags=ALLOWED_TAGS):
+    return get_cleaner(tags).clean(EMBEDDED_CODE.sub('', html or ''))
+
+
+def guess_language(attrs, code_attrs, text):
+    declared = attrs.get('data-language')
+    classes = f"{attrs.get('class', '')} {code_attrs.get('class', '')}".split()
+    for name in classes:
+        if name.startswith(('language-', 'lang-')):
+            declared = declared or name.split('-', 1)[1]
+
+    if declared:
+        declared = LANGUAGE_ALIASES.get(declared.lower(), declared.lower())
+        return declared if declared in CODE_LANGUAGES else None
+
+    for language, pattern in LANGUAGE_HINTS:
+        if pattern.search(text):
+            return language
+    return None
+
+
+def media_name(src):
+    media_url = settings.MEDIA_URL
+    if not src or not src.startswith(media_url):
+        return None
+    return unquote(src[len(media_url):].split('?', 1)[0])
+
+
+def format_tag(tag, attrs, self_closing=False):
+    parts = [tag] + [
+        name if value is None else f'{name}="{escape(value, quote=True)}"'
+        for name, value in attrs.items()
+    ]
+    return f"<{' '.join(parts)}{' /' if self_closing else ''}>"
+
+
+class ContentRewriter(HTMLParser):
+    """
+    Reescreve HTML já sanitizado (bem formado) token a token. O conteúdo
+    de cada <pre> fica num buffer até o </pre> para que a linguagem seja
+    decidida olhando o código inteiro.
+    """
+
+    def __init__(self, renditions):
+        super().__init__(convert_charrefs=True)
+        self.renditions = renditions
+        self.output = []
+        self.pre = None  # (attrs do <pre>, attrs do <code>, partes, texto)
+
+    def emit(self, html):
+        if self.pre is not None:
+            self.pre[2].append(html)
+        else:
+            self.output.append(html)
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+
+        if tag == 'pre' and self.pre is None:
+            self.pre = (attrs, {}, [], [])
+            return
+
+        if tag == 'code' and self.pre is not None and not self.pre[2]:
+            self.pre[1].update(attrs)
+
+        if tag == 'img':
+            self.emit(self.image(attrs))
+            return
+
+        if tag == 'a' and attrs.get('target') == '_blank':
+            attrs['rel'] = 'noopener noreferrer'
+
+        self.emit(format_tag(tag, attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag == 'pre' and self.pre is not None:
+            attrs, code_attrs, parts, text = self.pre
+            self.pre = None
+            language = guess_language(attrs, code_attrs, ''.join(text))
+            if language:
+                attrs['data-language'] = language
+            else:
+                attrs.pop('data-language', None)
+            self.emit(format_tag('pre', attrs) + ''.join(parts) + '</pre>')
+            return
+
+        if tag in ('img', 'br', 'hr', 'col'):
+            return
+        self.emit(f'</{tag}>')
+
+    def handle_data(self, data):
+        if self.pre is not None:
+            self.pre[3].append(data)
+        self.emit(escape(data, quote=False))
+
+    def image(self, attrs):
+        attrs.setdefault('loading', 'lazy')
+        attrs.setdefault('decoding', 'async')
+
+        name = media_name(attrs.get('src'))
+        renditions = self.renditions(name) if name else {}
+        fallback = renditions.get('image/jpeg')
+        if fallback:
+            attrs['srcset'] = build_srcset(fallback)
+            attrs['sizes'] = CONTENT_IMAGE_SIZES
+
+        img = format_tag('img', attrs)
+        sources = ''.join(
+            format_tag('source', {
+                'type': mime_type,
+                'srcset': build_srcset(renditions[mime_type]),
+                'sizes': CONTENT_IMAGE_SIZES,
+            })
+            for mime_type in SOURCE_TYPES if mime_type in renditions
+        )
+        return f'<picture>{sources}{img}</picture>' if sources else img
+
+    def close(self):
+        super().close()
+        if self.pre is not None:
+            self.handle_endtag('pre')
+        return ''.join(self.output)
+
+
+def rewrite(html, tags, renditions):
+    rewriter = ContentRewriter(renditions)
+    rewriter.feed(sanitize(html, tags))
+    return rewriter.close()
+
+
+def render_content(html, renditions=get_renditions):
+    return rewrite(html, ALLOWED_TAGS, renditions)
+
+
+def render_excerpt(html, renditions=get_renditions):
+    # Só sobra texto e links, mas o <a target="_blank"> também leva o rel
+    return rewrite(html, EXCERPT_TAGS, renditions)
+
+
+RENDERERS = {
+    'content': render_content,
+    'excerpt': render_excerpt,
+}
+
+
+def render_fields(instance, renditions=get_renditions):
+    """
+    Preenche os campos *_html de model.RENDERED_FIELDS. Devolve os nomes
+    dos campos que mudaram.
+    """
+    changed = []
+    for field in type(instance).RENDERED_FIELDS:
+        html = RENDERERS[field](getattr(instance, field), renditions)
+        if getattr(instance, f'{field}_html') != html:
+            setattr(instance, f'{field}_html', html)
+            changed.append(f'{field}_html')
+    return changed
+
+
+def rerender(queryset, renditions=get_renditions):
+    """
+    Refaz o HTML dos objetos do queryset e grava só os que mudaram (num
+    UPDATE em lote, sem passar pelo save()). Devolve os objetos alterados.
+    """
+    model = queryset.model
+    fields = model.RENDERED_FIELDS
+    html_fields = [f'{field}_html' for field in fields]
+    # Troca a chave dos fragmentos (blog/fragments.py) sem mexer no
+    # updated_at, que é a última edição de verdade. Uma mudança no
+    # pipeline já troca a chave pela versão do build.
+    touch = 'fragment_version' in {field.name for field in model._meta.fields}
+
+    changed = []
+    for obj in queryset.only('pk', *fields, *html_fields):
+        if render_fields(obj, renditions):
+            changed.append(obj)
+
+    if changed:
+        update_fields = html_fields
+        if touch:
+            for obj in changed:
+                obj.fragment_version = F('fragment_version') + 1
+            update_fields = html_fields + ['fragment_version']
+        model.objects.bulk_update(changed, update_fields, batch_size=500)
+    return changed
@@ -0,0 +1,162 @@
+from hashlib import md5, sha256
+from io import BytesIO
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, features
+
+from jobs.registry import register
+
+try:
+    # AVIF só existe no Pillow com o plugin instalado (pillow-avif-plugin)
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+RENDITION_WIDTHS = 320, 640, 900
+# Ordem importa: o navegador usa o primeiro <source> que suportar
+SOURCE_TYPES = 'image/avif', 'image/webp',
+RENDITIONS_KEY = 'blog:renditions:{digest}'
+EMPTY_TIMEOUT = 300
+
+# (formato do Pillow, extensão, mime type, opções de save)
+FORMATS = (
+    ('AVIF', 'avif', 'image/avif', {'quality': 50}),
+    ('WEBP', 'webp', 'image/webp', {'quality': 70, 'method': 6}),
+    ('JPEG', 'jpg', 'image/jpeg', {'quality': 70, 'optimize': True, 'progressive': True}),
+)
+
+
+def available_formats():
+    Image.init()
+    return [
+        fmt for fmt in FORMATS
+        if fmt[0] in Image.SAVE and (fmt[0] != 'WEBP' or features.check('webp'))
+    ]
+
+
+def renditions_key(name):
+    return RENDITIONS_KEY.format(digest=md5(name.encode()).hexdigest())
+
+
+def file_hash(name):
+    digest = sha256()
+    with default_storage.open(name, 'rb') as source:
+        for chunk in iter(lambda: source.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@register('generate_renditions')
+def generate_renditions(name):
+    from blog.models import ImageRendition
+
+    # Os arquivos ficam num caminho derivado do hash do conteúdo, então a
+    # mesma imagem enviada duas vezes reaproveita as versões já geradas.
+    source_hash = file_hash(name)
+
+    # O original pode ser a foto inteira da câmera: o draft() decodifica
+    # JPEG já reduzido até perto da maior largura, e a orientação EXIF é
+    # aplicada aqui porque o arquivo ainda não passou pelo resize.
+    largest = RENDITION_WIDTHS[-1]
+    with default_storage.open(name, 'rb') as source:
+        image = Image.open(source)
+        image.draft(image.mode, (largest, largest))
+        image = ImageOps.exif_transpose(image)
+
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+    widths = sorted({min(width, image.width) for width in RENDITION_WIDTHS})
+
+    for width in widths:
+        height = round(width * image.height / image.width)
+        resized = None
+
+        for pillow_format, extension, mime_type, options in available_formats():
+            file_name = (
+                f'renditions/{source_hash[:2]}/{source_hash}/{width}.{extension}'
+            )
+
+            if not default_storage.exists(file_name):
+                if resized is None:
+                    resized = image if width == image.width else image.resize(
+                        (width, height), Image.LANCZOS
+                    )
+                output = resized
+                if pillow_format == 'JPEG' and output.mode != 'RGB':
+                    output = output.convert('RGB')
+
+                buffer = BytesIO()
+                output.save(buffer, pillow_format, **options)
+                file_name = default_storage.save(
+                    file_name, ContentFile(buffer.getvalue())
+                )
+
+            ImageRendition.objects.update_or_create(
+                source_name=name, width=width, format=extension,
+                defaults={
+                    'source_hash': source_hash, 'height': height,
+                    'mime_type': mime_type, 'file': file_name,
+                },
+            )
+
+    cache.delete(renditions_key(name))
+    purge_pages_using(name)
+
+
+def purge_pages_using(name):
+    from blog.fragments import touch_posts
+    from blog.models import Page, Post
+    from blog.page_cache import purge_groups
+    from blog.rendering import rerender
+    from blog.signals import current_post_groups
+
+    # O <picture> da capa fica nos fragmentos do card e do post
+    touch_posts(Post.objects.filter(cover=name))
+    pks = set(Post.objects.filter(cover=name).values_list('pk', flat=True))
+
+    # Imagens no corpo: o srcset fica gravado no content_html. No Postgres
+    # o LIKE usa o índice de trigramas da migração 0009.
+    url = default_storage.url(name)
+    pks.update(
+        post.pk for post in rerender(Post.objects.filter(content__contains=url))
+    )
+    pages = rerender(Page.objects.filter(content__contains=url))
+
+    groups = {
+        f'page:{slug}' for slug in Page.objects.filter(
+            pk__in=[page.pk for page in pages]
+        ).values_list('slug', flat=True)
+    }
+    for pk in pks:
+        groups |= current_post_groups(pk)
+    purge_groups(groups)
+
+
+def build_srcset(candidates):
+    return ', '.join(f'{url} {width}w' for url, width in candidates)
+
+
+def get_renditions(name):
+    """
+    Retorna {mime_type: [(url, largura), ...]} das versões de uma imagem.
+    Fica no cache para que a listagem não faça uma query por card.
+    """
+    from blog.models import ImageRendition
+
+    key = renditions_key(name)
+    renditions = cache.get(key)
+
+    if renditions is None:
+        renditions = {}
+        for rendition in ImageRendition.objects.filter(
+            source_name=name
+        ).order_by('width'):
+            renditions.setdefault(rendition.mime_type, []).append(
+                (rendition.file.url, rendition.width)
+            )
+        cache.set(key, renditions, None if renditions else EMPTY_TIMEOUT)
+
+    return renditions
@@ -0,0 +1,63 @@
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connections, router
+from django.db.models import F, IntegerField, Q
+from django.db.models.functions import Cast
+
+
+RANK_SCALE = 1_000_000
+
+
+def search_config():
+    return getattr(settings, 'BLOG_SEARCH_CONFIG', 'portuguese')
+
+
+def is_full_text_enabled(model, using=None):
+    # O vetor de busca só existe de verdade no Postgres. Em outros bancos
+    # (sqlite nos testes, por exemplo) caímos no icontains antigo.
+    using = using or router.db_for_read(model)
+    return connections[using].vendor == 'postgresql'
+
+
+def build_search_vector(*weighted_fields):
+    config = search_config()
+    vector = None
+    for field_name, weight in weighted_fields:
+        part = SearchVector(field_name, weight=weight, config=config)
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def update_search_vector(instance):
+    model = type(instance)
+    using = router.db_for_write(model, instance=instance)
+
+    if not is_full_text_enabled(model, using):
+        return
+
+    model._default_manager.using(using).filter(pk=instance.pk).update(
+        search_vector=build_search_vector(*model.SEARCH_FIELDS)
+    )
+
+
+def search_queryset(queryset, term):
+    model = queryset.model
+
+    if not is_full_text_enabled(model, queryset.db):
+        return queryset.filter(reduce(or_, (
+            Q(**{f'{field_name}__icontains': term})
+            for field_name, _ in model.SEARCH_FIELDS
+        )))
+
+    # O rank vira inteiro para que a paginação por keyset compare valores
+    # exatos; um float real do Postgres não sobrevive ida e volta no cursor.
+    query = SearchQuery(term, config=search_config(), search_type='websearch')
+    return queryset.filter(search_vector=query).annotate(
+        rank=Cast(
+            SearchRank(F('search_vector'), query) * RANK_SCALE,
+            output_field=IntegerField(),
+        )
+    ).order_by('-rank', '-pk')
@@ -0,0 +1,259 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from blog.counters import recount_categories, recount_tags
+from blog.fragments import touch_posts
+from blog.models import Category, Page, Post, Tag
+from blog.page_cache import post_groups, purge_groups
+from jobs.queue import enqueue
+from site_setup.models import MenuLink, SiteSetup
+
+
+def current_post_groups(pk):
+    post = Post.objects.filter(pk=pk).values(
+        'slug', 'category__slug', 'created_by_id'
+    ).first()
+
+    if post is None:
+        return set()
+
+    tag_slugs = Tag.objects.filter(post__pk=pk).values_list('slug', flat=True)
+    return post_groups(
+        post['slug'], post['category__slug'], post['created_by_id'], tag_slugs
+    )
+
+
+@receiver(pre_save, sender=Post)
+def post_pre_save(sender, instance, raw=False, **kwargs):
+    # Guarda os grupos do estado antigo: se o slug, a categoria ou o autor
+    # mudarem, as listagens antigas também precisam ser purgadas.
+    instance._page_cache_groups = (
+        current_post_groups(instance.pk) if instance.pk and not raw else set()
+    )
+
+
+@receiver(post_save, sender=Post)
+def post_post_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old_groups = getattr(instance, '_page_cache_groups', set())
+    purge_groups(old_groups | current_post_groups(instance.pk))
+
+
+@receiver(pre_delete, sender=Post)
+def post_pre_delete(sender, instance, **kwargs):
+    purge_groups(current_post_groups(instance.pk))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def post_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('pre_clear', 'post_add', 'post_remove'):
+        return
+
+    if reverse:
+        # tag.post_set.add(...): instance é a Tag e pk_set são posts
+        post_pks = pk_set if pk_set is not None else Post.objects.filter(
+            tags=instance
+        ).values_list('pk', flat=True)
+    else:
+        post_pks = [instance.pk]
+
+    groups = set()
+    for post_pk in post_pks:
+        groups |= current_post_groups(post_pk)
+
+    if not reverse and pk_set:
+        tag_slugs = Tag.objects.filter(pk__in=pk_set).values_list('slug', flat=True)
+        groups.update(f'tag:{slug}' for slug in tag_slugs)
+
+    purge_groups(groups)
+
+
+def taxonomy_groups(instance, prefix, posts):
+    groups = {f'{prefix}:{instance.slug}'}
+    old_slug = getattr(instance, '_page_cache_old_slug', None)
+    if old_slug:
+        groups.add(f'{prefix}:{old_slug}')
+    groups.update(
+        f'post:{slug}' for slug in posts.values_list('slug', flat=True)
+    )
+    return groups
+
+
+@receiver(pre_save, sender=Category)
+@receiver(pre_save, sender=Tag)
+def taxonomy_pre_save(sender, instance, raw=False, **kwargs):
+    if instance.pk and not raw:
+        instance._page_cache_old_slug = sender.objects.filter(
+            pk=instance.pk
+        ).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def category_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        purge_groups(taxonomy_groups(
+            instance, 'category', Post.objects.filter(category=instance)
+        ))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def tag_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        purge_groups(taxonomy_groups(
+            instance, 'tag', Post.objects.filter(tags=instance)
+        ))
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, raw=False, update_fields=None, **kwargs):
+    # O nome do autor aparece no título da listagem e no detalhe dos posts.
+    # O login só grava last_login, que não aparece em página nenhuma.
+    if not raw and update_fields != frozenset({'last_login'}):
+        posts = Post.objects.filter(created_by=instance)
+        groups = {f'author:{instance.pk}'}
+        groups.update(
+            f'post:{slug}' for slug in posts.values_list('slug', flat=True)
+        )
+        purge_groups(groups)
+
+
+@receiver(pre_save, sender=Page)
+def page_pre_save(sender, instance, raw=False, **kwargs):
+    if instance.pk and not raw:
+        instance._page_cache_old_slug = Page.objects.filter(
+            pk=instance.pk
+        ).values_list('slug', flat=True).first()
+
+
+@receiver(post_save, sender=Page)
+@receiver(post_delete, sender=Page)
+def page_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    groups = {f'page:{instance.slug}'}
+    old_slug = getattr(instance, '_page_cache_old_slug', None)
+    if old_slug:
+        groups.add(f'page:{old_slug}')
+    purge_groups(groups)
+
+
+@receiver(post_save, sender=SiteSetup)
+@receiver(post_delete, sender=SiteSetup)
+@receiver(post_save, sender=MenuLink)
+@receiver(post_delete, sender=MenuLink)
+def snapshot_site_setup_changed(sender, raw=False, **kwargs):
+    # Título, menu e rodapé aparecem em todas as páginas do snapshot
+    if not raw and getattr(settings, 'BLOG_SNAPSHOT_ON_SAVE', False):
+        enqueue('render_snapshot', groups=None)
+
+
+# Contadores de posts publicados (blog/counters.py)
+
+def post_tag_pks(pk):
+    return set(Post.tags.through.objects.filter(
+        post_id=pk
+    ).values_list('tag_id', flat=True))
+
+
+@receiver(pre_save, sender=Post)
+def post_counters_pre_save(sender, instance, raw=False, **kwargs):
+    instance._counters_old = Post.objects.filter(pk=instance.pk).values(
+        'category_id', 'is_published'
+    ).first() if instance.pk and not raw else None
+
+
+@receiver(post_save, sender=Post)
+def post_counters_post_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+
+    old = getattr(instance, '_counters_old', None) or {
+        'category_id': None, 'is_published': False,
+    }
+    published_changed = old['is_published'] != instance.is_published
+
+    if published_changed or old['category_id'] != instance.category_id:
+        recount_categories({old['category_id'], instance.category_id})
+
+    if published_changed:
+        recount_tags(post_tag_pks(instance.pk))
+
+
+@receiver(pre_delete, sender=Post)
+def post_counters_pre_delete(sender, instance, **kwargs):
+    instance._counters_tags = post_tag_pks(instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def post_counters_post_delete(sender, instance, **kwargs):
+    recount_categories({instance.category_id})
+    recount_tags(getattr(instance, '_counters_tags', set()))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def post_tags_counters(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # tag.post_set.add(...): só a própria tag muda de contagem
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            recount_tags({instance.pk})
+        return
+
+    if action == 'pre_clear':
+        instance._counters_cleared_tags = post_tag_pks(instance.pk)
+    elif action == 'post_clear':
+        recount_tags(getattr(instance, '_counters_cleared_tags', set()))
+    elif action in ('post_add', 'post_remove') and instance.is_published:
+        recount_tags(pk_set)
+
+
+
+# Versão dos fragmentos (blog/fragments.py): o corpo do post mostra as
+# tags, a categoria e o autor, que não mudam o updated_at do próprio post.
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def category_touch_posts(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not created:
+        touch_posts(Post.objects.filter(category=instance))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def tag_touch_posts(sender, instance, created=False, raw=False, **kwargs):
+    if not raw and not created:
+        touch_posts(Post.objects.filter(tags=instance))
+
+
+@receiver(post_save, sender=User)
+def author_touch_posts(sender, instance, created=False, raw=False,
+                       update_fields=None, **kwargs):
+    if not raw and not created and update_fields != frozenset({'last_login'}):
+        touch_posts(Post.objects.filter(created_by=instance))
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def post_tags_touch_posts(sender, instance, action, reverse, pk_set, **kwargs):
+    # O admin grava as tags depois do post, com o updated_at já definido
+    if reverse and action == 'pre_clear':
+        # tag.post_set.clear(): depois do clear os posts não apontam mais
+        # para a tag
+        instance._fragments_cleared_posts = list(
+            Post.objects.filter(tags=instance).values_list('pk', flat=True)
+        )
+    elif action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    elif not reverse:
+        touch_posts(Post.objects.filter(pk=instance.pk))
+    elif action == 'post_clear':
+        touch_posts(Post.objects.filter(
+            pk__in=getattr(instance, '_fragments_cleared_posts', ())
+        ))
+    else:
+        touch_posts(Post.objects.filter(pk__in=pk_set))
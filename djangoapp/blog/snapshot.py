@@ -0,0 +1,207 @@
+"""
+Snapshot estático do blog público.
+
+Cada URL pública vira um arquivo em BLOG_SNAPSHOT_ROOT:
+
+    /                       -> index.html, page-2.html, ...
+    /post/<slug>/           -> post/<slug>/index.html
+    /category/<slug>?page=3 -> category/<slug>/page-3.html
+
+O manage.py export_snapshot gera tudo; com BLOG_SNAPSHOT_ON_SAVE=1 cada
+purge do cache de páginas (blog/page_cache.py) enfileira um job que
+regera só as URLs dos grupos purgados. Das listagens (índice, categoria,
+tag, autor) o job regera só as BLOG_SNAPSHOT_LISTING_PAGES primeiras
+páginas: publicar um post desloca todas as outras, e refazer as ~11 mil
+páginas do índice a cada save não cabe. As mais fundas ficam com até
+alguns posts de diferença até o próximo export_snapshot (rodado
+periodicamente, ex.: pelo cron). Um servidor de arquivos serve o resto,
+por exemplo no nginx:
+
+    location /static/ { alias /data/web/static/; }
+    location /media/ { alias /data/web/media/; }
+    location ~ ^/(admin|search|summernote)/ { proxy_pass http://django; }
+    location / {
+        try_files $uri/page-$arg_page.html $uri/index.html @django;
+    }
+
+Só faz sentido com BLOG_PAGINATION_MODE=offset: os links ?after= da
+paginação por cursor não têm arquivo correspondente.
+"""
+import math
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import Client
+from django.urls import reverse
+
+from blog.models import Category, Page, Post, Tag
+from blog.views import PER_PAGE
+from jobs.registry import register
+from project.db_routers import use_primary
+
+
+def snapshot_root():
+    return Path(settings.BLOG_SNAPSHOT_ROOT)
+
+
+def is_enabled():
+    return getattr(settings, 'BLOG_PAGINATION_MODE', 'offset') == 'offset'
+
+
+def page_numbers(count):
+    return range(1, max(math.ceil(count / PER_PAGE), 1) + 1)
+
+
+def listing_paths(url, count):
+    return [(url, page) for page in page_numbers(count)]
+
+
+def group_paths(group):
+    """
+    Lista de (url, página) de um grupo do cache de páginas. Objetos que
+    não existem mais (ou foram despublicados) entram com página 1 para que
+    o arquivo seja apagado.
+    """
+    published = Post.objects.filter(is_published=True)
+    kind, _, key = group.partition(':')
+
+    if kind == 'index':
+        return listing_paths(reverse('blog:index'), published.count())
+
+    if kind == 'post':
+        return [(reverse('blog:post', args=(key,)), 1)]
+
+    if kind == 'page':
+        return [(reverse('blog:page', args=(key,)), 1)]
+
+    if kind == 'author':
+        return listing_paths(
+            reverse('blog:created_by', args=(int(key),)),
+            published.filter(created_by_id=key).count(),
+        )
+
+    for prefix, model in (('category', Category), ('tag', Tag)):
+        if kind == prefix:
+            count = model.objects.filter(slug=key).values_list(
+                'published_posts_count', flat=True
+            ).first() or 0
+            return listing_paths(reverse(f'blog:{prefix}', args=(key,)), count)
+
+    return []
+
+
+def all_groups():
+    groups = {'index'}
+    groups.update(
+        f'post:{slug}' for slug in
+        Post.objects.filter(is_published=True).values_list('slug', flat=True)
+    )
+    groups.update(
+        f'page:{slug}' for slug in
+        Page.objects.filter(is_published=True).values_list('slug', flat=True)
+    )
+    groups.update(
+        f'category:{slug}' for slug in Category.objects.filter(
+            published_posts_count__gt=0
+        ).values_list('slug', flat=True)
+    )
+    groups.update(
+        f'tag:{slug}' for slug in Tag.objects.filter(
+            published_posts_count__gt=0
+        ).values_list('slug', flat=True)
+    )
+    groups.update(
+        f'author:{pk}' for pk in User.objects.filter(
+            post_created_by__is_published=True
+        ).values_list('pk', flat=True).distinct()
+    )
+    return groups
+
+
+def snapshot_file(url, page=1, root=None):
+    name = 'index.html' if page == 1 else f'page-{page}.html'
+    return (root or snapshot_root()) / url.strip('/') / name
+
+
+def snapshot_host():
+    host = getattr(settings, 'BLOG_SNAPSHOT_HOST', '')
+    if host:
+        return host
+    hosts = [h for h in settings.ALLOWED_HOSTS if h != '*']
+    return hosts[0].lstrip('.') if hosts else 'localhost'
+
+
+def write_file(target, content):
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=target.parent, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(content)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, target)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def render_path(url, page=1, client=None, root=None):
+    """Renderiza uma URL como visitante anônimo e grava/apaga o arquivo."""
+    client = client or Client(HTTP_HOST=snapshot_host())
+    response = client.get(url, {'page': page} if page > 1 else {})
+    target = snapshot_file(url, page, root)
+
+    if response.status_code == 200:
+        write_file(target, response.content)
+        return url, page, 'written'
+
+    if response.status_code == 404:
+        target.unlink(missing_ok=True)
+        return url, page, 'removed'
+
+    return url, page, f'status {response.status_code}'
+
+
+def remove_stale_pages(url, last_page):
+    directory = snapshot_file(url).parent
+    for path in directory.glob('page-*.html'):
+        number = path.stem.removeprefix('page-')
+        if number.isdigit() and int(number) > last_page:
+            path.unlink(missing_ok=True)
+
+
+def get_listing_pages():
+    return getattr(settings, 'BLOG_SNAPSHOT_LISTING_PAGES', 5)
+
+
+def render_groups(groups, max_pages=None):
+    """
+    Regera os arquivos dos grupos; com max_pages, só as primeiras páginas
+    de cada listagem (as que sobram além do fim ainda são apagadas).
+    """
+    client = Client(HTTP_HOST=snapshot_host())
+    results = []
+
+    # O job roda logo depois do commit: numa réplica atrasada o arquivo
+    # sairia sem a edição e só seria refeito na próxima
+    with use_primary():
+        for group in sorted(groups):
+            paths = group_paths(group)
+            for url, page in paths[:max_pages] if max_pages else paths:
+                results.append(render_path(url, page, client))
+            if paths:
+                remove_stale_pages(paths[0][0], paths[-1][1])
+
+    return results
+
+
+@register('render_snapshot')
+def render_snapshot(groups=None):
+    if not is_enabled():
+        return
+    if groups is None:
+        render_groups(all_groups())
+    else:
+        render_groups(groups, get_listing_pages())
@@ -0,0 +1,31 @@
+// Troca os <pre> do conteúdo por um CodeMirror somente leitura. Vai no fim
+// do bundle code.js, carregado com defer, então roda com o DOM pronto.
+(function () {
+  if (typeof CodeMirror == 'undefined') return;
+
+  const codes = document.querySelectorAll('pre');
+
+  for (const code of codes) {
+    const language = code.dataset.language || null;
+    const text = code.textContent || code.innerText;
+
+    const config = {
+      value: text,
+      tabSize: 2,
+      mode: language,
+      theme: 'dracula',
+      lineNumbers: true,
+      styleActiveLine: true,
+      styleActiveSelected: true,
+      lineWrapping: false,
+      line: true,
+      readOnly: true,
+      viewportMargin: 50,
+      matchBrackets: true,
+    };
+
+    CodeMirror(function (node) {
+      code.parentNode.replaceChild(node, code);
+    }, config);
+  }
+})();
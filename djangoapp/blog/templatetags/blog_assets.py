@@ -0,0 +1,26 @@
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+from blog.assets import bundle_files
+
+register = template.Library()
+
+TAGS = {
+    'css': '<link rel="stylesheet" href="{}">',
+    'js': '<script src="{}" defer></script>',
+}
+
+
+@register.simple_tag
+def static_bundle(name):
+    """
+    {% static_bundle 'site.css' %}
+
+    <link>/<script> do bundle ou, se ele não foi gerado, dos arquivos de
+    origem (blog/assets.py).
+    """
+    tag = TAGS[name.rsplit('.', 1)[1]]
+    return format_html_join(
+        '\n', tag, ((static(path),) for path in bundle_files(name))
+    )
@@ -0,0 +1,61 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from blog.fragments import render_fragment, render_fragments, template_version
+
+register = template.Library()
+
+POST_CARD_TEMPLATE = 'blog/partials/_post-card.html'
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts):
+    """
+    Renderiza os cards de uma listagem. Os cards em cache saem do
+    get_many; só os que faltam passam pelo _post-card.html.
+    """
+    card = context.template.engine.get_template(POST_CARD_TEMPLATE)
+    source = template_version(card.origin.name)
+
+    def render(post):
+        with context.push(post=post):
+            return card.render(context)
+
+    return mark_safe(''.join(render_fragments('card', source, posts, render)))
+
+
+class FragmentNode(template.Node):
+
+    def __init__(self, name, obj, nodelist, source):
+        self.name = name
+        self.obj = obj
+        self.nodelist = nodelist
+        self.source = source
+
+    def render(self, context):
+        obj = self.obj.resolve(context)
+        return render_fragment(
+            self.name.resolve(context), self.source, obj,
+            lambda: self.nodelist.render(context),
+        )
+
+
+@register.tag
+def fragment(parser, token):
+    """
+    {% fragment 'post' post %}...{% endfragment %}
+
+    Guarda o conteúdo do bloco com a chave (nome, pk, updated_at) do objeto.
+    """
+    bits = token.split_contents()
+    if len(bits) != 3:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} recebe um nome e um objeto com pk e updated_at'
+        )
+
+    nodelist = parser.parse(('endfragment',))
+    parser.delete_first_token()
+    return FragmentNode(
+        parser.compile_filter(bits[1]), parser.compile_filter(bits[2]),
+        nodelist, template_version(parser.origin.name),
+    )
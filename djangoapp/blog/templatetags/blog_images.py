@@ -0,0 +1,39 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from blog.renditions import SOURCE_TYPES, build_srcset, get_renditions
+
+register = template.Library()
+
+
+@register.simple_tag
+def responsive_image(image, alt='', sizes='100vw', css_class='', loading='lazy'):
+    """
+    Renderiza <picture> com srcset das versões geradas para a imagem.
+    Enquanto as versões não existem, cai no <img> simples com o original.
+    """
+    if not image:
+        return ''
+
+    renditions = get_renditions(image.name)
+    fallback = renditions.get('image/jpeg')
+
+    img = format_html(
+        '<img class="{}" loading="{}" src="{}" alt="{}"{}>',
+        css_class, loading, image.url, alt,
+        format_html(' srcset="{}" sizes="{}"', build_srcset(fallback), sizes)
+        if fallback else '',
+    )
+
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        (
+            (mime_type, build_srcset(renditions[mime_type]), sizes)
+            for mime_type in SOURCE_TYPES if mime_type in renditions
+        ),
+    )
+
+    if not sources:
+        return img
+
+    return format_html('<picture>{}{}</picture>', sources, img)
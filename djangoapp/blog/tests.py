@@ -1,3 +1,1460 @@
-from django.test import TestCase
+import base64
+import hashlib
+import json
+import re
+import tempfile
+import threading
+import time
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock, skipIf, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections, transaction
+from django.db.models import IntegerField, Value
+from django.http import Http404
+from django.template import engines
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+from django.utils.http import http_date
+from django.views.generic import ListView
+
+from blog.models import Category, ImageRendition, Page, Post, Tag
+from jobs.models import Job
+from jobs.queue import claim_next, run_job
+from PIL import ExifTags, Image, features
+
+from blog.assets import build_bundle
+from blog.content_io import CHECKPOINT_FILE, CONTENT_FILE
+from blog.pagination import CursorPaginator, InvalidCursor, KnownCountMixin
+from blog.rendering import render_content, render_excerpt
+from blog.renditions import purge_pages_using
+from blog.search import search_queryset
+from blog.templatetags.blog_assets import static_bundle
+from project import urls as project_urls
+from site_setup.cache import get_site_setup
+from site_setup.models import MenuLink, SiteSetup
+
+
+@override_settings(BLOG_PAGINATION_MODE='offset')
+class ViewQueryCountTests(TestCase):
+    # Setup e menu vêm do cache, então só contam as queries da própria view
+    SITE_SETUP_QUERIES = 0
+
+    @classmethod
+    def setUpTestData(cls):
+        setup = SiteSetup.objects.create(title='Blog', description='Teste')
+        MenuLink.objects.create(text='Home', url_or_path='/', site_setup=setup)
+        cls.author = User.objects.create_user('autor', first_name='Au')
+        cls.category = Category.objects.create(name='Python')
+        cls.tags = [Tag.objects.create(name=f'tag {i}') for i in range(3)]
+        # Mais de uma página em todas as listagens
+        cls.posts = []
+        for i in range(12):
+            post = Post.objects.create(
+                title=f'Post de teste {i}', excerpt='Resumo', content='Conteúdo',
+                is_published=True, created_by=cls.author, category=cls.category,
+            )
+            post.tags.set(cls.tags)
+            cls.posts.append(post)
+        cls.page = Page.objects.create(
+            title='Sobre', content='Página', is_published=True
+        )
+
+    def setUp(self):
+        cache.clear()
+        get_site_setup()
+
+    def assertViewQueries(self, num, url):
+        with self.assertNumQueries(self.SITE_SETUP_QUERIES + num):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_index(self):
+        # last-modified + count + lista
+        self.assertViewQueries(3, reverse('blog:index'))
+        self.assertViewQueries(3, reverse('blog:index') + '?page=2')
+
+    def test_created_by(self):
+        # last-modified + count + lista + usuário
+        url = reverse('blog:created_by', args=(self.author.pk,))
+        self.assertViewQueries(4, url)
+
+    def test_category(self):
+        # last-modified + categoria (com o contador) + lista
+        url = reverse('blog:category', args=(self.category.slug,))
+        self.assertViewQueries(3, url)
+        self.assertViewQueries(3, url + '?page=2')
+
+    def test_tag(self):
+        # last-modified + tag (com o contador) + lista
+        url = reverse('blog:tag', args=(self.tags[0].slug,))
+        self.assertViewQueries(3, url)
+
+    def test_empty_tag_is_404_without_listing(self):
+        tag = Tag.objects.create(name='vazia')
+        url = reverse('blog:tag', args=(tag.slug,))
+        # last-modified + tag
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 404)
+
+    def test_search(self):
+        # last-modified + count limitado + lista
+        self.assertViewQueries(3, reverse('blog:search') + '?search=teste')
+
+    def test_post_detail(self):
+        # last-modified + post com categoria e autor + tags
+        url = reverse('blog:post', args=(self.posts[0].slug,))
+        self.assertViewQueries(3, url)
+
+    def test_page_detail(self):
+        url = reverse('blog:page', args=(self.page.slug,))
+        self.assertViewQueries(1, url)
+
+    def test_post_detail_does_not_grow_with_tags(self):
+        post = self.posts[0]
+        post.tags.add(*[Tag.objects.create(name=f'extra {i}') for i in range(5)])
+        url = reverse('blog:post', args=(post.slug,))
+        self.assertViewQueries(3, url)
+
+
+class PageCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        SiteSetup.objects.create(title='Blog', description='Teste')
+        cls.author = User.objects.create_user('autor')
+        cls.category = Category.objects.create(name='Python')
+        cls.tags = [Tag.objects.create(name='django')]
+        cls.posts = [
+            Post.objects.create(
+                title=f'Em cache {i}', excerpt='Resumo', content='Conteúdo',
+                is_published=True, created_by=cls.author, category=cls.category,
+            )
+            for i in range(3)
+        ]
+        for post in cls.posts:
+            post.tags.set(cls.tags)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_hit_skips_database(self):
+        url = reverse('blog:post', args=(self.posts[0].slug,))
+        first = self.client.get(url)
+
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+
+        self.assertEqual(first.content, second.content)
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    })
+    def test_works_without_cache(self):
+        response = self.client.get(reverse('blog:index'))
+        self.assertContains(response, self.posts[0].title)
+        self.assertTrue(response.has_header('ETag'))
+
+    def test_only_pagination_params_are_cached(self):
+        url = reverse('blog:index')
+        self.client.get(url, {'page': 1})
+
+        with self.assertNumQueries(0):
+            self.client.get(f'{url}?page=1')
+
+        entries = len(cache._cache)
+        for number in range(3):
+            response = self.client.get(url, {'utm_source': number})
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(cache._cache), entries)
+
+    def test_unpublish_purges_affected_pages(self):
+        post = self.posts[0]
+        urls = [
+            reverse('blog:index'),
+            reverse('blog:post', args=(post.slug,)),
+            reverse('blog:category', args=(self.category.slug,)),
+            reverse('blog:tag', args=(self.tags[0].slug,)),
+            reverse('blog:created_by', args=(self.author.pk,)),
+        ]
+        for url in urls:
+            self.assertContains(self.client.get(url), post.title)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post.is_published = False
+            post.save()
+
+        self.assertEqual(self.client.get(urls[1]).status_code, 404)
+        for url in urls[:1] + urls[2:]:
+            self.assertNotContains(self.client.get(url), post.title)
+
+    def test_tag_removal_purges_tag_listing(self):
+        post, tag = self.posts[0], self.tags[0]
+        url = reverse('blog:tag', args=(tag.slug,))
+        self.assertContains(self.client.get(url), post.title)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post.tags.remove(tag)
+
+        self.assertNotContains(self.client.get(url), post.title)
+
+    def test_fill_right_after_purge_reads_primary(self):
+        url = reverse('blog:post', args=(self.posts[0].slug,))
+        later = time.time() + 60
+
+        with mock.patch('blog.page_cache.pin_primary') as pin_primary:
+            self.client.get(url)
+            self.client.get(url)
+        # Versões recém-criadas contam como troca; o hit sai do cache
+        pin_primary.assert_called_once_with()
+
+        with mock.patch('blog.page_cache.time.time', return_value=later):
+            with mock.patch('blog.page_cache.pin_primary') as pin_primary:
+                self.client.get(url, {'page': 2})
+            pin_primary.assert_not_called()
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.posts[0].save()
+            with mock.patch('blog.page_cache.pin_primary') as pin_primary:
+                self.client.get(url)
+            pin_primary.assert_called_once_with()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        SiteSetup.objects.create(title='Blog', description='Teste')
+        cls.posts = [
+            Post.objects.create(
+                title=f'Condicional {i}', excerpt='Resumo', content='Conteúdo',
+                is_published=True,
+            )
+            for i in range(2)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_etag_returns_not_modified(self):
+        url = reverse('blog:post', args=(self.posts[0].slug,))
+        response = self.client.get(url)
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        with self.settings(BLOG_PAGE_CACHE_TIMEOUT=0):
+            with self.assertNumQueries(1):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag']
+                )
+        self.assertEqual(response.status_code, 304)
+
+    def test_unpublish_moves_last_modified_forward(self):
+        url = reverse('blog:index')
+        last_modified = self.client.get(url)['Last-Modified']
+
+        later = time.time() + 60
+        with mock.patch('blog.page_cache.time.time', return_value=later):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.posts[0].is_published = False
+                self.posts[0].save()
+
+        # Nenhum post publicado mudou de updated_at, só a versão do grupo
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotContains(response, self.posts[0].title)
+        self.assertEqual(response['Last-Modified'], http_date(int(later)))
+
+    def test_deploy_changes_validators(self):
+        url = reverse('blog:post', args=(self.posts[0].slug,))
+        response = self.client.get(url)
+
+        later = time.time() + 60
+        with mock.patch(
+            'blog.page_cache.get_build_stamp', return_value=f'novo:{later:.3f}'
+        ):
+            etag_response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+            date_response = self.client.get(
+                url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+            )
+
+        self.assertEqual(etag_response.status_code, 200)
+        self.assertEqual(date_response.status_code, 200)
+
+    def test_edit_changes_etag(self):
+        url = reverse('blog:index')
+        etag = self.client.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts[0].title = 'Título novo'
+            self.posts[0].save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Título novo')
+
+
+class AsyncUrls:
+    # As views async só são montadas com BLOG_ASYNC_VIEWS=1
+    urlpatterns = project_urls.urlpatterns + [
+        path('async/', include('blog.async_urls')),
+    ]
+
+
+@override_settings(ROOT_URLCONF=AsyncUrls, BLOG_PAGINATION_MODE='offset')
+class AsyncViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        SiteSetup.objects.create(title='Blog', description='Teste')
+        cls.author = User.objects.create_user(
+            'assincrono', first_name='Ana', last_name='Souza'
+        )
+        cls.category = Category.objects.create(name='Async')
+        cls.tag = Tag.objects.create(name='asgi')
+        cls.posts = [
+            Post.objects.create(
+                title=f'Assíncrono {i}', excerpt='Resumo', content='Conteúdo',
+                is_published=True, created_by=cls.author, category=cls.category,
+            )
+            for i in range(12)
+        ]
+        for post in cls.posts:
+            post.tags.add(cls.tag)
+        cls.page = Page.objects.create(
+            title='Sobre async', content='Página', is_published=True
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, path, data=None, **kwargs):
+        # Pelo handler ASGI; os testes ficam sync para poder contar queries
+        # e rodar os on_commit
+        async def request():
+            return await self.async_client.get(path, data, **kwargs)
+        return async_to_sync(request)()
+
+    def url_pairs(self):
+        for name, args, params in (
+            ('index', (), {}),
+            ('index', (), {'page': 2}),
+            ('index', (), {'page': 'last'}),
+            ('category', (self.category.slug,), {}),
+            ('tag', (self.tag.slug,), {'page': 2}),
+            ('created_by', (self.author.pk,), {}),
+            ('post', (self.posts[0].slug,), {}),
+            ('page', (self.page.slug,), {}),
+            ('search', (), {'search': 'Assíncrono'}),
+        ):
+            yield (
+                reverse(f'blog:{name}', args=args),
+                reverse(f'blog_async:{name}', args=args),
+                params,
+            )
+
+    def test_same_pages_as_sync_views(self):
+        for sync_url, async_url, params in self.url_pairs():
+            with self.subTest(url=async_url, params=params):
+                expected = self.get(sync_url, params)
+                response = self.get(async_url, params)
+
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.context['page_title'],
+                    expected.context['page_title'],
+                )
+                if 'object' in expected.context:
+                    self.assertEqual(
+                        response.context['object'], expected.context['object']
+                    )
+                else:
+                    self.assertEqual(
+                        list(response.context['object_list']),
+                        list(expected.context['object_list']),
+                    )
+                self.assertTrue(response.has_header('ETag'))
+                self.assertEqual(response['Cache-Control'], 'no-cache')
+
+    @override_settings(BLOG_PAGINATION_MODE='cursor')
+    def test_cursor_pagination(self):
+        url = reverse('blog_async:category', args=(self.category.slug,))
+        first = self.get(url)
+        page = first.context['page_obj']
+        self.assertEqual(len(page.object_list), 9)
+
+        second = self.get(url, {'after': page.next_cursor})
+        self.assertEqual(
+            [post.title for post in second.context['page_obj'].object_list],
+            [post.title for post in self.posts[:3]][::-1],
+        )
+
+        response = self.get(url, {'after': 'lixo'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_anonymous_hit_skips_database(self):
+        url = reverse('blog_async:post', args=(self.posts[0].slug,))
+        first = self.get(url)
+
+        with self.assertNumQueries(0):
+            second = self.get(url)
+
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first['ETag'], second['ETag'])
+
+    def test_etag_returns_not_modified(self):
+        url = reverse('blog_async:category', args=(self.category.slug,))
+        response = self.get(url)
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        with self.settings(BLOG_PAGE_CACHE_TIMEOUT=0):
+            # Só o aggregate do Last-Modified
+            with self.assertNumQueries(1):
+                response = self.get(
+                    url, headers={'If-None-Match': response['ETag']}
+                )
+        self.assertEqual(response.status_code, 304)
+
+    def test_unpublish_purges_async_pages(self):
+        post = self.posts[-1]
+        url = reverse('blog_async:index')
+        self.assertContains(self.get(url), post.title)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            post.is_published = False
+            post.save()
+
+        self.assertNotContains(self.get(url), post.title)
+
+    @override_settings(BLOG_PAGE_CACHE_TIMEOUT=0)
+    def test_category_listing_uses_counter(self):
+        url = reverse('blog_async:category', args=(self.category.slug,))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(url, {'page': 2})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if 'COUNT(' in query['sql'].upper()
+        ])
+
+    def test_missing_objects_return_404(self):
+        for url, params in (
+            (reverse('blog_async:category', args=('nada',)), {}),
+            (reverse('blog_async:tag', args=('nada',)), {}),
+            (reverse('blog_async:created_by', args=(9999,)), {}),
+            (reverse('blog_async:post', args=('nada',)), {}),
+            (reverse('blog_async:index'), {'page': 99}),
+        ):
+            with self.subTest(url=url, params=params):
+                response = self.get(url, params)
+                self.assertEqual(response.status_code, 404)
+
+    def test_search_counts_results(self):
+        url = reverse('blog_async:search')
+        response = self.get(url, {'search': 'Assíncrono'})
+        self.assertEqual(response.context['result_count'], 12)
+
+        response = self.get(url, {'search': ' '})
+        self.assertRedirects(
+            response, reverse('blog:index'), fetch_redirect_response=False
+        )
+
+
+@override_settings(BLOG_PAGINATION_MODE='cursor', BLOG_PAGE_CACHE_TIMEOUT=0)
+class CursorPaginationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        SiteSetup.objects.create(title='Blog', description='Teste')
+        cls.posts = [
+            Post.objects.create(
+                title=f'Cursor {i}', excerpt='e', content='c', is_published=True,
+            )
+            for i in range(12)
+        ]
+
+    def test_cursors_walk_forward_and_back(self):
+        url = reverse('blog:index')
+        first = self.client.get(url).context['page_obj']
+        self.assertEqual([post.pk for post in first], [post.pk for post in self.posts[:2:-1]])
+        self.assertFalse(first.has_previous())
+
+        second = self.client.get(url, {'after': first.next_cursor}).context['page_obj']
+        self.assertEqual([post.pk for post in second], [post.pk for post in self.posts[2::-1]])
+        self.assertFalse(second.has_next())
+
+        back = self.client.get(url, {'before': second.previous_cursor}).context['page_obj']
+        self.assertEqual(list(back), list(first))
+
+    def test_malformed_cursor_is_404(self):
+        url = reverse('blog:index')
+        for values in ([None], [[1]], [{'a': 1}], ['abc'], [1, 2], {'pk': 1}):
+            with self.subTest(values=values):
+                cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+                self.assertEqual(self.client.get(url, {'after': cursor}).status_code, 404)
+                self.assertEqual(self.client.get(url, {'before': cursor}).status_code, 404)
+
+        self.assertEqual(self.client.get(url, {'after': '%%%'}).status_code, 404)
+
+    def test_annotated_ordering(self):
+        queryset = Post.objects.annotate(
+            rank=Value(5, output_field=IntegerField())
+        ).order_by('-rank', '-pk')
+        paginator = CursorPaginator(queryset, 9)
+
+        self.assertEqual(paginator.clean_cursor_values(['5', 3], 'x'), [5, 3])
+        second = paginator.page(after=paginator.page().next_cursor)
+        self.assertEqual(list(second), self.posts[2::-1])
+
+        paginator.ordering = '-nada', '-pk'
+        with self.assertRaises(InvalidCursor):
+            paginator.clean_cursor_values([1, 2], 'x')
+
+
+@override_settings(BLOG_PAGINATION_MODE='cursor', BLOG_PAGE_CACHE_TIMEOUT=0)
+class CursorListingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        SiteSetup.objects.create(title='Blog', description='Teste')
+        cls.author = User.objects.create_user('autor')
+        cls.python = Category.objects.create(name='Python')
+        cls.other = Category.objects.create(name='Outra')
+        cls.tag = Tag.objects.create(name='django')
+
+        # Posts das listagens intercalados com posts de fora delas
+        cls.listed = []
+        for i in range(20):
+            post = Post.objects.create(
+                title=f'Listado {i}', excerpt='e', content='c', is_published=True,
+            )
+            Post.objects.create(
+                title=f'Fora {i}', excerpt='e', content='c', is_published=True,
+                category=cls.other,
+            )
+            post.category = cls.python
+            post.created_by = cls.author
+            post.save()
+            post.tags.add(cls.tag)
+            cls.listed.append(post)
+
+    def walk(self, url):
+        pks, pages, cursor = [], 0, None
+        while True:
+            params = {'after': cursor} if cursor else {}
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            page = response.context['page_obj']
+            pks += [post.pk for post in page]
+            pages += 1
+            if not page.has_next():
+                self.assertNotContains(response, '?after=')
+                return pks, pages
+            self.assertContains(response, f'?after={page.next_cursor}')
+            cursor = page.next_cursor
+
+    def test_listings_walk_every_post_once(self):
+        expected = [post.pk for post in reversed(self.listed)]
+        urls = [
+            reverse('blog:category', args=(self.python.slug,)),
+            reverse('blog:tag', args=(self.tag.slug,)),
+            reverse('blog:created_by', args=(self.author.pk,)),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.walk(url), (expected, 3))
+
+    def test_cursor_pages_skip_count_and_offset(self):
+        url = reverse('blog:category', args=(self.python.slug,))
+        first = self.client.get(url).context['page_obj']
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url, {'after': first.next_cursor})
+        sql = ' '.join(query['sql'] for query in queries).upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+
+class SearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        SiteSetup.objects.create(title='Blog', description='Teste')
+        cls.matches = [
+            Post.objects.create(
+                title=f'Guia de Django {i}', excerpt='Resumo', content='Conteúdo',
+                is_published=True,
+            )
+            for i in range(12)
+        ]
+        cls.in_content = Post.objects.create(
+            title='Outro assunto', excerpt='Resumo', is_published=True,
+            content='Um parágrafo que fala de django no meio do texto',
+        )
+        Post.objects.create(
+            title='Rascunho sobre Django', excerpt='Resumo', content='c',
+        )
+        Post.objects.create(
+            title='Receita de bolo', excerpt='Resumo', content='Farinha',
+            is_published=True,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_search_queryset_matches_title_and_content(self):
+        found = search_queryset(Post.objects.get_published(), 'django')
+        self.assertEqual(
+            {post.pk for post in found},
+            {post.pk for post in [*self.matches, self.in_content]},
+        )
+
+    @skipUnless(connection.vendor == 'postgresql', 'Full-text só no Postgres')
+    def test_title_match_ranks_above_content_match(self):
+        found = list(search_queryset(Post.objects.get_published(), 'django'))
+        self.assertEqual(found[-1], self.in_content)
+        self.assertGreater(found[0].rank, found[-1].rank)
+
+    def test_view_counts_and_paginates_results(self):
+        url = reverse('blog:search')
+        response = self.client.get(url, {'search': ' django '})
+        self.assertEqual(response.context['result_count'], 13)
+        self.assertFalse(response.context['result_count_is_bounded'])
+
+        first = response.context['page_obj']
+        self.assertEqual(len(first), 9)
+        self.assertTrue(first.has_next())
+
+        second = self.client.get(
+            url, {'search': 'django', 'after': first.next_cursor}
+        ).context['page_obj']
+        self.assertFalse(second.has_next())
+        self.assertEqual(
+            {post.pk for post in [*first, *second]},
+            {post.pk for post in [*self.matches, self.in_content]},
+        )
+
+    @skipUnless(connection.vendor == 'postgresql', 'Full-text só no Postgres')
+    def test_cursor_pages_follow_rank(self):
+        url = reverse('blog:search')
+        seen = []
+        params = {'search': 'django'}
+
+        while True:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            page = response.context['page_obj']
+            seen.extend(page)
+            if not page.has_next():
+                break
+            params = {'search': 'django', 'after': page.next_cursor}
+
+        self.assertEqual(
+            seen, list(search_queryset(Post.objects.get_published(), 'django'))
+        )
+        self.assertEqual(seen[-1], self.in_content)
+
+        back = self.client.get(url, {'search': 'django', 'before': page.previous_cursor})
+        self.assertEqual(back.status_code, 200)
+        self.assertEqual(list(back.context['page_obj']), seen[:9])
+
+    def test_empty_term_redirects_home(self):
+        response = self.client.get(reverse('blog:search'), {'search': '  '})
+        self.assertRedirects(response, reverse('blog:index'))
+
+    @skipIf(connection.vendor == 'postgresql', 'Testa o fallback sem Postgres')
+    def test_rebuild_index_requires_postgres(self):
+        with self.assertRaisesMessage(CommandError, 'PostgreSQL'):
+            call_command('rebuild_search_index', stdout=StringIO())
+
+    @skipUnless(connection.vendor == 'postgresql', 'Full-text só no Postgres')
+    def test_rebuild_index_fills_missing_vectors(self):
+        Post.objects.update(search_vector=None)
+        self.assertFalse(
+            search_queryset(Post.objects.get_published(), 'django').exists()
+        )
+
+        call_command('rebuild_search_index', '--batch-size', '5', stdout=StringIO())
+
+        self.assertEqual(
+            search_queryset(Post.objects.get_published(), 'django').count(), 13
+        )
+
+
+@override_settings(BLOG_PAGINATION_MODE='offset')
+class QueryPlanTests(TestCase):
+    """
+    Roda o EXPLAIN de cada query de post que as views fazem e falha se
+    alguma ler blog_post ou blog_post_tags inteira em vez de usar índice.
+    No Postgres o seq scan é desligado para que o plano mostre se existe
+    um índice que sirva, mesmo com a tabela pequena do teste.
+    """
+    TABLES = 'blog_post', 'blog_post_tags',
+
+    @classmethod
+    def setUpTestData(cls):
+        SiteSetup.objects.create(title='Blog', description='Teste')
+        cls.author = User.objects.create_user('autor')
+        cls.category = Category.objects.create(name='Python')
+        cls.tags = [Tag.objects.create(name=f'tag {i}') for i in range(3)]
+        # Metade rascunhos, para o filtro de publicados pesar no plano
+        cls.posts = []
+        for i in range(60):
+            post = Post.objects.create(
+                title=f'Plano {i}', excerpt='Resumo', content='Conteúdo',
+                is_published=i % 2 == 0, created_by=cls.author,
+                category=cls.category,
+            )
+            post.tags.set(cls.tags)
+            cls.posts.append(post)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def setUp(self):
+        cache.clear()
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('EXPLAIN ' + sql)
+            else:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def full_scans(self, plan):
+        tables = '|'.join(self.TABLES)
+        if connection.vendor == 'postgresql':
+            pattern = rf'Seq Scan on ({tables})\b'
+        else:
+            pattern = rf'^SCAN ({tables})$'
+        return [line for line in plan if re.search(pattern, line.strip())]
+
+    def assertUsesIndexes(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        for query in queries.captured_queries:
+            if 'blog_post' not in query['sql']:
+                continue
+            plan = self.explain(query['sql'])
+            self.assertEqual(
+                self.full_scans(plan), [], f'{query["sql"]}\n{plan}'
+            )
+
+    def test_index(self):
+        self.assertUsesIndexes(reverse('blog:index'))
+        self.assertUsesIndexes(reverse('blog:index') + '?page=3')
+
+    def test_created_by(self):
+        self.assertUsesIndexes(
+            reverse('blog:created_by', args=(self.author.pk,))
+        )
+
+    def test_category(self):
+        self.assertUsesIndexes(
+            reverse('blog:category', args=(self.category.slug,))
+        )
+
+    def test_tag(self):
+        self.assertUsesIndexes(reverse('blog:tag', args=(self.tags[0].slug,)))
+
+    def test_post(self):
+        self.assertUsesIndexes(reverse('blog:post', args=(self.posts[0].slug,)))
+
+    def test_taxonomy_last_modified_skips_joins(self):
+        for name, slug in (('category', self.category.slug), ('tag', self.tags[0].slug)):
+            with self.subTest(name=name):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(reverse(f'blog:{name}', args=(slug,)))
+
+                self.assertEqual(response.status_code, 200)
+                [aggregate] = [
+                    q['sql'] for q in queries.captured_queries if 'MAX(' in q['sql']
+                ]
+                self.assertNotIn('JOIN', aggregate)
+                self.assertEqual(self.full_scans(self.explain(aggregate)), [])
+
+    @skipUnless(connection.vendor == 'postgresql', 'Trigramas só no Postgres')
+    def test_pages_using_image(self):
+        with CaptureQueriesContext(connection) as queries:
+            purge_pages_using('posts/foto.jpg')
+
+        likes = [q['sql'] for q in queries.captured_queries if 'LIKE' in q['sql']]
+        self.assertTrue(likes)
+        for sql in likes:
+            plan = self.explain(sql)
+            self.assertNotRegex('\n'.join(plan), r'Seq Scan on blog_(post|page)\b')
+
+
+class PublishedCounterTests(TestCase):
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Python')
+        self.tags = [Tag.objects.create(name=f'tag {i}') for i in range(3)]
+        self.posts = []
+        for i in range(3):
+            post = Post.objects.create(
+                title=f'Contado {i}', excerpt='Resumo', content='Conteúdo',
+                is_published=True, category=self.category,
+            )
+            post.tags.set(self.tags)
+            self.posts.append(post)
+
+    def assertCounts(self, category, tags):
+        self.category.refresh_from_db()
+        self.assertEqual(self.category.published_posts_count, category)
+        self.assertEqual(
+            [tag.published_posts_count for tag in Tag.objects.order_by('pk')],
+            tags,
+        )
+
+    def test_create_publish_and_unpublish(self):
+        self.assertCounts(3, [3, 3, 3])
+
+        post = self.posts[0]
+        post.is_published = False
+        post.save()
+        self.assertCounts(2, [2, 2, 2])
+
+        post.is_published = True
+        post.save()
+        self.assertCounts(3, [3, 3, 3])
+
+    def test_retag_and_move_category(self):
+        post = self.posts[0]
+        post.tags.remove(self.tags[0])
+        self.assertCounts(3, [2, 3, 3])
+
+        post.tags.clear()
+        self.assertCounts(3, [2, 2, 2])
+
+        self.tags[2].post_set.add(post)
+        self.assertCounts(3, [2, 2, 3])
+
+        other = Category.objects.create(name='Outra')
+        post.category = other
+        post.save()
+        self.assertCounts(2, [2, 2, 3])
+        other.refresh_from_db()
+        self.assertEqual(other.published_posts_count, 1)
+
+    def test_delete(self):
+        self.posts[0].delete()
+        self.assertCounts(2, [2, 2, 2])
+
+    def test_rebuild_command(self):
+        Tag.objects.update(published_posts_count=0)
+        Category.objects.update(published_posts_count=99)
+
+        call_command('rebuild_post_counters', stdout=StringIO())
+        self.assertCounts(3, [3, 3, 3])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Trava de linha só no Postgres')
+class ConcurrentCounterTests(TransactionTestCase):
+
+    def test_concurrent_publishes_are_both_counted(self):
+        category = Category.objects.create(name='Python')
+        first_counted = threading.Event()
+
+        def publish(title, hold=False):
+            try:
+                with transaction.atomic():
+                    Post.objects.create(
+                        title=title, excerpt='e', content='c',
+                        is_published=True, category=category,
+                    )
+                    if hold:
+                        # Segura a trava do contador até o outro save tentar contar
+                        first_counted.set()
+                        time.sleep(0.5)
+            finally:
+                connections.close_all()
+
+        first = threading.Thread(target=publish, args=('Primeiro', True))
+        first.start()
+        first_counted.wait(5)
+        second = threading.Thread(target=publish, args=('Segundo',))
+        second.start()
+        first.join()
+        second.join()
+
+        category.refresh_from_db()
+        self.assertEqual(category.published_posts_count, 2)
+
+
+class KnownCountTests(TestCase):
+
+    class Listing(KnownCountMixin, ListView):
+        queryset = Category.objects.order_by('pk')
+        paginate_by = 2
+        allow_empty = False
+
+    class CountedListing(Listing):
+        def get_known_count(self):
+            return 5
+
+    def get(self, view):
+        return view.as_view()(RequestFactory().get('/'))
+
+    def test_without_counter_falls_back_to_count(self):
+        with self.assertRaises(Http404):
+            self.get(self.Listing)
+
+        for i in range(3):
+            Category.objects.create(name=f'Categoria {i}')
+        response = self.get(self.Listing)
+        self.assertEqual(response.context_data['paginator'].count, 3)
+        self.assertEqual(response.context_data['paginator'].num_pages, 2)
+
+    def test_counter_replaces_count(self):
+        Category.objects.create(name='Única')
+
+        with self.assertNumQueries(1):
+            response = self.get(self.CountedListing)
+            self.assertEqual(len(response.context_data['object_list']), 1)
+        self.assertEqual(response.context_data['paginator'].num_pages, 3)
+
+
+class ContentImportExportTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.media = self.settings(MEDIA_ROOT=Path(media_root.name))
+        self.media.enable()
+        self.addCleanup(self.media.disable)
+
+        export_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(export_dir.cleanup)
+        self.directory = Path(export_dir.name)
+
+        category = Category.objects.create(name='Python')
+        tags = [Tag.objects.create(name=f'tag {i}') for i in range(2)]
+        author = User.objects.create_user('autor')
+        self.posts = []
+        for i in range(5):
+            post = Post.objects.create(
+                title=f'Exportado {i}', excerpt='Resumo', content='Conteúdo',
+                is_published=True, created_by=author, category=category,
+            )
+            post.tags.set(tags[:i % 3])
+            self.posts.append(post)
+        Page.objects.create(title='Sobre', content='Página', is_published=True)
+
+        image = BytesIO()
+        Image.new('RGB', (10, 10)).save(image, 'PNG')
+        self.posts[0].cover = SimpleUploadedFile('capa.png', image.getvalue())
+        self.posts[0].save()
+
+    def call(self, name, *args):
+        call_command(name, str(self.directory), *args, stdout=StringIO())
+
+    def snapshot(self):
+        return [
+            (post.slug, post.created_at, post.category.slug,
+             sorted(tag.slug for tag in post.tags.all()), post.cover.name)
+            for post in Post.objects.order_by('slug').prefetch_related('tags')
+        ]
+
+    def test_round_trip(self):
+        before = self.snapshot()
+        self.call('export_content')
+        self.assertTrue((self.directory / 'media' / self.posts[0].cover.name).exists())
+
+        Post.objects.all().delete()
+        Page.objects.all().delete()
+        Tag.objects.all().delete()
+        Category.objects.all().delete()
+        Job.objects.all().delete()
+
+        self.call('import_content', '--batch-size', '2')
+
+        self.assertEqual(self.snapshot(), before)
+        self.assertEqual(Page.objects.get().slug, 'sobre')
+        self.assertEqual(
+            Category.objects.get().published_posts_count, len(self.posts)
+        )
+        # Resize da capa enfileirado uma vez, sem passar pelo save()
+        self.assertEqual(Job.objects.filter(kind='resize_image').count(), 1)
+
+        # Rodar de novo do zero não duplica nada
+        self.call('import_content', '--restart')
+        self.assertEqual(Post.objects.count(), len(self.posts))
+
+    def test_resume_from_checkpoint(self):
+        self.call('export_content', '--no-media')
+        Post.objects.all().delete()
+
+        # Simula uma importação que parou depois das tags e categorias
+        lines = (self.directory / CONTENT_FILE).read_text().splitlines()
+        taxonomy = sum(
+            json.loads(line)['type'] in ('tag', 'category') for line in lines
+        )
+        (self.directory / CHECKPOINT_FILE).write_text(
+            json.dumps({'line': taxonomy})
+        )
+
+        with mock.patch('blog.content_io.ContentImporter.import_tags') as tags:
+            self.call('import_content')
+        tags.assert_not_called()
+        self.assertEqual(Post.objects.count(), len(self.posts))
+
+
+@override_settings(JOBS_ASYNC=True)
+class RenditionTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.media = self.settings(MEDIA_ROOT=Path(media_root.name))
+        self.media.enable()
+        self.addCleanup(self.media.disable)
+
+    def upload_cover(self, size, **options):
+        image = BytesIO()
+        Image.new('RGB', size, 'blue').save(image, 'JPEG', quality=95, **options)
+        self.original = image.getvalue()
+        return Post.objects.create(
+            title='Com capa', excerpt='e', content='c', is_published=True,
+            cover=SimpleUploadedFile('capa.jpg', self.original),
+        )
+
+    def run_jobs(self):
+        while job := claim_next():
+            run_job(job)
+            self.assertEqual(job.status, Job.Status.DONE, job.last_error)
+
+    def test_renditions_come_from_the_original_upload(self):
+        post = self.upload_cover((2000, 1000))
+        self.run_jobs()
+
+        renditions = ImageRendition.objects.filter(source_name=post.cover.name)
+        self.assertEqual(
+            sorted({rendition.width for rendition in renditions}), [320, 640, 900]
+        )
+        self.assertEqual(
+            {rendition.source_hash for rendition in renditions},
+            {hashlib.sha256(self.original).hexdigest()},
+        )
+        # O arquivo da capa foi trocado pela versão de 900px depois
+        with Image.open(post.cover.path) as cover:
+            self.assertEqual(cover.size, (900, 450))
+
+    def test_renditions_follow_exif_orientation(self):
+        exif = Image.Exif()
+        exif[ExifTags.Base.Orientation] = 6
+        post = self.upload_cover((2000, 1000), exif=exif.tobytes())
+        self.run_jobs()
+
+        jpeg = ImageRendition.objects.get(
+            source_name=post.cover.name, width=900, format='jpg'
+        )
+        self.assertEqual(jpeg.height, 1800)
+        with Image.open(jpeg.file.path) as image:
+            self.assertEqual(image.size, (900, 1800))
+
+    def test_responsive_image_tag(self):
+        post = self.upload_cover((2000, 1000))
+        template = engines['django'].from_string(
+            '{% load blog_images %}{% responsive_image post.cover alt="Capa" %}'
+        )
+
+        # Sem versões ainda: <img> simples com o arquivo enviado
+        html = template.render({'post': post})
+        self.assertHTMLEqual(
+            html,
+            f'<img class="" loading="lazy" src="{post.cover.url}" alt="Capa">',
+        )
+
+        self.run_jobs()
+        html = template.render({'post': post})
+        jpeg = ImageRendition.objects.filter(
+            source_name=post.cover.name, format='jpg'
+        ).order_by('width')
+        self.assertIn(
+            'srcset="' + ', '.join(f'{r.file.url} {r.width}w' for r in jpeg) + '"',
+            html,
+        )
+        if features.check('webp'):
+            self.assertIn('<picture><source type="image/webp"', html)
+
+        self.assertEqual(template.render({'post': Post()}), '')
+
+
+class AssetBundleTests(SimpleTestCase):
+
+    def test_bundle_concatenates_and_minifies(self):
+        with tempfile.TemporaryDirectory() as static_dir:
+            static_dir = Path(static_dir)
+            (static_dir / 'a.css').write_text('/* a */\nbody {\n  color: red;\n}\n')
+            (static_dir / 'b.min.css').write_text('p{margin:0}')
+            (static_dir / 'a.js').write_text('var a = 1\n')
+            (static_dir / 'b.js').write_text('(function () {})()')
+
+            css = build_bundle('x.css', ('a.css', 'b.min.css'), static_dir)
+            js = build_bundle('x.js', ('a.js', 'b.js'), static_dir)
+
+            self.assertEqual(css.read_text(), 'body{color:red}\np{margin:0}\n')
+            self.assertEqual(js.read_text(), 'var a = 1;\n(function () {})()\n')
+
+    def test_missing_bundle_falls_back_to_source_files(self):
+        with mock.patch('blog.assets.is_available', lambda path: 'bundles' not in path):
+            html = static_bundle('site.css')
+
+        self.assertIn('/static/blog/css/remedy.css', html)
+        self.assertIn('/static/blog/css/style.css', html)
+        self.assertNotIn('bundles', html)
+
+        with mock.patch('blog.assets.is_available', lambda path: True):
+            self.assertEqual(
+                static_bundle('code.js'),
+                '<script src="/static/blog/bundles/code.js" defer></script>',
+            )
+
+    def test_vendor_assets_verifies_hashes(self):
+        command = 'blog.management.commands.vendor_assets'
+        files = ('a.min.js', 'mode/b.min.js')
+        hashes = {path: hashlib.sha256(path.encode()).hexdigest() for path in files}
+
+        def urlopen(url, timeout):
+            return BytesIO(url.rsplit('/x/', 1)[1].encode())
+
+        with tempfile.TemporaryDirectory() as static_dir, \
+                mock.patch(f'{command}.BLOG_STATIC', Path(static_dir)), \
+                mock.patch(f'{command}.CODEMIRROR_FILES', files), \
+                mock.patch(f'{command}.CODEMIRROR_URL', 'https://cdn/x/{path}'), \
+                mock.patch(f'{command}.urlopen', urlopen):
+            target = Path(static_dir) / 'blog' / 'vendor' / 'codemirror'
+
+            with mock.patch.dict(f'{command}.CODEMIRROR_SHA256', hashes, clear=True):
+                call_command('vendor_assets', stdout=StringIO())
+                self.assertEqual((target / 'mode/b.min.js').read_text(), 'mode/b.min.js')
+
+                # Arquivo já baixado também é conferido
+                (target / 'a.min.js').write_text('alterado')
+                with self.assertRaisesMessage(CommandError, 'não confere'):
+                    call_command('vendor_assets', stdout=StringIO())
+
+            with mock.patch.dict(
+                f'{command}.CODEMIRROR_SHA256', {**hashes, 'a.min.js': 'x'}, clear=True
+            ), self.assertRaisesMessage(CommandError, 'não confere'):
+                call_command('vendor_assets', '--force', stdout=StringIO())
+
+            with mock.patch.dict(f'{command}.CODEMIRROR_SHA256', {}, clear=True):
+                with self.assertRaisesMessage(CommandError, 'sem SHA-256'):
+                    call_command('vendor_assets', '--force', stdout=StringIO())
+
+                out = StringIO()
+                call_command('vendor_assets', '--print-hashes', stdout=out)
+                self.assertIn(f"'a.min.js': '{hashes['a.min.js']}',", out.getvalue())
+
+
+@override_settings(
+    BLOG_PAGINATION_MODE='offset', ALLOWED_HOSTS=['localhost'], JOBS_ASYNC=False,
+)
+class SnapshotTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        self.root = Path(root.name) / 'snapshot'
+        self.snapshot_settings = self.settings(BLOG_SNAPSHOT_ROOT=self.root)
+        self.snapshot_settings.enable()
+        self.addCleanup(self.snapshot_settings.disable)
+
+        SiteSetup.objects.create(title='Blog', description='Teste')
+        self.author = User.objects.create_user('autor')
+        self.category = Category.objects.create(name='Python')
+        self.tags = [Tag.objects.create(name='django')]
+        # Página 2 no índice e na categoria
+        self.posts = []
+        for i in range(10):
+            post = Post.objects.create(
+                title=f'Estático {i}', excerpt='Resumo', content='Conteúdo',
+                is_published=True, created_by=self.author, category=self.category,
+            )
+            post.tags.set(self.tags)
+            self.posts.append(post)
+
+    def test_export_renders_every_public_url(self):
+        call_command('export_snapshot', '--processes', '1', stdout=StringIO())
+
+        self.assertTrue((self.root / 'index.html').exists())
+        self.assertTrue((self.root / 'page-2.html').exists())
+        self.assertTrue((self.root / 'post' / self.posts[0].slug / 'index.html').exists())
+        self.assertTrue((self.root / 'category' / self.category.slug / 'page-2.html').exists())
+        self.assertTrue((self.root / 'tag' / self.tags[0].slug / 'index.html').exists())
+        self.assertTrue((self.root / 'created_by' / str(self.author.pk) / 'index.html').exists())
+        self.assertFalse((self.root / 'search').exists())
+
+    def test_save_regenerates_only_touched_pages(self):
+        call_command('export_snapshot', '--processes', '1', stdout=StringIO())
+        other = Post.objects.create(title='Sem tags', excerpt='e', content='c')
+        untouched = self.root / 'post' / self.posts[5].slug / 'index.html'
+        untouched_mtime = untouched.stat().st_mtime_ns
+
+        post = self.posts[0]
+        with self.settings(BLOG_SNAPSHOT_ON_SAVE=True):
+            with self.captureOnCommitCallbacks(execute=True):
+                other.is_published = True
+                other.save()
+            with self.captureOnCommitCallbacks(execute=True):
+                post.is_published = False
+                post.save()
+
+        self.assertIn('Sem tags', (self.root / 'index.html').read_text())
+        self.assertTrue((self.root / 'post' / other.slug / 'index.html').exists())
+        self.assertFalse((self.root / 'post' / post.slug / 'index.html').exists())
+        self.assertEqual(untouched.stat().st_mtime_ns, untouched_mtime)
+
+    def test_save_regenerates_only_first_listing_pages(self):
+        call_command('export_snapshot', '--processes', '1', stdout=StringIO())
+        deep = self.root / 'page-2.html'
+        deep_mtime = deep.stat().st_mtime_ns
+
+        post = self.posts[-1]
+        with self.settings(BLOG_SNAPSHOT_ON_SAVE=True, BLOG_SNAPSHOT_LISTING_PAGES=1):
+            with self.captureOnCommitCallbacks(execute=True):
+                post.title = 'Título no topo'
+                post.save()
+
+        self.assertIn('Título no topo', (self.root / 'index.html').read_text())
+        # Fora da janela: fica para o próximo export_snapshot
+        self.assertEqual(deep.stat().st_mtime_ns, deep_mtime)
+
+        with self.settings(BLOG_SNAPSHOT_ON_SAVE=True, BLOG_SNAPSHOT_LISTING_PAGES=1):
+            with self.captureOnCommitCallbacks(execute=True):
+                post.is_published = False
+                post.save()
+
+        # Com 9 posts o índice cabe numa página
+        self.assertFalse(deep.exists())
+
+
+
+class SeedCorpusTests(TestCase):
+
+    def test_seeds_consistent_corpus(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+
+        with self.settings(MEDIA_ROOT=Path(media.name)):
+            call_command(
+                'seed_corpus', '--posts', '30', '--tags', '5', '--categories', '3',
+                '--authors', '2', '--attachments', '2', '--covers', '1',
+                '--pages', '2', '--batch-size', '7', stdout=StringIO(),
+            )
+
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(Page.objects.count(), 2)
+        self.assertEqual(len(list(Path(media.name).rglob('*.jpg'))), 3)
+        self.assertEqual(
+            sum(Category.objects.values_list('published_posts_count', flat=True)),
+            Post.objects.filter(is_published=True).count(),
+        )
+        self.assertEqual(
+            Post.objects.values('slug').distinct().count(), 30
+        )
+
+
+@override_settings(BLOG_PAGINATION_MODE='offset', BLOG_FRAGMENT_CACHE_TIMEOUT=600)
+class FragmentCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        SiteSetup.objects.create(title='Blog', description='Teste')
+        cls.author = User.objects.create_user('autor', first_name='Au')
+        cls.category = Category.objects.create(name='Python')
+        cls.tags = [Tag.objects.create(name='django')]
+        cls.posts = []
+        for i in range(3):
+            post = Post.objects.create(
+                title=f'Fragmento {i}', excerpt='Resumo', content='Conteúdo',
+                is_published=True, created_by=cls.author, category=cls.category,
+            )
+            post.tags.set(cls.tags)
+            cls.posts.append(post)
+        cls.admin = User.objects.create_superuser('admin', password='x')
+
+    def setUp(self):
+        cache.clear()
+        # Logado: sem cache de página, só os fragmentos
+        self.client.force_login(self.admin)
+
+    def test_cards_are_cached_until_post_changes(self):
+        post = self.posts[0]
+        self.client.get(reverse('blog:index'))
+
+        Post.objects.filter(pk=post.pk).update(title='Título sem versão nova')
+        response = self.client.get(reverse('blog:index'))
+        self.assertContains(response, post.title)
+
+        post.refresh_from_db()
+        post.save()
+        response = self.client.get(reverse('blog:index'))
+        self.assertContains(response, 'Título sem versão nova')
+
+    def test_deploy_changes_fragment_keys(self):
+        post = self.posts[0]
+        self.client.get(reverse('blog:index'))
+        Post.objects.filter(pk=post.pk).update(title='Título do build novo')
+
+        with mock.patch('blog.fragments.get_build_version', return_value='novo'):
+            response = self.client.get(reverse('blog:index'))
+        self.assertContains(response, 'Título do build novo')
+
+    def test_post_body_hit_skips_tags_query(self):
+        url = reverse('blog:post', args=(self.posts[0].slug,))
+        get_site_setup()
+        with CaptureQueriesContext(connection) as miss:
+            self.client.get(url)
+        with CaptureQueriesContext(connection) as hit:
+            response = self.client.get(url)
+
+        self.assertEqual(len(hit), len(miss) - 1)
+        self.assertContains(response, self.tags[0].name)
+
+    def test_taxonomy_and_author_changes_invalidate_post_body(self):
+        url = reverse('blog:post', args=(self.posts[0].slug,))
+        self.client.get(url)
+        before = Post.objects.get(pk=self.posts[0].pk)
+
+        tag = self.tags[0]
+        tag.name = 'tag renomeada'
+        tag.save()
+        self.category.name = 'Categoria nova'
+        self.category.save()
+        self.author.first_name = 'Autora'
+        self.author.save()
+
+        response = self.client.get(url)
+        self.assertContains(response, 'tag renomeada')
+        self.assertContains(response, 'Categoria nova')
+        self.assertContains(response, 'Autora')
+
+        self.posts[0].tags.remove(tag)
+        self.assertNotContains(self.client.get(url), 'tag renomeada')
+
+        # A data da última edição do post não muda
+        post = Post.objects.get(pk=self.posts[0].pk)
+        self.assertEqual(post.updated_at, before.updated_at)
+        self.assertGreater(post.fragment_version, before.fragment_version)
+
+
+class RenderingTests(TestCase):
+
+    def test_strips_scripts_and_unsafe_attributes(self):
+        html = render_content(
+            '<p onclick="x()">Oi<script>alert(1)</script></p>'
+            '<a href="javascript:alert(1)" target="_blank">link</a>'
+        )
+
+        self.assertNotIn('script', html)
+        self.assertNotIn('onclick', html)
+        self.assertNotIn('javascript:', html)
+        self.assertIn('rel="noopener noreferrer"', html)
+        self.assertEqual(render_excerpt('<h1>Resumo</h1>'), 'Resumo')
+        self.assertEqual(
+            render_excerpt('Veja <a href="https://x.com" target="_blank">aqui</a> & lá'),
+            'Veja <a href="https://x.com" target="_blank" rel="noopener noreferrer">'
+            'aqui</a> &amp; lá',
+        )
+
+    def test_images_get_lazy_loading_and_srcset(self):
+        renditions = {
+            'image/jpeg': [('/media/r/320.jpg', 320), ('/media/r/900.jpg', 900)],
+            'image/webp': [('/media/r/320.webp', 320)],
+        }
+        html = render_content(
+            '<img src="/media/posts/foto.jpg" alt="Foto">',
+            renditions=lambda name: renditions if name == 'posts/foto.jpg' else {},
+        )
+
+        self.assertIn('loading="lazy"', html)
+        self.assertIn('srcset="/media/r/320.jpg 320w, /media/r/900.jpg 900w"', html)
+        self.assertIn('<picture><source type="image/webp"', html)
+
+    def test_code_blocks_get_codemirror_mode(self):
+        html = render_content(
+            '<pre>def soma(a, b):\n    return a &lt; b</pre>'
+            '<pre class="language-js">x</pre><pre>texto</pre>'
+        )
+
+        self.assertIn('<pre data-language="python">def soma', html)
+        self.assertIn('return a &lt; b', html)
+        self.assertIn('<pre class="language-js" data-language="javascript">', html)
+        self.assertIn('<pre>texto</pre>', html)
+
+    def test_post_page_serves_rendered_html(self):
+        SiteSetup.objects.create(title='Blog', description='Teste')
+        post = Post.objects.create(
+            title='Post', excerpt='Resumo', is_published=True,
+            content='<p>Corpo</p><script>alert(1)</script>',
+        )
+
+        response = self.client.get(reverse('blog:post', args=(post.slug,)))
+
+        self.assertContains(response, '<p>Corpo</p>')
+        self.assertNotContains(response, 'alert(1)')
+        self.assertNotContains(response, 'code.js')
+
+    def test_rerender_command_updates_stale_html(self):
+        post = Post.objects.create(title='Post', excerpt='Resumo', content='<b>x</b>')
+        Post.objects.filter(pk=post.pk).update(content_html='velho')
+        post.refresh_from_db()
+
+        out = StringIO()
+        call_command('rerender_content', processes=1, stdout=out)
+
+        rendered = Post.objects.get(pk=post.pk)
+        self.assertEqual(rendered.content_html, '<b>x</b>')
+        self.assertIn('1 posts', out.getvalue())
+        # Troca a chave dos fragmentos sem marcar o post como editado
+        self.assertEqual(rendered.updated_at, post.updated_at)
+        self.assertEqual(rendered.fragment_version, post.fragment_version + 1)
+
+    def test_rerender_missing_fills_only_empty_html(self):
+        # Como ficam os posts depois da migração 0008
+        empty = Post.objects.create(title='Vazio', excerpt='Resumo', content='<b>x</b>')
+        Post.objects.filter(pk=empty.pk).update(content_html='', excerpt_html='')
+        stale = Post.objects.create(title='Velho', excerpt='Resumo', content='<i>y</i>')
+        Post.objects.filter(pk=stale.pk).update(content_html='velho')
+        Page.objects.create(title='Sem corpo', content='')
+
+        out = StringIO()
+        call_command('rerender_content', '--missing', processes=1, stdout=out)
+
+        empty.refresh_from_db()
+        stale.refresh_from_db()
+        self.assertEqual((empty.content_html, empty.excerpt_html), ('<b>x</b>', 'Resumo'))
+        self.assertEqual(stale.content_html, 'velho')
+        self.assertIn('1 posts e 0 páginas', out.getvalue())
+
+    def test_forked_rerender_closes_pools(self):
+        for i in range(2):
+            Post.objects.create(title=f'Post {i}', excerpt='e', content='c')
+
+        with mock.patch(
+            'blog.management.commands.rerender_content.close_pools'
+        ) as close_pools, mock.patch(
+            'blog.management.commands.rerender_content.multiprocessing.Pool'
+        ) as pool:
+            pool.return_value.__enter__.return_value.imap_unordered.return_value = []
+            call_command(
+                'rerender_content', processes=2, batch_size=1, stdout=StringIO()
+            )
+        close_pools.assert_called_once_with()
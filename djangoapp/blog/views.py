@@ -1,8 +1,12 @@
 from typing import Any
+from urllib.parse import urlencode
+from django.db.models import Subquery
 from django.db.models.query import QuerySet
 from django.shortcuts import render, redirect
-from blog.models import Post, Page, Tag
-from django.db.models import Q
+from blog.models import Category, Post, Page, Tag
+from blog.page_cache import PageCacheMixin
+from blog.pagination import CursorPaginationMixin, KnownCountMixin
+from blog.search import search_queryset
 from django.contrib.auth.models import User
 from django.http import Http404, HttpRequest, HttpResponse
 from django.views.generic import ListView, DetailView
@@ -10,107 +14,165 @@ from django.views.generic import ListView, DetailView
 
 PER_PAGE = 9
 
-class PostListView(ListView):
+class PostListView(PageCacheMixin, CursorPaginationMixin, ListView):
     model = Post
     paginate_by = PER_PAGE
     context_object_name = 'posts'
     template_name = 'blog/pages/index.html'
     ordering = '-pk',
-    queryset = Post.objects.get_published()
+    queryset = Post.objects.get_published().as_card()
+    # Categoria, tag ou autor da listagem. A leitura fica separada para que
+    # as views async (blog/async_views.py) a façam com o ORM async e
+    # reaproveitem o resto (queryset, título, contexto) daqui.
+    filter_object = None
+
+    def get_page_cache_groups(self):
+        return 'index',
+
+    def get_last_modified_queryset(self):
+        return Post.objects.filter(is_published=True)
+
+    def get_filter_object_queryset(self):
+        return None
+
+    def load_filter_object(self):
+        queryset = self.get_filter_object_queryset()
+        if queryset is not None:
+            self.filter_object = queryset.first()
+            if self.filter_object is None:
+                raise Http404
+
+    def filter_posts(self, queryset):
+        return queryset
+
+    def get_queryset(self) -> QuerySet[Any]:
+        return self.filter_posts(super().get_queryset())
+
+    def get_page_title(self):
+        return 'Home - '
+
+    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        self.load_filter_object()
+        return super().get(request, *args, **kwargs)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context.update({
-            'page_title': 'Home - '
+            'page_title': self.get_page_title()
         })
         return context
         
 
 class CreatedByListView(PostListView):
 
-    
-    def get_queryset(self) -> QuerySet[Any]:
-        return super().get_queryset().filter(created_by__pk=self.kwargs.get('author_pk'))
-    
+    def get_page_cache_groups(self):
+        return f'author:{self.kwargs.get("author_pk")}',
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
+    def get_last_modified_queryset(self):
+        return super().get_last_modified_queryset().filter(
+            created_by__pk=self.kwargs.get('author_pk')
+        )
 
-        user = User.objects.filter(pk=self.kwargs.get('author_pk')).first()
-        
-        if user is None:
-            raise Http404
+    def get_filter_object_queryset(self):
+        return User.objects.filter(pk=self.kwargs.get('author_pk'))
+
+    def filter_posts(self, queryset):
+        return queryset.filter(created_by__pk=self.kwargs.get('author_pk'))
 
+    def get_page_title(self):
+        user = self.filter_object
         user_full_name = user.username
 
         if user.first_name:
             user_full_name = f'{user.first_name} {user.last_name}'
 
-        page_title = user_full_name + ' post - '
+        return user_full_name + ' post - '
 
-        context['page_title'] = page_title
 
-        return context
+class CategoryListView(KnownCountMixin, PostListView):
+    allow_empty = False
 
-class CategoryListView(PostListView):
+    def get_page_cache_groups(self):
+        return f'category:{self.kwargs.get("slug")}',
 
-    def get_queryset(self) -> QuerySet[Any]:
-        queryset = super().get_queryset()
-        queryset = queryset.filter(category__slug=self.kwargs.get('slug'))
-       
-        if not queryset:
-            raise Http404
-        
-        self._context_temp = queryset[0].category.name
-        
-        return queryset
+    def get_last_modified_queryset(self):
+        # Pelo category_id (índice parcial blog_post_pub_cat_updated_idx),
+        # sem juntar blog_category a cada post
+        category = Category.objects.filter(
+            slug=self.kwargs.get('slug')
+        ).values('pk')[:1]
+        return super().get_last_modified_queryset().filter(
+            category_id=Subquery(category)
+        )
+
+    def get_filter_object_queryset(self):
+        return Category.objects.filter(slug=self.kwargs.get('slug'))
+
+    def filter_posts(self, queryset):
+        return queryset.filter(category=self.filter_object)
+
+    def get_known_count(self):
+        return self.filter_object.published_posts_count
     
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['page_title'] = 'Categoria - ' + self._context_temp
-        return context
+    def get_page_title(self):
+        return 'Categoria - ' + self.filter_object.name
 
 
-class TagListView(PostListView):
+class TagListView(KnownCountMixin, PostListView):
     allow_empty = False
 
-    def get_queryset(self) -> QuerySet[Any]:
-        return super().get_queryset().filter(tags__slug=self.kwargs.get('slug'))
-    
+    def get_page_cache_groups(self):
+        return f'tag:{self.kwargs.get("slug")}',
+
+    def get_last_modified_queryset(self):
+        # Pelas linhas de blog_post_tags da tag (índice de tag_id), sem
+        # juntar blog_tag
+        tag = Tag.objects.filter(slug=self.kwargs.get('slug')).values('pk')[:1]
+        return super().get_last_modified_queryset().filter(
+            pk__in=Post.tags.through.objects.filter(
+                tag_id=Subquery(tag)
+            ).values('post_id')
+        )
+
+    def get_filter_object_queryset(self):
+        return Tag.objects.filter(slug=self.kwargs.get('slug'))
+
+    def filter_posts(self, queryset):
+        return queryset.filter(tags=self.filter_object)
+
+    def get_known_count(self):
+        return self.filter_object.published_posts_count
     
-    def get_context_data(self, **kwargs):
-        tag = Tag.objects.filter(slug=self.kwargs.get('slug')).first()
-        context = super().get_context_data(**kwargs)
-        page_title = 'Tag - ' + tag.name
-        print(page_title)
-        context['page_title'] = page_title
-        return context
+    def get_page_title(self):
+        return 'Tag - ' + self.filter_object.name
     
 
 class SearchListView(PostListView):
+    cursor_pagination = True
+    page_cache = False
 
     def __init__(self, **kwargs: Any) -> None:
         super().__init__(**kwargs)
         self._search_value = ''
 
     def setup(self, request: HttpRequest, *args: Any, **kwargs: Any) -> None:
-        self._search_value = request.GET.get('search').strip()
+        self._search_value = request.GET.get('search', '').strip()
         return super().setup(request, *args, **kwargs)
     
     def get_queryset(self) -> QuerySet[Any]:
         term = self._search_value
-        return super().get_queryset().filter(
-        Q(title__icontains=term) |
-        Q(excerpt__icontains=term) |
-        Q(content__icontains=term) 
-        )[:PER_PAGE]
+        return search_queryset(super().get_queryset(), term)
     
     def get_context_data(self, **kwargs):
         page_title = f'{self._search_value} search - '
         context = super().get_context_data(**kwargs)
+        paginator = context['paginator']
         context.update({
             'page_title': page_title[:30],
-            'term': self._search_value
+            'term': self._search_value,
+            'search_url': '&' + urlencode({'search': self._search_value}),
+            'result_count': paginator.count,
+            'result_count_is_bounded': paginator.count_is_bounded,
         })
         return context
     
@@ -120,16 +182,19 @@ class SearchListView(PostListView):
         return super().get(request, *args, **kwargs)
     
 
-class PageDetailView(DetailView):
+class PageDetailView(PageCacheMixin, DetailView):
     context_object_name = 'page'
     model = Page
     slug_field = 'slug'
     allow_empty = False
     template_name = 'blog/pages/pages.html'
 
+    def get_page_cache_groups(self):
+        return f'page:{self.kwargs.get("slug")}',
+
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
-        page = self.get_object()
+        page = self.object
         page_title =  'Página - ' + page.title
         context.update({
             'page_title': page_title
@@ -140,16 +205,24 @@ class PageDetailView(DetailView):
         return super().get_queryset().filter(is_published=True)
 
     
-class PostDetailView(DetailView):
+class PostDetailView(PageCacheMixin, DetailView):
     context_object_name = 'post'
     model = Post
     slug_field = 'slug'
     allow_empty = False
     template_name = 'blog/pages/post.html'
 
+    def get_page_cache_groups(self):
+        return f'post:{self.kwargs.get("slug")}',
+
+    def get_last_modified_queryset(self):
+        return Post.objects.filter(
+            is_published=True, slug=self.kwargs.get('slug')
+        )
+
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
-        post = self.get_object()
+        post = self.object
         post_title =  'Post - ' + post.title
         context.update({
             'page_title': post_title
@@ -157,7 +230,7 @@ class PostDetailView(DetailView):
         return context
     
     def get_queryset(self) -> QuerySet[Any]:
-        return super().get_queryset().filter(is_published=True)
+        return super().get_queryset().filter(is_published=True).as_detail()
 
 
 
@@ -0,0 +1,24 @@
+from django.contrib import admin
+
+from jobs import queue
+from jobs.models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = 'id', 'kind', 'status', 'attempts', 'run_after', 'updated_at',
+    list_display_links = 'id', 'kind',
+    list_filter = 'status', 'kind',
+    search_fields = 'id', 'kind', 'last_error',
+    list_per_page = 50
+    ordering = '-id',
+    readonly_fields = (
+        'kind', 'payload', 'status', 'attempts', 'last_error',
+        'created_at', 'updated_at', 'finished_at',
+    )
+    actions = 'retry_jobs',
+
+    @admin.action(description='Reenfileirar jobs selecionados')
+    def retry_jobs(self, request, queryset):
+        total = queue.retry(queryset)
+        self.message_user(request, f'{total} job(s) reenfileirado(s)')
@@ -0,0 +1,12 @@
+from jobs.registry import get_handler, register
+from utils.images import resize_image_file
+
+
+@register('resize_image')
+def resize_image(name, new_width, optimize=True, quality=60, renditions=False):
+    # As versões responsivas saem do arquivo enviado, então são geradas
+    # antes de o resize trocá-lo por uma cópia menor e recomprimida.
+    if renditions:
+        get_handler('generate_renditions')(name=name)
+
+    resize_image_file(name, new_width, optimize=optimize, quality=quality)
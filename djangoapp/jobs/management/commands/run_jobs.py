@@ -0,0 +1,76 @@
+import logging
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections
+
+from jobs.queue import claim_next, requeue_stale, run_job
+from project.db_routers import use_primary
+
+logger = logging.getLogger(__name__)
+# Espera máxima (segundos) entre tentativas com o banco fora do ar
+MAX_ERROR_BACKOFF = 60
+
+
+class Command(BaseCommand):
+    help = 'Worker que processa a fila de jobs do banco'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Processa o que estiver pendente e sai',
+        )
+        parser.add_argument('--poll-interval', type=float, default=2.0)
+
+    def handle(self, *args, **options):
+        # Os handlers leem o que acabou de ser gravado; réplica atrasada
+        # faria o job não achar o objeto.
+        with use_primary():
+            self.work(options)
+
+    def work(self, options):
+        self._running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        requeued = requeue_stale()
+        if requeued:
+            self.stdout.write(f'{requeued} job(s) órfão(s) reenfileirado(s)')
+
+        errors = 0
+        while self._running:
+            # Fora de um request ninguém fecha conexões quebradas ou
+            # vencidas (CONN_MAX_AGE, CONN_HEALTH_CHECKS) por nós
+            close_old_connections()
+
+            try:
+                job = claim_next()
+
+                if job is None:
+                    if options['burst']:
+                        break
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                started = time.monotonic()
+                run_job(job)
+            except DatabaseError:
+                # Um job pego e não salvo fica "executando" até o
+                # requeue_stale do próximo worker
+                errors += 1
+                delay = min(options['poll_interval'] * 2 ** errors, MAX_ERROR_BACKOFF)
+                logger.exception(
+                    'Erro de banco no worker, nova tentativa em %.0fs', delay
+                )
+                time.sleep(delay)
+                continue
+
+            errors = 0
+            self.stdout.write(
+                f'{job} em {time.monotonic() - started:.2f}s'
+            )
+
+    def stop(self, signum, frame):
+        # Termina o job atual antes de sair
+        self._running = False
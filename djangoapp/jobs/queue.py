@@ -0,0 +1,96 @@
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.registry import get_handler
+
+
+def enqueue(kind, **payload):
+    # Sem fila (JOBS_ASYNC=0) o job roda logo após o commit, no próprio
+    # processo, como era antes.
+    if not getattr(settings, 'JOBS_ASYNC', True):
+        transaction.on_commit(lambda: get_handler(kind)(**payload))
+        return None
+
+    # O job é gravado na mesma transação de quem o criou: se o save der
+    # rollback, o job some junto.
+    return Job.objects.create(kind=kind, payload=payload)
+
+
+def enqueue_many(kind, payloads, batch_size=1000):
+    # Para importações: um INSERT por lote em vez de um por job
+    payloads = list(payloads)
+
+    if not getattr(settings, 'JOBS_ASYNC', True):
+        handler = get_handler(kind)
+        for payload in payloads:
+            transaction.on_commit(lambda payload=payload: handler(**payload))
+        return []
+
+    return Job.objects.bulk_create(
+        [Job(kind=kind, payload=payload) for payload in payloads],
+        batch_size=batch_size,
+    )
+
+
+def claim_next():
+    with transaction.atomic():
+        job = Job.objects.select_for_update(skip_locked=True).filter(
+            status=Job.Status.PENDING, run_after__lte=timezone.now()
+        ).order_by('run_after', 'pk').first()
+
+        if job is None:
+            return None
+
+        job.status = Job.Status.RUNNING
+        job.attempts += 1
+        job.save(update_fields=('status', 'attempts', 'updated_at'))
+        return job
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=30 * 2 ** (attempts - 1))
+
+
+def run_job(job):
+    try:
+        get_handler(job.kind)(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = Job.Status.PENDING
+            job.run_after = timezone.now() + retry_delay(job.attempts)
+        else:
+            job.status = Job.Status.FAILED
+            job.finished_at = timezone.now()
+    else:
+        job.status = Job.Status.DONE
+        job.last_error = ''
+        job.finished_at = timezone.now()
+
+    job.save(update_fields=(
+        'status', 'last_error', 'run_after', 'finished_at', 'updated_at'
+    ))
+    return job
+
+
+def requeue_stale(timeout=None):
+    # Jobs "executando" há muito tempo ficaram órfãos de um worker que morreu
+    if timeout is None:
+        timeout = getattr(settings, 'JOBS_RUNNING_TIMEOUT', 600)
+
+    return Job.objects.filter(
+        status=Job.Status.RUNNING,
+        updated_at__lt=timezone.now() - timedelta(seconds=timeout),
+    ).update(status=Job.Status.PENDING, run_after=timezone.now())
+
+
+def retry(queryset):
+    return queryset.exclude(status=Job.Status.RUNNING).update(
+        status=Job.Status.PENDING, attempts=0, run_after=timezone.now(),
+        finished_at=None,
+    )
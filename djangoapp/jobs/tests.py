@@ -0,0 +1,164 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from jobs import queue, registry
+from jobs.models import Job
+
+
+class QueueTests(TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.failures = 0
+
+        def handler(**payload):
+            self.calls.append(payload)
+            if self.failures:
+                self.failures -= 1
+                raise RuntimeError('falhou')
+
+        registry.register('teste')(handler)
+        self.addCleanup(registry._handlers.pop, 'teste')
+
+    def test_claim_next_takes_oldest_due_job(self):
+        now = timezone.now()
+        later = Job.objects.create(kind='teste', run_after=now + timedelta(hours=1))
+        second = Job.objects.create(kind='teste', run_after=now - timedelta(minutes=1))
+        first = Job.objects.create(kind='teste', run_after=now - timedelta(minutes=2))
+        Job.objects.create(
+            kind='teste', status=Job.Status.FAILED, run_after=now - timedelta(days=1)
+        )
+
+        claimed = queue.claim_next()
+        self.assertEqual(claimed, first)
+        self.assertEqual((claimed.status, claimed.attempts), (Job.Status.RUNNING, 1))
+        first.refresh_from_db()
+        self.assertEqual(first.status, Job.Status.RUNNING)
+
+        self.assertEqual(queue.claim_next(), second)
+        self.assertIsNone(queue.claim_next())
+        later.refresh_from_db()
+        self.assertEqual(later.status, Job.Status.PENDING)
+
+    def test_run_job_success(self):
+        Job.objects.create(kind='teste', payload={'name': 'capa.jpg'})
+        job = queue.run_job(queue.claim_next())
+
+        self.assertEqual(self.calls, [{'name': 'capa.jpg'}])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.Status.DONE)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_run_job_retries_with_backoff_then_fails(self):
+        self.failures = 3
+        job = Job.objects.create(kind='teste', max_attempts=3)
+
+        for attempts, delay in ((1, 30), (2, 60)):
+            now = timezone.now()
+            with mock.patch('jobs.queue.timezone.now', return_value=now):
+                queue.run_job(queue.claim_next())
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.Status.PENDING)
+            self.assertEqual(job.attempts, attempts)
+            self.assertIn('RuntimeError: falhou', job.last_error)
+            self.assertEqual(job.run_after, now + timedelta(seconds=delay))
+
+            # Ainda não venceu o backoff
+            self.assertIsNone(queue.claim_next())
+            Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+
+        job = queue.run_job(queue.claim_next())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.Status.FAILED, 3))
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(len(self.calls), 3)
+
+    def test_retry_delay_doubles(self):
+        self.assertEqual(
+            [queue.retry_delay(n).total_seconds() for n in (1, 2, 3, 4)],
+            [30, 60, 120, 240],
+        )
+
+    def test_requeue_stale_running_jobs(self):
+        stale = Job.objects.create(kind='teste', status=Job.Status.RUNNING)
+        fresh = Job.objects.create(kind='teste', status=Job.Status.RUNNING)
+        Job.objects.filter(pk=stale.pk).update(
+            updated_at=timezone.now() - timedelta(minutes=20)
+        )
+
+        self.assertEqual(queue.requeue_stale(timeout=600), 1)
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual(stale.status, Job.Status.PENDING)
+        self.assertEqual(fresh.status, Job.Status.RUNNING)
+
+    def test_worker_burst_runs_pending_jobs(self):
+        queue.enqueue('teste', name='a')
+        queue.enqueue('teste', name='b')
+
+        # Sem trocar os handlers de sinal do processo de teste
+        with mock.patch('jobs.management.commands.run_jobs.signal.signal'):
+            call_command('run_jobs', '--burst', stdout=StringIO())
+
+        self.assertEqual(self.calls, [{'name': 'a'}, {'name': 'b'}])
+        self.assertFalse(Job.objects.exclude(status=Job.Status.DONE).exists())
+
+    def test_worker_survives_database_errors(self):
+        queue.enqueue('teste', name='a')
+        errors = [OperationalError('conexão perdida')] * 2
+
+        def claim_next():
+            if errors:
+                raise errors.pop()
+            return queue.claim_next()
+
+        command = 'jobs.management.commands.run_jobs'
+        with mock.patch(f'{command}.signal.signal'), \
+                mock.patch(f'{command}.time.sleep') as sleep, \
+                mock.patch(f'{command}.close_old_connections') as close, \
+                mock.patch(f'{command}.claim_next', claim_next), \
+                self.assertLogs('jobs', 'ERROR'):
+            call_command('run_jobs', '--burst', stdout=StringIO())
+
+        self.assertEqual(self.calls, [{'name': 'a'}])
+        # Backoff a partir do --poll-interval (2s)
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [4, 8])
+        self.assertEqual(close.call_count, 4)
+
+    @override_settings(JOBS_ASYNC=False)
+    def test_sync_mode_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertIsNone(queue.enqueue('teste', name='a'))
+            self.assertEqual(self.calls, [])
+
+        self.assertEqual(self.calls, [{'name': 'a'}])
+        self.assertFalse(Job.objects.exists())
+
+    def test_admin_retry_action(self):
+        failed = Job.objects.create(
+            kind='teste', status=Job.Status.FAILED, attempts=5,
+            finished_at=timezone.now(),
+        )
+        running = Job.objects.create(kind='teste', status=Job.Status.RUNNING, attempts=1)
+        self.client.force_login(User.objects.create_superuser('admin', password='x'))
+
+        response = self.client.post(
+            reverse('admin:jobs_job_changelist'),
+            {'action': 'retry_jobs', '_selected_action': [failed.pk, running.pk]},
+            follow=True,
+        )
+        self.assertContains(response, '1 job(s) reenfileirado(s)')
+
+        failed.refresh_from_db()
+        running.refresh_from_db()
+        self.assertEqual((failed.status, failed.attempts), (Job.Status.PENDING, 0))
+        self.assertIsNone(failed.finished_at)
+        self.assertEqual(running.status, Job.Status.RUNNING)
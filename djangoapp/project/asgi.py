@@ -8,9 +8,14 @@ https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 """
 
 import os
-
+from dotenv import load_dotenv
+from pathlib import Path
 from django.core.asgi import get_asgi_application
 
+#dotenv
+BASE_DIR = Path(__file__).resolve().parent.parent
+load_dotenv(BASE_DIR.parent / 'dotenv_files' / '.env', override=True)
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
 
 application = get_asgi_application()
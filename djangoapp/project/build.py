@@ -0,0 +1,56 @@
+"""
+Versão do build em execução.
+
+Entra no ETag das páginas (blog/page_cache.py) e na chave dos fragmentos
+(blog/fragments.py): HTML cacheado antes de um deploy pode apontar para
+estáticos com hash que não existem mais, ou ter sido gerado por templates
+e templatetags antigos. Com a versão na chave, um deploy simplesmente
+deixa de ler esse HTML.
+
+A versão vem de BUILD_VERSION (ex.: o commit, passado no build da
+imagem) ou, sem ela, do hash do código, dos templates e dos estáticos do
+projeto, calculado uma vez por processo.
+"""
+import time
+from functools import lru_cache
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import cache
+
+BUILD_KEY = 'project:build:{version}'
+# Arquivos que mudam o HTML gerado
+SOURCE_SUFFIXES = {'.py', '.html', '.css', '.js'}
+
+
+@lru_cache(maxsize=None)
+def get_build_version():
+    version = getattr(settings, 'BUILD_VERSION', '')
+    if version:
+        return version
+
+    digest = md5()
+    for path in sorted(settings.BASE_DIR.rglob('*')):
+        if path.suffix not in SOURCE_SUFFIXES or '__pycache__' in path.parts:
+            continue
+        digest.update(str(path.relative_to(settings.BASE_DIR)).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:12]
+
+
+@lru_cache(maxsize=None)
+def get_build_stamp():
+    """
+    "<versão>:<timestamp>", com o momento em que algum processo viu essa
+    versão pela primeira vez (o deploy), no mesmo formato das versões de
+    grupo do cache de páginas. Não muda com o processo rodando.
+    """
+    version = get_build_version()
+    key = BUILD_KEY.format(version=version)
+    deployed_at = cache.get(key)
+
+    if deployed_at is None:
+        cache.add(key, time.time(), None)
+        deployed_at = cache.get(key) or time.time()
+
+    return f'{version}:{deployed_at:.3f}'
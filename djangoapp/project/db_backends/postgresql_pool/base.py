@@ -0,0 +1,176 @@
+"""
+Backend PostgreSQL com pool de conexões dentro do processo.
+
+O Django 4.2 só sabe abrir e fechar conexões. Aqui o "abrir" pega uma
+conexão de um pool e o "fechar" devolve para o pool, então com
+CONN_MAX_AGE = 0 cada request devolve a conexão ao terminar sem pagar o
+handshake de novo no próximo. Há um pool por alias e parâmetros de
+conexão: trocar o NAME (banco de teste, override_settings) abre outro.
+
+Configuração em DATABASES[alias]['POOL']:
+    MIN_SIZE: conexões abertas já no primeiro uso
+    MAX_SIZE: teto de conexões do processo (workers x MAX_SIZE <= max_connections)
+    TIMEOUT: segundos esperando uma conexão livre antes de dar erro
+    CHECK_AFTER: conexões paradas há mais que isso fazem um SELECT 1 antes de voltar
+"""
+import json
+import threading
+import time
+
+import psycopg2
+import psycopg2.extras
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+from django.core.exceptions import ImproperlyConfigured
+from psycopg2 import pool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class BoundedConnectionPool(pool.ThreadedConnectionPool):
+    """
+    ThreadedConnectionPool que espera até `timeout` por uma conexão livre
+    em vez de levantar PoolError assim que o pool enche.
+    """
+
+    def __init__(self, minconn, maxconn, timeout, check_after, *args, **kwargs):
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._timeout = timeout
+        self._check_after = check_after
+        self._returned_at = {}
+        super().__init__(minconn, maxconn, *args, **kwargs)
+        # O psycopg2 só guarda minconn conexões paradas e fecha as outras
+        # no putconn; o teto já é o maxconn, então guarda até ele
+        self.minconn = maxconn
+
+    def _connect(self, key=None):
+        # Conexão recém-aberta conta como devolvida agora: não precisa do
+        # SELECT 1 no primeiro getconn
+        connection = super()._connect(key)
+        self._returned_at[id(connection)] = time.monotonic()
+        return connection
+
+    def _is_alive(self, connection):
+        if connection.closed:
+            return False
+
+        idle = time.monotonic() - self._returned_at.get(id(connection), 0)
+        if idle < self._check_after:
+            return True
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            connection.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def getconn(self, key=None):
+        if not self._slots.acquire(timeout=self._timeout):
+            raise pool.PoolError(
+                f'Nenhuma conexão livre no pool após {self._timeout}s'
+            )
+
+        try:
+            connection = super().getconn(key)
+            while not self._is_alive(connection):
+                self._returned_at.pop(id(connection), None)
+                super().putconn(connection, close=True)
+                connection = super().getconn(key)
+        except BaseException:
+            self._slots.release()
+            raise
+
+        self._returned_at.pop(id(connection), None)
+        return connection
+
+    def putconn(self, conn, key=None, close=False):
+        try:
+            super().putconn(conn, key, close or bool(conn.closed))
+            # O id de uma conexão fechada pode ser reusado por outra
+            if conn.closed:
+                self._returned_at.pop(id(conn), None)
+            else:
+                self._returned_at[id(conn)] = time.monotonic()
+        finally:
+            self._slots.release()
+
+
+def close_pools():
+    """
+    Fecha todas as conexões dos pools do processo. Chame antes de um
+    fork (multiprocessing): connections.close_all() só devolve as conexões
+    ao pool, e o filho herdaria os mesmos sockets do pai.
+    """
+    with _pools_lock:
+        for connection_pool in _pools.values():
+            connection_pool.closeall()
+        _pools.clear()
+
+
+def pool_key(alias, conn_params):
+    # Os parâmetros podem ter valores sem hash (dict/list vindos do OPTIONS)
+    return alias, json.dumps(conn_params, sort_keys=True, default=str)
+
+
+def get_pool(alias, settings_dict, conn_params):
+    key = pool_key(alias, conn_params)
+    connection_pool = _pools.get(key)
+    if connection_pool is not None:
+        return connection_pool
+
+    with _pools_lock:
+        if key not in _pools:
+            options = settings_dict.get('POOL', {})
+            _pools[key] = BoundedConnectionPool(
+                options.get('MIN_SIZE', 1),
+                options.get('MAX_SIZE', 4),
+                options.get('TIMEOUT', 10),
+                options.get('CHECK_AFTER', 30),
+                **conn_params,
+            )
+        return _pools[key]
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        options = self.settings_dict['OPTIONS']
+        isolation_level_value = options.get('isolation_level')
+
+        try:
+            self.isolation_level = IsolationLevel(
+                isolation_level_value or IsolationLevel.READ_COMMITTED
+            )
+        except ValueError:
+            raise ImproperlyConfigured(
+                f'Invalid transaction isolation level {isolation_level_value} '
+                f'specified. Use one of the psycopg.IsolationLevel values.'
+            )
+
+        self.connection_pool = get_pool(
+            self.alias, self.settings_dict, conn_params
+        )
+        connection = self.connection_pool.getconn()
+
+        if isolation_level_value is not None:
+            connection.isolation_level = self.isolation_level
+
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                # Depois de um close_pools() o pool já fechou a conexão
+                connection_pool = getattr(self, 'connection_pool', None)
+                if connection_pool is None or connection_pool.closed:
+                    return self.connection.close()
+                # Conexão que deu erro não volta para o pool
+                return connection_pool.putconn(
+                    self.connection, close=self.errors_occurred
+                )
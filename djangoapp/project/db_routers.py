@@ -0,0 +1,126 @@
+"""
+Leituras nas réplicas, escritas no primário.
+
+As réplicas vêm de DB_REPLICA_HOSTS (veja settings.py) e viram os aliases
+replica_0, replica_1... Toda escrita vai para o "default". Requests do
+admin, requests que não são GET/HEAD e quem acabou de escrever (cookie
+PRIMARY_COOKIE) também leem do primário, para que o autor veja a própria
+edição mesmo com as réplicas atrasadas.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+PRIMARY = 'default'
+PRIMARY_COOKIE = 'db_primary'
+# Apps cujas leituras sempre vão para o primário (a fila de jobs é lida e
+# escrita o tempo todo e não tolera atraso)
+PRIMARY_APPS = {'jobs'}
+REPLICA_PREFIX = 'replica_'
+
+# None fora de um request; dentro, {'pinned': bool, 'wrote': bool}
+_state = ContextVar('db_routing_state', default=None)
+
+
+def get_replicas():
+    return [
+        alias for alias in settings.DATABASES
+        if alias.startswith(REPLICA_PREFIX)
+    ]
+
+
+@contextmanager
+def use_primary():
+    """Força as leituras do bloco a irem para o primário."""
+    token = _state.set({'pinned': True, 'wrote': False})
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+def pin_primary():
+    """Faz o resto do request atual (template incluído) ler do primário."""
+    state = _state.get()
+    if state is not None:
+        state['pinned'] = True
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        replicas = get_replicas()
+
+        if not replicas or (state is not None and state['pinned']):
+            return PRIMARY
+
+        if model._meta.app_label in PRIMARY_APPS:
+            return PRIMARY
+
+        # Dentro de uma transação no primário a leitura tem que ver o que
+        # acabou de ser escrito (e select_for_update só existe lá).
+        if connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db == PRIMARY:
+            return PRIMARY
+
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            # Depois da primeira escrita o resto do request lê do primário
+            state['pinned'] = state['wrote'] = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Réplicas têm os mesmos dados do primário
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class PrimaryPinMiddleware:
+    """
+    Decide para onde vão as leituras do request. Fica antes do
+    SessionMiddleware para que a sessão e o usuário já sigam a regra.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.admin_prefix = '/admin/'
+        self.max_age = int(getattr(settings, 'DB_REPLICA_STICKY_SECONDS', 10))
+
+    def must_pin(self, request):
+        return (
+            request.method not in ('GET', 'HEAD')
+            or request.path.startswith(self.admin_prefix)
+            or PRIMARY_COOKIE in request.COOKIES
+        )
+
+    def __call__(self, request):
+        # Requests feitos dentro de um use_primary() (snapshot, jobs) seguem
+        # o bloco de fora
+        outer = _state.get()
+        pinned = self.must_pin(request) or (outer is not None and outer['pinned'])
+        token = _state.set({'pinned': pinned, 'wrote': False})
+        try:
+            response = self.get_response(request)
+            wrote = _state.get()['wrote']
+        finally:
+            _state.reset(token)
+
+        if wrote and self.max_age > 0:
+            response.set_cookie(
+                PRIMARY_COOKIE, '1', max_age=self.max_age, httponly=True,
+                samesite='Lax',
+            )
+
+        return response
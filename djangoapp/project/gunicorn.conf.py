@@ -0,0 +1,54 @@
+"""
+Configuração do gunicorn para produção (scripts/commands.sh com
+SERVER_MODE=prod). Tudo pode ser ajustado por variável de ambiente.
+
+Reload gracioso: mande SIGHUP para o processo master; os workers novos
+sobem com o código novo e os antigos terminam os requests em andamento.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+# wsgi usa workers com threads; asgi usa o worker do uvicorn
+SERVER_PROTOCOL = os.getenv('SERVER_PROTOCOL', 'wsgi')
+
+if SERVER_PROTOCOL == 'asgi':
+    wsgi_app = 'project.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'project.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+# Cada worker abre até GUNICORN_THREADS (ou DB_POOL_MAX_SIZE, com o pool
+# ligado) conexões com o Postgres: workers x esse número <= max_connections.
+workers = int(os.getenv(
+    'WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1
+))
+
+# Recicla workers aos poucos para conter vazamento de memória sem que
+# todos reiniciem ao mesmo tempo
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+# GUNICORN_ACCESSLOG vazio desliga o log de acesso
+accesslog = os.getenv('GUNICORN_ACCESSLOG', '-') or None
+errorlog = '-'
+
+
+def post_worker_init(worker):
+    # Roda depois de carregar o Django e antes do worker aceitar requests:
+    # o primeiro visitante não paga o parse dos templates. O tempo vai para
+    # o log e para o /metrics (blog_template_parse_seconds).
+    from project.templates_warmup import warm_templates
+
+    timings = warm_templates()
+    worker.log.info(
+        'Worker %s: %d templates compilados em %.1f ms',
+        worker.pid, len(timings), sum(timings.values()) * 1000,
+    )
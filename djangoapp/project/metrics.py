@@ -0,0 +1,320 @@
+"""
+Métricas por request, agrupadas pelo nome da view (blog:index, blog:post...).
+
+O MetricsMiddleware mede o tempo total, as queries (quantidade e tempo, via
+execute_wrapper em todas as conexões, réplicas incluídas), a renderização
+do TemplateResponse e os hits/misses de cache que o código marcar com
+record_cache(). Os números saem:
+
+    - em /metrics, no formato texto do Prometheus (com METRICS_TOKEN,
+      obrigatório em produção);
+    - no header Server-Timing (METRICS_SERVER_TIMING=1), que o DevTools
+      do navegador mostra na aba Network;
+    - no log "project.metrics", com o SQL capturado, quando o request
+      passa de METRICS_SLOW_REQUEST_MS.
+
+Os contadores ficam na memória de cada processo. Com vários workers do
+gunicorn cada scrape vê só o worker que respondeu; o label "worker" (pid)
+separa as séries, então some com sum(rate(...)) no Prometheus.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+logger = logging.getLogger(__name__)
+
+# Limites dos buckets do histograma de duração (segundos)
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Queries guardadas por request para o log de requests lentos
+MAX_CAPTURED_QUERIES = 50
+MAX_LOGGED_SQL = 1000
+UNRESOLVED_VIEW = '<unresolved>'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# RequestStats do request em andamento (None fora de um request)
+_current = ContextVar('metrics_request_stats', default=None)
+
+
+class RequestStats:
+    __slots__ = (
+        'duration', 'queries', 'db_seconds', 'template_seconds',
+        'cache_hits', 'cache_misses', 'captured',
+    )
+
+    def __init__(self):
+        self.duration = 0.0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.captured = []
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.queries += 1
+            self.db_seconds += elapsed
+            # Só guarda a referência; o SQL só é formatado se for para o log
+            if len(self.captured) < MAX_CAPTURED_QUERIES:
+                self.captured.append((elapsed, sql, params))
+
+    def server_timing(self):
+        parts = [
+            f'total;dur={self.duration * 1000:.1f}',
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.queries} queries"',
+            f'template;dur={self.template_seconds * 1000:.1f}',
+        ]
+        if self.cache_hits or self.cache_misses:
+            parts.append(
+                f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"'
+            )
+        return ', '.join(parts)
+
+
+def record_cache(hit):
+    """Marca um hit (True) ou miss (False) de cache no request atual."""
+    stats = _current.get()
+    if stats is None:
+        return
+    if hit:
+        stats.cache_hits += 1
+    else:
+        stats.cache_misses += 1
+
+
+class ViewMetrics:
+    __slots__ = (
+        'requests', 'duration_sum', 'buckets', 'queries', 'db_seconds',
+        'template_seconds', 'cache_hits', 'cache_misses',
+    )
+
+    def __init__(self):
+        self.requests = 0
+        self.duration_sum = 0.0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+def escape_label(value):
+    return (
+        str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+    )
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+        # nome -> (help, {labels: valor}); medidas pontuais, como o boot
+        self.gauges = {}
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+            self.gauges = {}
+
+    def set_gauge(self, name, help_text, value, **labels):
+        with self.lock:
+            _, values = self.gauges.setdefault(name, (help_text, {}))
+            values[tuple(sorted(labels.items()))] = value
+
+    def observe(self, view, stats):
+        with self.lock:
+            metrics = self.views.get(view)
+            if metrics is None:
+                metrics = self.views[view] = ViewMetrics()
+
+            metrics.requests += 1
+            metrics.duration_sum += stats.duration
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if stats.duration <= bound:
+                    metrics.buckets[index] += 1
+            metrics.queries += stats.queries
+            metrics.db_seconds += stats.db_seconds
+            metrics.template_seconds += stats.template_seconds
+            metrics.cache_hits += stats.cache_hits
+            metrics.cache_misses += stats.cache_misses
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                view: {name: getattr(metrics, name) for name in ViewMetrics.__slots__}
+                for view, metrics in self.views.items()
+            }
+
+    def render(self):
+        views = sorted(self.snapshot().items())
+        with self.lock:
+            gauges = sorted(
+                (name, help_text, sorted(values.items()))
+                for name, (help_text, values) in self.gauges.items()
+            )
+        worker = os.getpid()
+        lines = []
+
+        def metric(name, kind, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        def format_labels(pairs):
+            return ','.join(
+                f'{key}="{escape_label(value)}"' for key, value in pairs.items()
+            )
+
+        def labels(view, **extra):
+            return format_labels({'view': view, 'worker': worker, **extra})
+
+        metric(
+            'blog_request_duration_seconds', 'histogram',
+            'Tempo total do request por view.',
+        )
+        for view, values in views:
+            for bound, count in zip(DURATION_BUCKETS, values['buckets']):
+                lines.append(
+                    f'blog_request_duration_seconds_bucket'
+                    f'{{{labels(view, le=bound)}}} {count}'
+                )
+            lines.append(
+                f'blog_request_duration_seconds_bucket'
+                f'{{{labels(view, le="+Inf")}}} {values["requests"]}'
+            )
+            lines.append(
+                f'blog_request_duration_seconds_sum{{{labels(view)}}} '
+                f'{values["duration_sum"]}'
+            )
+            lines.append(
+                f'blog_request_duration_seconds_count{{{labels(view)}}} '
+                f'{values["requests"]}'
+            )
+
+        counters = (
+            ('blog_request_db_queries_total', 'queries', 'Queries executadas.'),
+            ('blog_request_db_seconds_total', 'db_seconds', 'Tempo gasto no banco.'),
+            (
+                'blog_request_template_seconds_total', 'template_seconds',
+                'Tempo renderizando templates.',
+            ),
+            ('blog_cache_hits_total', 'cache_hits', 'Hits do cache de páginas.'),
+            ('blog_cache_misses_total', 'cache_misses', 'Misses do cache de páginas.'),
+        )
+        for name, field, help_text in counters:
+            metric(name, 'counter', help_text)
+            for view, values in views:
+                lines.append(f'{name}{{{labels(view)}}} {values[field]}')
+
+        for name, help_text, values in gauges:
+            metric(name, 'gauge', help_text)
+            for label_items, value in values:
+                pairs = format_labels({'worker': worker, **dict(label_items)})
+                lines.append(f'{name}{{{pairs}}} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def get_view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match is not None else UNRESOLVED_VIEW
+
+
+def format_sql(sql, params):
+    text = f'{sql} -- {params!r}' if params else sql
+    if len(text) > MAX_LOGGED_SQL:
+        text = text[:MAX_LOGGED_SQL] + '...'
+    return text
+
+
+def log_slow_request(request, view, stats):
+    queries = '\n'.join(
+        f'  {elapsed * 1000:.1f} ms  {format_sql(sql, params)}'
+        for elapsed, sql, params in stats.captured
+    )
+    logger.warning(
+        'Request lento: %s %s (%s) %.1f ms, %d queries em %.1f ms, '
+        'template %.1f ms\n%s',
+        request.method, request.get_full_path(), view,
+        stats.duration * 1000, stats.queries, stats.db_seconds * 1000,
+        stats.template_seconds * 1000, queries,
+    )
+
+
+class MetricsMiddleware:
+    """
+    Fica no topo do MIDDLEWARE para medir o request inteiro. O
+    process_template_response roda por último (ordem inversa), então
+    renderizar ali não pula nenhum outro middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'METRICS_SERVER_TIMING', False)
+        self.slow_seconds = getattr(settings, 'METRICS_SLOW_REQUEST_MS', 0) / 1000
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(stats.execute_wrapper)
+                    )
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        stats.duration = time.perf_counter() - started
+        view = get_view_name(request)
+        registry.observe(view, stats)
+
+        if self.server_timing:
+            response['Server-Timing'] = stats.server_timing()
+
+        if self.slow_seconds and stats.duration >= self.slow_seconds:
+            log_slow_request(request, view, stats)
+
+        return response
+
+    def process_template_response(self, request, response):
+        stats = _current.get()
+        if stats is None:
+            return response
+
+        started = time.perf_counter()
+        response.render()
+        stats.template_seconds += time.perf_counter() - started
+        return response
+
+
+def metrics_view(request):
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    # Em produção /metrics nunca fica aberto: sem token, nem existe
+    if not token and getattr(settings, 'SERVER_MODE', 'dev') == 'prod':
+        raise Http404
+
+    if token and not constant_time_compare(
+        request.headers.get('Authorization', ''), f'Bearer {token}'
+    ):
+        return HttpResponseForbidden()
+
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
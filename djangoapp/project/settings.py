@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 import os
 from pathlib import Path
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 
 
 
@@ -35,6 +36,9 @@ SECRET_KEY = os.getenv('SECET_KEY', 'change-me')
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = bool(int(os.getenv('DEBUG',0)))
 
+# dev = runserver, prod = gunicorn (scripts/commands.sh)
+SERVER_MODE = os.getenv('SERVER_MODE', 'dev')
+
 ALLOWED_HOSTS = [
     h.strip() for h in os.getenv('ALLOWED_HOSTS', '').split(',') if h.strip()
 ]
@@ -51,6 +55,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'blog',
     'site_setup',
+    'jobs',
     'django_summernote',
     #Axes
     'axes',
@@ -58,6 +63,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'project.db_routers.PrimaryPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -93,23 +99,99 @@ TEMPLATES = [
     },
 ]
 
+# Em produção os loaders são explícitos: o cached.Loader guarda cada
+# template compilado na memória do worker e nunca relê o arquivo. O
+# gunicorn compila todos os templates do blog no boot de cada worker
+# (post_worker_init em gunicorn.conf.py, veja project/templates_warmup.py).
+if SERVER_MODE == 'prod':
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
 WSGI_APPLICATION = 'project.wsgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# Com DB_POOL_ENABLED=1 as conexões vêm de um pool dentro de cada processo
+# (project/db_backends/postgresql_pool) e voltam para ele no fim do
+# request. Sem pool, as conexões persistem por DB_CONN_MAX_AGE segundos.
+# Em ambos os casos: workers x conexões por worker <= max_connections.
+
+DB_POOL_ENABLED = bool(int(os.getenv('DB_POOL_ENABLED', 0)))
+
 DATABASES = {
     'default': {
-        'ENGINE': os.getenv('DB_ENGINE','change-me'),
+        'ENGINE': (
+            'project.db_backends.postgresql_pool' if DB_POOL_ENABLED
+            else os.getenv('DB_ENGINE','change-me')
+        ),
         'NAME': os.getenv('POSTGRES_DB','change-me'),
         'USER': os.getenv('POSTGRES_USER','change-me'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD','change-me'),
         'HOST': os.getenv('POSTGRES_HOST','change-me'),
         'PORT': os.getenv('POSTGRES_PORT','change-me'),
+        'CONN_MAX_AGE': (
+            0 if DB_POOL_ENABLED else int(os.getenv('DB_CONN_MAX_AGE', 60))
+        ),
+        'CONN_HEALTH_CHECKS': True,
+        'POOL': {
+            'MIN_SIZE': int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', 4)),
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+        },
+    }
+}
+
+# Réplicas de leitura: "host1,host2:5433". Cada uma vira um alias
+# replica_N com as mesmas credenciais do default. Nos testes elas espelham
+# o default, então não precisam de banco próprio.
+for index, replica in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(','))):
+    replica_host, _, replica_port = replica.strip().partition(':')
+    DATABASES[f'replica_{index}'] = {
+        **DATABASES['default'],
+        'HOST': replica_host,
+        'PORT': replica_port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['project.db_routers.ReplicaRouter']
+
+# Segundos lendo do primário depois de uma escrita (read-your-writes)
+DB_REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', 10))
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# O LocMemCache é por processo; com vários workers use um cache
+# compartilhado (ex.: django.core.cache.backends.redis.RedisCache).
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
+# As invalidações (versão do site_setup, purge do cache de páginas) são
+# gravadas no cache; num cache por processo elas não chegariam aos outros
+# workers do gunicorn nem vindas do run_jobs.
+if SERVER_MODE == 'prod' and CACHES['default']['BACKEND'] in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.filebased.FileBasedCache',
+):
+    raise ImproperlyConfigured(
+        'SERVER_MODE=prod precisa de um cache compartilhado entre processos '
+        '(CACHE_BACKEND, ex.: django.core.cache.backends.redis.RedisCache)'
+    )
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -149,6 +231,31 @@ STATIC_URL = '/static/'
 #/data/web/static
 STATIC_ROOT = DATA_DIR / 'static'
 
+# Em produção (SERVER_MODE=prod) o collectstatic
+# gera nomes com hash do conteúdo e versões .gz/.br (brotli é opcional), e
+# o WhiteNoise serve esses arquivos com Cache-Control immutable de um ano.
+# No dev os estáticos continuam saindo das pastas static/ sem hash.
+STATIC_PIPELINE = SERVER_MODE == 'prod'
+
+if STATIC_PIPELINE:
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+        'whitenoise.middleware.WhiteNoiseMiddleware',
+    )
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'whitenoise.storage.CompressedManifestStaticFilesStorage'
+            if STATIC_PIPELINE
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+
 MEDIA_URL = '/media/'
 # data/web/media
 MEDIA_ROOT = DATA_DIR / 'media'
@@ -201,4 +308,64 @@ SUMMERNOTE_CONFIG = {
 AXES_ENABLED = True
 AXES_FAILURE_LIMIT = 5
 AXES_COOLOFF_TIME = 1
-AXES_RESET_ON_SUCCESS = True
\ No newline at end of file
+AXES_RESET_ON_SUCCESS = True
+
+# Configuração de texto do Postgres usada pela busca (stemming em português)
+BLOG_SEARCH_CONFIG = os.getenv('BLOG_SEARCH_CONFIG', 'portuguese')
+
+# 'offset' usa ?page=N; 'cursor' usa paginação por keyset (?after=/?before=)
+BLOG_PAGINATION_MODE = os.getenv('BLOG_PAGINATION_MODE', 'offset')
+
+# Versão do build no ETag das páginas e na chave dos fragmentos; vazio =
+# hash do código, templates e estáticos (project/build.py)
+BUILD_VERSION = os.getenv('BUILD_VERSION', '')
+
+# Tempo (segundos) das páginas cacheadas para visitantes anônimos; 0 desliga
+BLOG_PAGE_CACHE_TIMEOUT = int(os.getenv('BLOG_PAGE_CACHE_TIMEOUT', 600))
+
+# Tempo (segundos) dos fragmentos cacheados (cards e corpo dos posts,
+# blog/fragments.py); a chave muda a cada edição. 0 desliga
+BLOG_FRAGMENT_CACHE_TIMEOUT = int(os.getenv('BLOG_FRAGMENT_CACHE_TIMEOUT', 86400))
+
+# Fila de jobs no banco (processada por manage.py run_jobs).
+# 0 roda os jobs no próprio request, depois do commit.
+JOBS_ASYNC = bool(int(os.getenv('JOBS_ASYNC', 1)))
+JOBS_RUNNING_TIMEOUT = int(os.getenv('JOBS_RUNNING_TIMEOUT', 600))
+
+# Monta as views async do blog em /async/ para comparar com as sync
+BLOG_ASYNC_VIEWS = bool(int(os.getenv('BLOG_ASYNC_VIEWS', 0)))
+
+# Snapshot estático do blog público (manage.py export_snapshot). Com
+# BLOG_SNAPSHOT_ON_SAVE=1 cada alteração regera só as páginas afetadas.
+BLOG_SNAPSHOT_ROOT = Path(os.getenv('BLOG_SNAPSHOT_ROOT', DATA_DIR / 'snapshot'))
+BLOG_SNAPSHOT_ON_SAVE = bool(int(os.getenv('BLOG_SNAPSHOT_ON_SAVE', 0)))
+# Páginas de cada listagem regeradas a cada save (0 = todas); as demais
+# ficam para o próximo export_snapshot
+BLOG_SNAPSHOT_LISTING_PAGES = int(os.getenv('BLOG_SNAPSHOT_LISTING_PAGES', 5))
+# Host usado nos requests de renderização (padrão: o primeiro ALLOWED_HOSTS)
+BLOG_SNAPSHOT_HOST = os.getenv('BLOG_SNAPSHOT_HOST', '')
+
+# Métricas por view (project/metrics.py): /metrics no formato do
+# Prometheus, header Server-Timing e log dos requests lentos com o SQL.
+METRICS_ENABLED = bool(int(os.getenv('METRICS_ENABLED', 1)))
+METRICS_SERVER_TIMING = bool(int(os.getenv('METRICS_SERVER_TIMING', 0)))
+# Requests acima disso (ms) vão para o log com as queries; 0 desliga
+METRICS_SLOW_REQUEST_MS = float(os.getenv('METRICS_SLOW_REQUEST_MS', 500))
+# Exige "Authorization: Bearer <token>" em /metrics. Vazio deixa aberto
+# em dev; em produção (SERVER_MODE=prod) sem token /metrics responde 404.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+if METRICS_ENABLED:
+    MIDDLEWARE.insert(0, 'project.metrics.MetricsMiddleware')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'project.metrics': {'handlers': ['console'], 'level': 'INFO'},
+        'jobs': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
@@ -0,0 +1,58 @@
+"""
+Compila os templates públicos antes do worker aceitar requests.
+
+O cached.Loader guarda o template compilado na memória do processo na
+primeira vez que ele é pedido; sem aquecimento, quem paga o parse (e o
+carregamento das templatetags) é o primeiro visitante de cada página
+depois de um deploy ou da reciclagem do worker (max_requests). O
+gunicorn.conf.py chama warm_templates() no post_worker_init.
+"""
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.template import engines
+from django.urls import reverse
+
+from project.metrics import registry
+
+# Apps cujos templates são compilados no boot
+WARMUP_APPS = 'blog', 'site_setup',
+
+
+def app_template_names(app_label):
+    directory = Path(apps.get_app_config(app_label).path) / 'templates'
+    if not directory.is_dir():
+        return []
+    return sorted(
+        path.relative_to(directory).as_posix()
+        for path in directory.rglob('*.html')
+    )
+
+
+def warm_templates(app_labels=WARMUP_APPS):
+    """Compila os templates e devolve {nome: segundos de parse}."""
+    engine = engines['django'].engine
+    timings = {}
+
+    for app_label in app_labels:
+        for name in app_template_names(app_label):
+            started = time.perf_counter()
+            engine.get_template(name)
+            timings[name] = time.perf_counter() - started
+
+    # O primeiro reverse() monta os dicionários do resolver de URLs
+    reverse('blog:index')
+
+    for name, seconds in timings.items():
+        registry.set_gauge(
+            'blog_template_parse_seconds',
+            'Tempo de parse de cada template no boot do worker.',
+            seconds, template=name,
+        )
+    registry.set_gauge(
+        'blog_template_warmup_seconds',
+        'Tempo total compilando os templates no boot do worker.',
+        sum(timings.values()),
+    )
+    return timings
@@ -0,0 +1,279 @@
+import tempfile
+import threading
+import time
+from pathlib import Path
+from unittest import mock
+
+import psycopg2
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.template import engines
+from django.test import (
+    SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+from django.urls import reverse
+from django.utils.connection import ConnectionDoesNotExist
+from psycopg2.pool import PoolError
+
+from blog.models import Post
+from blog.snapshot import render_groups
+from jobs.models import Job
+from project.db_backends.postgresql_pool import base as pg_pool
+from project.db_routers import PRIMARY_COOKIE, ReplicaRouter, use_primary
+from project.metrics import registry
+from project.templates_warmup import warm_templates
+from site_setup.models import SiteSetup
+
+
+@mock.patch('project.db_routers.get_replicas', return_value=['replica_0'])
+class ReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_go_to_replica(self, get_replicas):
+        self.assertEqual(self.router.db_for_read(Post), 'replica_0')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_pinned_reads_go_to_primary(self, get_replicas):
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Job), 'default')
+
+
+class PrimaryPinMiddlewareTests(TestCase):
+
+    def test_admin_write_sets_sticky_cookie(self):
+        admin = User.objects.create_superuser('admin', password='x')
+        self.client.force_login(admin)
+
+        response = self.client.get(reverse('blog:index'))
+        self.assertNotIn(PRIMARY_COOKIE, response.cookies)
+
+        response = self.client.post(
+            reverse('admin:blog_category_add'), {'name': 'Nova'}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(PRIMARY_COOKIE, response.cookies)
+
+
+@override_settings(
+    BLOG_PAGINATION_MODE='offset', ALLOWED_HOSTS=['localhost', 'testserver'],
+    DB_REPLICA_STICKY_SECONDS=0,
+)
+@mock.patch('project.db_routers.get_replicas', return_value=['replica_0'])
+class ReplicaLagTests(TransactionTestCase):
+    """
+    Sem a transação do TestCase (que já manda tudo para o primário) e sem
+    a janela depois do purge. A replica_0 não existe: qualquer leitura
+    roteada para ela quebra.
+    """
+
+    def setUp(self):
+        cache.clear()
+        SiteSetup.objects.create(title='Blog', description='Teste')
+        self.post = Post.objects.create(
+            title='Post', excerpt='e', content='c', is_published=True,
+        )
+
+    def test_request_inside_use_primary_stays_on_primary(self, get_replicas):
+        with self.assertRaises(ConnectionDoesNotExist):
+            self.client.get(reverse('blog:index'))
+
+        with use_primary():
+            response = self.client.get(reverse('blog:index'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_snapshot_job_renders_from_primary(self, get_replicas):
+        with tempfile.TemporaryDirectory() as root:
+            with self.settings(BLOG_SNAPSHOT_ROOT=Path(root)):
+                render_groups({'index', f'post:{self.post.slug}'})
+
+            self.assertIn('Post', (Path(root) / 'index.html').read_text())
+            self.assertTrue((Path(root) / 'post' / self.post.slug / 'index.html').exists())
+
+
+def fake_pg_connection(*args, **kwargs):
+    connection = mock.MagicMock(closed=0)
+    connection.close.side_effect = lambda: setattr(connection, 'closed', 1)
+    return connection
+
+
+@mock.patch('psycopg2.pool.psycopg2.connect', side_effect=fake_pg_connection)
+class ConnectionPoolTests(SimpleTestCase):
+
+    def setUp(self):
+        self.addCleanup(pg_pool._pools.clear)
+
+    def test_close_pools_closes_idle_connections_before_fork(self, connect):
+        connection_pool = pg_pool.get_pool('default', {}, {'dbname': 'blog'})
+        conn = connection_pool.getconn()
+        connection_pool.putconn(conn)
+
+        pg_pool.close_pools()
+
+        conn.close.assert_called_once_with()
+        self.assertEqual(pg_pool._pools, {})
+
+    def test_pool_per_alias_and_connection_params(self, connect):
+        pool = pg_pool.get_pool('default', {}, {'dbname': 'blog'})
+
+        self.assertIs(pg_pool.get_pool('default', {}, {'dbname': 'blog'}), pool)
+        self.assertIsNot(pg_pool.get_pool('default', {}, {'dbname': 'test_blog'}), pool)
+        self.assertIsNot(pg_pool.get_pool('replica_0', {}, {'dbname': 'blog'}), pool)
+
+        # Valores sem hash vindos do OPTIONS
+        options = {'dbname': 'blog', 'options': ['-c', 'x=1'], 'extra': {'a': 1}}
+        pool = pg_pool.get_pool('default', {}, options)
+        self.assertIs(pg_pool.get_pool('default', {}, dict(options)), pool)
+
+    def test_waits_for_a_free_connection_then_times_out(self, connect):
+        settings_dict = {'POOL': {'MAX_SIZE': 1, 'TIMEOUT': 0.05}}
+        connection_pool = pg_pool.get_pool('default', settings_dict, {})
+        conn = connection_pool.getconn()
+
+        started = time.monotonic()
+        with self.assertRaises(PoolError):
+            connection_pool.getconn()
+        self.assertGreaterEqual(time.monotonic() - started, 0.05)
+
+        connection_pool._timeout = 5
+        threading.Timer(0.05, connection_pool.putconn, (conn,)).start()
+        self.assertIs(connection_pool.getconn(), conn)
+
+    def test_keeps_up_to_max_size_idle_connections(self, connect):
+        settings_dict = {'POOL': {'MIN_SIZE': 1, 'MAX_SIZE': 3}}
+        connection_pool = pg_pool.get_pool('default', settings_dict, {})
+
+        conns = [connection_pool.getconn() for _ in range(3)]
+        for conn in conns:
+            connection_pool.putconn(conn)
+        again = [connection_pool.getconn() for _ in range(3)]
+
+        self.assertEqual({id(conn) for conn in again}, {id(conn) for conn in conns})
+        self.assertEqual(connect.call_count, 3)
+
+    def test_idle_connection_is_checked_before_reuse(self, connect):
+        settings_dict = {'POOL': {'CHECK_AFTER': 30}}
+        connection_pool = pg_pool.get_pool('default', settings_dict, {})
+        conn = connection_pool.getconn()
+        connection_pool.putconn(conn)
+
+        # Devolvida agora: volta sem SELECT 1
+        self.assertIs(connection_pool.getconn(), conn)
+        conn.cursor.assert_not_called()
+        connection_pool.putconn(conn)
+
+        # Parada há mais que CHECK_AFTER e o servidor derrubou a conexão
+        cursor = conn.cursor.return_value.__enter__.return_value
+        cursor.execute.side_effect = psycopg2.OperationalError
+        later = time.monotonic() + 60
+        with mock.patch(
+            'project.db_backends.postgresql_pool.base.time.monotonic',
+            return_value=later,
+        ):
+            fresh = connection_pool.getconn()
+
+        cursor.execute.assert_called_once_with('SELECT 1')
+        self.assertIsNot(fresh, conn)
+        self.assertTrue(conn.closed)
+        self.assertNotIn(id(conn), connection_pool._returned_at)
+
+    def test_closed_connection_forgets_return_time(self, connect):
+        connection_pool = pg_pool.get_pool('default', {}, {})
+        conn = connection_pool.getconn()
+        connection_pool.putconn(conn, close=True)
+
+        self.assertTrue(conn.closed)
+        self.assertEqual(connection_pool._returned_at, {})
+
+
+@override_settings(
+    BLOG_PAGINATION_MODE='offset', METRICS_SERVER_TIMING=True,
+    METRICS_SLOW_REQUEST_MS=0, METRICS_TOKEN='',
+)
+class MetricsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        SiteSetup.objects.create(title='Blog', description='Teste')
+        for i in range(3):
+            Post.objects.create(
+                title=f'Medido {i}', excerpt='Resumo', content='Conteúdo',
+                is_published=True,
+            )
+
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+
+    def test_records_queries_templates_and_cache_per_view(self):
+        response = self.client.get(reverse('blog:index'))
+        self.assertIn('db;dur=', response['Server-Timing'])
+        self.client.get(reverse('blog:index'))
+
+        stats = registry.snapshot()['blog:index']
+        self.assertEqual(stats['requests'], 2)
+        self.assertGreater(stats['queries'], 0)
+        self.assertGreater(stats['template_seconds'], 0)
+        self.assertEqual((stats['cache_hits'], stats['cache_misses']), (1, 1))
+
+    def test_prometheus_endpoint(self):
+        self.client.get(reverse('blog:index'))
+        response = self.client.get(reverse('metrics'))
+
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('# TYPE blog_request_duration_seconds histogram', body)
+        self.assertRegex(
+            body, r'blog_request_duration_seconds_count\{view="blog:index",'
+            r'worker="\d+"\} 1'
+        )
+
+        with self.settings(METRICS_TOKEN='segredo'):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+            response = self.client.get(
+                reverse('metrics'), HTTP_AUTHORIZATION='Bearer segredo'
+            )
+            self.assertEqual(response.status_code, 200)
+
+    def test_prometheus_endpoint_needs_token_in_production(self):
+        with self.settings(SERVER_MODE='prod'):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 404)
+
+            with self.settings(METRICS_TOKEN='segredo'):
+                self.assertEqual(
+                    self.client.get(reverse('metrics')).status_code, 403
+                )
+                response = self.client.get(
+                    reverse('metrics'), HTTP_AUTHORIZATION='Bearer segredo'
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_slow_request_logs_sql(self):
+        with self.settings(METRICS_SLOW_REQUEST_MS=0.001):
+            client = self.client_class()
+            with self.assertLogs('project.metrics', 'WARNING') as logs:
+                client.get(reverse('blog:index'))
+
+        self.assertIn('blog:index', logs.output[0])
+        self.assertIn('SELECT', logs.output[0])
+
+
+class TemplateWarmupTests(SimpleTestCase):
+
+    def setUp(self):
+        registry.reset()
+
+    def test_compiles_templates_into_cached_loader(self):
+        timings = warm_templates()
+
+        self.assertIn('blog/pages/index.html', timings)
+        self.assertIn('blog/partials/_post-card.html', timings)
+
+        loader = engines['django'].engine.template_loaders[0]
+        self.assertIn('blog/pages/post.html', loader.get_template_cache)
+        self.assertIn(
+            'blog_template_parse_seconds{worker="', registry.render()
+        )
@@ -19,12 +19,24 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from project.metrics import metrics_view
+
 urlpatterns = [
     path('', include('blog.urls')),
     path('admin/', admin.site.urls),
     path('summernote/', include('django_summernote.urls')),
 ]
 
+if settings.METRICS_ENABLED:
+    urlpatterns += [
+        path('metrics', metrics_view, name='metrics'),
+    ]
+
+if settings.BLOG_ASYNC_VIEWS:
+    urlpatterns += [
+        path('async/', include('blog.async_urls')),
+    ]
+
 if settings.DEBUG:
     urlpatterns += static(
         settings.MEDIA_URL,
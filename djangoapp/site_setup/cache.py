@@ -0,0 +1,67 @@
+import time
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+from site_setup.models import SiteSetup
+
+VERSION_KEY = 'site_setup:version'
+DATA_KEY = 'site_setup:data:{version}'
+
+# Cópia local do processo: (versão, (setup, links)). É trocada inteira
+# numa única atribuição, então não precisa de lock entre threads.
+_local = (None, None)
+
+
+def new_version():
+    # "<uuid>:<timestamp>": o momento da troca vira o Last-Modified das
+    # páginas (blog/page_cache.py)
+    return f'{uuid4().hex}:{time.time():.3f}'
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+
+    if version is None:
+        version = new_version()
+        cache.add(VERSION_KEY, version, None)
+        # Outro processo pode ter criado primeiro; sem cache (DummyCache)
+        # ou com a chave já descartada fica a que acabamos de gerar
+        version = cache.get(VERSION_KEY) or version
+
+    return version
+
+
+def load_site_setup():
+    setup = SiteSetup.objects.order_by('-id').first()
+    menu_links = list(setup.menulink_set.all()) if setup else []
+    return setup, menu_links
+
+
+def get_site_setup():
+    global _local
+
+    version = get_version()
+    local_version, value = _local
+
+    if local_version == version:
+        return value
+
+    key = DATA_KEY.format(version=version)
+    value = cache.get(key)
+
+    if value is None:
+        value = load_site_setup()
+        cache.set(key, value, None)
+
+    _local = version, value
+    return value
+
+
+def invalidate_site_setup():
+    # Só troca a versão depois do commit, senão outro processo poderia
+    # recarregar e guardar os dados antigos antes da gravação terminar.
+    transaction.on_commit(
+        lambda: cache.set(VERSION_KEY, new_version(), None)
+    )
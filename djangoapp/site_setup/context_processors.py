@@ -1,4 +1,4 @@
-from site_setup.models import SiteSetup
+from site_setup.cache import get_site_setup
 
 def example_proc(request):
     return {
@@ -6,7 +6,8 @@ def example_proc(request):
     }
 
 def site_setup(request):
-    setup = SiteSetup.objects.order_by('-id').first()
+    setup, menu_links = get_site_setup()
     return {
         'site_setup': setup,
-    }
\ No newline at end of file
+        'menu_links': menu_links,
+    }
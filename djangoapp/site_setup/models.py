@@ -1,6 +1,6 @@
 from django.db import models
 from utils.model_validators import validate_png
-from utils.images import resize_image
+from utils.images import enqueue_resize_image
 
 # Create your models here.
 class MenuLink(models.Model):
@@ -51,7 +51,7 @@ class SiteSetup(models.Model):
             favicon_changed = current_favicon_name != self.favicon.name
 
         if favicon_changed:
-            resize_image(self.favicon, 32)
+            enqueue_resize_image(self.favicon, 32)
 
     def __str__(self):
         return self.title
\ No newline at end of file
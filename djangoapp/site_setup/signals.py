@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from site_setup.cache import invalidate_site_setup
+from site_setup.models import MenuLink, SiteSetup
+
+
+@receiver(post_save, sender=SiteSetup)
+@receiver(post_delete, sender=SiteSetup)
+@receiver(post_save, sender=MenuLink)
+@receiver(post_delete, sender=MenuLink)
+def site_setup_changed(sender, **kwargs):
+    invalidate_site_setup()
@@ -1,3 +1,50 @@
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from site_setup.cache import get_site_setup, get_version
+from site_setup.models import MenuLink, SiteSetup
+
+
+class SiteSetupCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.setup = SiteSetup.objects.create(title='Blog', description='x')
+
+    def test_cached_after_first_load(self):
+        with self.assertNumQueries(2):
+            get_site_setup()
+        with self.assertNumQueries(0):
+            setup, menu_links = get_site_setup()
+        self.assertEqual(setup, self.setup)
+        self.assertEqual(menu_links, [])
+
+    def test_menu_link_change_invalidates(self):
+        get_site_setup()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            link = MenuLink.objects.create(
+                text='Home', url_or_path='/', site_setup=self.setup
+            )
+
+        self.assertEqual(get_site_setup()[1], [link])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            link.delete()
+
+        self.assertEqual(get_site_setup()[1], [])
+
+    def test_site_setup_change_invalidates(self):
+        get_site_setup()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.setup.title = 'Novo título'
+            self.setup.save()
+
+        self.assertEqual(get_site_setup()[0].title, 'Novo título')
+
+    @override_settings(CACHES={
+        'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+    })
+    def test_works_without_cache(self):
+        self.assertIsNotNone(get_version())
+        self.assertEqual(get_site_setup()[0], self.setup)
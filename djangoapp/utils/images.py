@@ -1,26 +1,109 @@
+import os
+import tempfile
 from pathlib import Path
 
 from django.conf import settings
-from PIL import Image
+from PIL import ExifTags, Image
+
+# Orientação EXIF -> transposição que deixa a imagem "em pé"
+EXIF_TRANSPOSE = {
+    2: Image.Transpose.FLIP_LEFT_RIGHT,
+    3: Image.Transpose.ROTATE_180,
+    4: Image.Transpose.FLIP_TOP_BOTTOM,
+    5: Image.Transpose.TRANSPOSE,
+    6: Image.Transpose.ROTATE_270,
+    7: Image.Transpose.TRANSVERSE,
+    8: Image.Transpose.ROTATE_90,
+}
 
 
 def resize_image(image_django, new_width=800, optimize=True, quality=60):
-    image_path = Path(settings.MEDIA_ROOT / image_django.name).resolve()
-    image_pillow = Image.open(image_path)
-    original_width, original_height = image_pillow.size
+    return resize_image_file(
+        image_django.name, new_width, optimize=optimize, quality=quality
+    )
+
+
+def resize_image_file(name, new_width=800, optimize=True, quality=60):
+    image_path = Path(settings.MEDIA_ROOT / name).resolve()
+    return resize_image_path(
+        image_path, new_width, optimize=optimize, quality=quality
+    )
+
+
+def resize_image_path(image_path, new_width=800, optimize=True, quality=60):
+    """
+    Redimensiona a imagem no próprio arquivo sem decodificar o original
+    inteiro: para JPEG (e MPO) o draft() já decodifica reduzido (1/2, 1/4
+    ou 1/8) e o resize com reducing_gap faz um reduce() barato antes do
+    LANCZOS. O perfil ICC do original vai junto para o arquivo novo.
+    Retorna None quando a imagem já está no tamanho e em pé.
+    """
+    with Image.open(image_path) as image_pillow:
+        image_format = image_pillow.format
+        orientation = image_pillow.getexif().get(ExifTags.Base.Orientation, 1)
+        transpose = EXIF_TRANSPOSE.get(orientation)
+        width, height = image_pillow.size
 
-    if original_width <= new_width:
-        image_pillow.close()
-        return image_pillow
+        # A largura pedida é a de exibição, depois de aplicar a orientação
+        rotated = orientation in (5, 6, 7, 8)
+        display_width, display_height = (height, width) if rotated else (width, height)
 
-    new_height = round(new_width * original_height / original_width)
+        if display_width <= new_width and transpose is None:
+            return None
 
-    new_image = image_pillow.resize((new_width, new_height), Image.LANCZOS)
+        target_width = min(new_width, display_width)
+        target_height = round(target_width * display_height / display_width)
+        size = (target_height, target_width) if rotated else (target_width, target_height)
 
-    new_image.save(
-        image_path,
-        optimize=optimize,
-        quality=quality,
+        # MPO é o JPEG de várias imagens que muitas câmeras e celulares
+        # gravam; o primeiro quadro decodifica como um JPEG qualquer.
+        if image_format in ('JPEG', 'MPO'):
+            image_pillow.draft(image_pillow.mode, size)
+        # Sem o perfil de cor, fotos em Display P3/Adobe RGB ficam lavadas
+        icc_profile = image_pillow.info.get('icc_profile')
+
+        if size == image_pillow.size:
+            new_image = image_pillow.copy()
+        else:
+            new_image = image_pillow.resize(
+                size, Image.LANCZOS, reducing_gap=2.0
+            )
+
+    if transpose is not None:
+        new_image = new_image.transpose(transpose)
+
+    # Grava num arquivo temporário e troca de uma vez, assim quem estiver
+    # servindo a imagem nunca lê um arquivo pela metade.
+    fd, tmp_path = tempfile.mkstemp(
+        dir=Path(image_path).parent, suffix=Path(image_path).suffix
     )
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            new_image.save(
+                tmp_file,
+                # Só o primeiro quadro do MPO sobra, então vira JPEG comum
+                format='JPEG' if image_format == 'MPO' else image_format,
+                optimize=optimize,
+                quality=quality,
+                icc_profile=icc_profile,
+            )
+        os.chmod(tmp_path, os.stat(image_path).st_mode & 0o777)
+        os.replace(tmp_path, image_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    return new_image
 
-    return new_image
\ No newline at end of file
+
+def enqueue_resize_image(
+    image_django, new_width=800, optimize=True, quality=60, renditions=False
+):
+    # Import tardio: os models importam este módulo antes do app jobs
+    # estar pronto.
+    from jobs.queue import enqueue
+
+    return enqueue(
+        'resize_image', name=image_django.name, new_width=new_width,
+        optimize=optimize, quality=quality, renditions=renditions,
+    )
@@ -0,0 +1,155 @@
+"""
+Slugs únicos e legíveis: "meu-post", e se já existir, "meu-post-2",
+"meu-post-3"...
+
+Os slugs que podem colidir com uma base são ela mesma e "raiz-N", então
+uma única query por prefixo (slug = base OR slug LIKE 'raiz-%') traz
+tudo o que está ocupado. No Postgres o índice unique de SlugField vem
+acompanhado de um índice *_like (varchar_pattern_ops), que atende o LIKE
+de prefixo como uma busca por faixa.
+
+A raiz é a base já cortada para caber o sufixo no max_length do campo
+(quase sempre é a própria base). Ela é calculada uma vez e usada tanto
+na query quanto na leitura dos números, senão uma base comprida geraria
+"raiz-2" sem nunca achá-lo de novo.
+"""
+import re
+from functools import reduce
+from operator import or_
+
+from django.db import IntegrityError, router, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+MAX_ATTEMPTS = 5
+# Quantas bases diferentes vão em cada query do assign_slugs
+BULK_CHUNK_SIZE = 200
+# Espaço guardado para o "-N" quando a base encosta no max_length
+SUFFIX_LENGTH = 10
+
+
+def base_slug(text, max_length):
+    return slugify(text)[:max_length].strip('-') or 'item'
+
+
+def suffix_root(base, max_length):
+    if len(base) + SUFFIX_LENGTH <= max_length:
+        return base
+    return base[:max_length - SUFFIX_LENGTH].rstrip('-')
+
+
+def with_suffix(base, root, number):
+    if number <= 1:
+        return base
+    return f'{root}-{number}'
+
+
+def prefix_filter(field, base, root):
+    return Q(**{field: base}) | Q(**{f'{field}__startswith': root + '-'})
+
+
+def highest_suffixes(slugs, roots):
+    """
+    Maior número já usado por raiz, com roots = {base: raiz}: 1 para a
+    base, N para "raiz-N". Bases compridas diferentes podem ter a mesma
+    raiz, e aí dividem a numeração.
+    """
+    highest = {}
+    for slug in slugs:
+        for base, root in roots.items():
+            if slug == base:
+                number = 1
+            elif slug.startswith(root + '-') and re.fullmatch(r'\d+', slug[len(root) + 1:]):
+                number = int(slug[len(root) + 1:])
+            else:
+                continue
+            highest[root] = max(highest.get(root, 0), number)
+    return highest
+
+
+def unique_slug(model, text, field='slug', exclude_pk=None, using=None):
+    max_length = model._meta.get_field(field).max_length
+    base = base_slug(text, max_length)
+    root = suffix_root(base, max_length)
+
+    queryset = model._default_manager.using(using).filter(
+        prefix_filter(field, base, root)
+    )
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+
+    slugs = set(queryset.values_list(field, flat=True))
+    if base not in slugs:
+        return base
+    number = highest_suffixes(slugs, {base: root})[root] + 1
+    return with_suffix(base, root, number)
+
+
+def save_with_slug(instance, text, save, *args, field='slug', **kwargs):
+    """
+    Chama save(*args, **kwargs) garantindo um slug único quando ele está
+    vazio. Se um save concorrente pegar o mesmo slug entre a consulta e o
+    INSERT, o IntegrityError fica preso num savepoint e o slug é gerado
+    de novo.
+    """
+    if getattr(instance, field):
+        return save(*args, **kwargs)
+
+    model = type(instance)
+    using = kwargs.get('using') or router.db_for_write(model, instance=instance)
+
+    for attempt in range(MAX_ATTEMPTS):
+        slug = unique_slug(model, text, field, instance.pk, using)
+        setattr(instance, field, slug)
+        try:
+            with transaction.atomic(using=using):
+                return save(*args, **kwargs)
+        except IntegrityError:
+            setattr(instance, field, '')
+            taken = model._default_manager.using(using).filter(
+                **{field: slug}
+            ).exclude(pk=instance.pk).exists()
+            if not taken or attempt == MAX_ATTEMPTS - 1:
+                raise
+
+
+def assign_slugs(model, objs, text_attr, field='slug', using=None):
+    """
+    Preenche o slug de uma lista de objetos ainda não salvos (para
+    bulk_create). Faz uma query a cada BULK_CHUNK_SIZE bases diferentes e
+    resolve as colisões entre os próprios objetos em memória.
+    """
+    max_length = model._meta.get_field(field).max_length
+    pending = [obj for obj in objs if not getattr(obj, field)]
+    bases = {
+        id(obj): base_slug(getattr(obj, text_attr), max_length)
+        for obj in pending
+    }
+    roots = {
+        base: suffix_root(base, max_length) for base in sorted(set(bases.values()))
+    }
+    distinct = list(roots)
+
+    # Slugs já preenchidos na própria lista também estão ocupados
+    taken = {getattr(obj, field) for obj in objs if getattr(obj, field)}
+    for start in range(0, len(distinct), BULK_CHUNK_SIZE):
+        chunk = distinct[start:start + BULK_CHUNK_SIZE]
+        taken.update(model._default_manager.using(using).filter(reduce(or_, (
+            prefix_filter(field, base, roots[base]) for base in chunk
+        ))).values_list(field, flat=True))
+
+    highest = highest_suffixes(taken, roots)
+
+    for obj in pending:
+        base = bases[id(obj)]
+        root = roots[base]
+        if base in taken:
+            number = highest.get(root, 1) + 1
+            highest[root] = number
+            slug = with_suffix(base, root, number)
+        else:
+            slug = base
+        taken.add(slug)
+        setattr(obj, field, slug)
+
+    return objs
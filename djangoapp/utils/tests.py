@@ -0,0 +1,167 @@
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from PIL import ExifTags, Image, ImageCms
+from PIL.JpegImagePlugin import JpegImageFile
+
+from blog.models import Category, Post, Tag
+from utils import slugs
+from utils.images import resize_image_path
+
+
+class SlugTests(TestCase):
+
+    def test_clean_slug_and_collision_suffix(self):
+        first = Post.objects.create(title='Olá Mundo', excerpt='e', content='c')
+        second = Post.objects.create(title='Olá mundo!', excerpt='e', content='c')
+        third = Post.objects.create(title='Olá mundo', excerpt='e', content='c')
+
+        self.assertEqual(first.slug, 'ola-mundo')
+        self.assertEqual(second.slug, 'ola-mundo-2')
+        self.assertEqual(third.slug, 'ola-mundo-3')
+
+    def test_one_query_per_slug(self):
+        Tag.objects.create(name='Django')
+        with self.assertNumQueries(1):
+            self.assertEqual(slugs.unique_slug(Tag, 'Django'), 'django-2')
+
+    def test_unrelated_suffix_does_not_take_base(self):
+        Tag.objects.create(name='Python 3')
+        self.assertEqual(Tag.objects.create(name='Python').slug, 'python')
+        self.assertEqual(Tag.objects.create(name='Python').slug, 'python-4')
+
+    def test_retries_when_slug_is_taken_concurrently(self):
+        Category.objects.create(name='Notícias')
+        original = slugs.unique_slug
+        answers = iter(['noticias'])
+
+        # Simula outro save que pegou o slug entre a consulta e o INSERT
+        def stale_unique_slug(*args, **kwargs):
+            return next(answers, None) or original(*args, **kwargs)
+
+        with mock.patch('utils.slugs.unique_slug', stale_unique_slug):
+            category = Category.objects.create(name='Notícias')
+        self.assertEqual(category.slug, 'noticias-2')
+
+    def test_assign_slugs_in_bulk(self):
+        Tag.objects.create(name='Bulk')
+        tags = [Tag(name='Bulk') for _ in range(3)] + [Tag(name='Outra')]
+
+        with self.assertNumQueries(1):
+            slugs.assign_slugs(Tag, tags, 'name')
+
+        self.assertEqual(
+            [tag.slug for tag in tags],
+            ['bulk-2', 'bulk-3', 'bulk-4', 'outra'],
+        )
+        Tag.objects.bulk_create(tags)
+
+    def test_long_base_keeps_counting_suffixes(self):
+        # Base no limite do campo: o "-N" entra no lugar do fim da base
+        name = 'palavra ' * 40
+        created = [Tag.objects.create(name=name) for _ in range(4)]
+        root = created[0].slug[:245].rstrip('-')
+
+        self.assertEqual(len(created[0].slug), 255)
+        self.assertEqual(
+            [tag.slug for tag in created[1:]],
+            [f'{root}-2', f'{root}-3', f'{root}-4'],
+        )
+
+        tags = [Tag(name=name), Tag(name=name)]
+        slugs.assign_slugs(Tag, tags, 'name')
+        self.assertEqual([tag.slug for tag in tags], [f'{root}-5', f'{root}-6'])
+        Tag.objects.bulk_create(tags)
+
+    def test_long_bases_with_same_root_share_suffixes(self):
+        first = 'a' * 250 + 'x'
+        second = 'a' * 250 + 'y'
+        Tag.objects.create(name=first)
+        Tag.objects.create(name=second)
+
+        tags = [Tag(name=first), Tag(name=second)]
+        slugs.assign_slugs(Tag, tags, 'name')
+        self.assertEqual(
+            [tag.slug for tag in tags], ['a' * 245 + '-2', 'a' * 245 + '-3']
+        )
+        Tag.objects.bulk_create(tags)
+
+
+class ResizeImageTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def save(self, image, name, format, **options):
+        path = self.directory / name
+        image.save(path, format, **options)
+        return path
+
+    def exif(self, orientation):
+        exif = Image.Exif()
+        exif[ExifTags.Base.Orientation] = orientation
+        return exif.tobytes()
+
+    def test_small_upright_image_is_untouched(self):
+        path = self.save(Image.new('RGB', (50, 20)), 'pequena.png', 'PNG')
+        before = path.read_bytes()
+
+        self.assertIsNone(resize_image_path(path, 100))
+        self.assertEqual(path.read_bytes(), before)
+
+    def test_exif_orientation_is_applied(self):
+        # Foto deitada no arquivo, em pé na tela
+        for new_width, size in ((50, (50, 100)), (100, (100, 200))):
+            with self.subTest(new_width=new_width):
+                path = self.save(
+                    Image.new('RGB', (200, 100)), 'foto.jpg', 'JPEG',
+                    exif=self.exif(6),
+                )
+                resize_image_path(path, new_width)
+
+                with Image.open(path) as image:
+                    self.assertEqual(image.size, size)
+                    self.assertEqual(image.format, 'JPEG')
+                    self.assertNotIn(
+                        ExifTags.Base.Orientation, image.getexif()
+                    )
+
+    def test_jpeg_and_mpo_decode_reduced(self):
+        big = Image.new('RGB', (1600, 800), 'red')
+        paths = [
+            self.save(big, 'foto.jpg', 'JPEG'),
+            self.save(
+                big, 'celular.jpg', 'MPO', save_all=True, append_images=[big],
+            ),
+        ]
+        for path in paths:
+            with self.subTest(path=path.name):
+                with mock.patch(
+                    'PIL.JpegImagePlugin.JpegImageFile.draft', autospec=True,
+                    side_effect=JpegImageFile.draft,
+                ) as draft:
+                    resize_image_path(path, 100)
+                draft.assert_called_once()
+
+                with Image.open(path) as image:
+                    self.assertEqual((image.format, image.size), ('JPEG', (100, 50)))
+
+    def test_keeps_icc_profile_and_mode(self):
+        profile = ImageCms.ImageCmsProfile(ImageCms.createProfile('sRGB')).tobytes()
+        images = [
+            (Image.new('RGB', (400, 200)), 'foto.jpg', 'JPEG'),
+            (Image.new('RGBA', (400, 200)), 'logo.png', 'PNG'),
+        ]
+        for image, name, format in images:
+            with self.subTest(format=format):
+                path = self.save(image, name, format, icc_profile=profile)
+                resize_image_path(path, 100)
+
+                with Image.open(path) as resized:
+                    self.assertEqual(resized.size, (100, 50))
+                    self.assertEqual(resized.mode, image.mode)
+                    self.assertEqual(resized.info.get('icc_profile'), profile)
@@ -8,8 +8,57 @@ while ! nc -z $POSTGRES_HOST $POSTGRES_PORT ; do
 done
 echo "Posrgres Database Startup Successfully ($POSTGRES_HOST:$POSTGRES_PORT)"
 
-python manage.py collectstatic --noinput
-python manage.py makemigrations  --noinput
-python manage.py migrate  --noinput
-python manage.py runserver 0.0.0.0:8000
+# dev: runserver com makemigrations, como antes
+# prod: gunicorn com vários workers (project/gunicorn.conf.py)
+# O modo vem do settings.py (que lê o .env por cima do ambiente), para o
+# shell e o Django nunca discordarem. O padrão é dev.
+SERVER_MODE=$(python -c "
+from project import settings
+print(settings.SERVER_MODE)
+")
+export SERVER_MODE
 
+if [ "$SERVER_MODE" = "dev" ]; then
+    # Com o código montado pelo docker-compose os arquivos do build da
+    # imagem ficam escondidos; sem eles o site usa os CSS/JS de origem
+    python manage.py vendor_assets || echo "CodeMirror not downloaded, code blocks stay plain"
+    python manage.py build_assets || echo "Bundles not built, serving source files"
+    python manage.py collectstatic --noinput
+    python manage.py makemigrations  --noinput
+    python manage.py migrate  --noinput
+    python manage.py rerender_content --missing
+    exec python manage.py runserver 0.0.0.0:8000
+fi
+
+# O CodeMirror e os bundles são gerados no build da imagem (Dockerfile).
+
+# Só roda o collectstatic quando algum arquivo estático ou dependência
+# mudou desde o último boot.
+STATIC_ROOT="${STATIC_ROOT:-/data/web/static}"
+STATIC_STAMP="$STATIC_ROOT/.fingerprint"
+STATIC_FINGERPRINT=$(
+    {
+        pip freeze
+        find /djangoapp -path '*/static/*' -type f -exec md5sum {} + | sort
+    } | md5sum | cut -d ' ' -f 1
+)
+
+if [ "$(cat "$STATIC_STAMP" 2>/dev/null)" != "$STATIC_FINGERPRINT" ]; then
+    python manage.py collectstatic --noinput
+    echo "$STATIC_FINGERPRINT" > "$STATIC_STAMP"
+else
+    echo "Static files unchanged, skipping collectstatic"
+fi
+
+# migrate --check sai com erro quando há migrações pendentes
+if ! python manage.py migrate --check > /dev/null 2>&1; then
+    python manage.py migrate --noinput
+else
+    echo "No pending migrations, skipping migrate"
+fi
+
+# Preenche o HTML renderizado de posts e páginas que ainda não o têm (os
+# de antes da migração 0008); sem nada faltando são só duas queries.
+python manage.py rerender_content --missing
+
+exec gunicorn -c project/gunicorn.conf.py
@@ -0,0 +1,10 @@
+#!/bin/sh
+#shell ira encerrar a execução so script quando um comando falhar
+
+set -e
+while ! nc -z $POSTGRES_HOST $POSTGRES_PORT ; do
+    echo "Waiting for Posrgres Database Startup ($POSTGRES_HOST $POSTGRES_PORT)..."
+    sleep 2
+done
+
+python manage.py run_jobs